@@ -0,0 +1,137 @@
+import os
+import random
+import zipfile
+from collections.abc import Iterable
+from xml.sax.saxutils import escape
+
+CONTAINER_XML = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+WORDS = (
+    "the of and to in that was he it his with as had for her she you not on at but by be him which this my all "
+    "from have so were they said one there when we would what been their me who an no if more them or could "
+    "house letter garden morning river village carriage evening brother sister captain doctor window journey "
+    "silence promise fortune winter summer shadow kingdom harbour forest ship storm candle mirror secret"
+).split()
+
+WORDS_PER_PARAGRAPH = 80
+
+
+def synthetic_epub_id(index: int) -> str:
+    """
+    Returns the EPUB identifier of the index-th synthetic book, e.g. 7 -> "bench7".
+
+    Args:
+        index: The position of the book in the synthetic corpus.
+
+    Returns:
+        The EPUB identifier.
+    """
+    return f"bench{index}"
+
+
+def _chapter_html(rng: random.Random, chapter_number: int, words_per_chapter: int) -> str:
+    paragraphs = []
+    for start in range(0, words_per_chapter, WORDS_PER_PARAGRAPH):
+        words = rng.choices(WORDS, k=min(WORDS_PER_PARAGRAPH, words_per_chapter - start))
+        paragraphs.append(f"<p>{' '.join(words).capitalize()}.</p>")
+    return (
+        f"<html><head><title>Chapter {chapter_number}</title></head>"
+        f"<body><h2>CHAPTER {chapter_number}</h2>{''.join(paragraphs)}</body></html>"
+    )
+
+
+def write_synthetic_epub(file_path: str, chapters: int = 20, words_per_chapter: int = 2000, seed: int = 0) -> str:
+    """
+    Writes a deterministic EPUB with Dublin Core metadata and generated chapters of pseudo-English text.
+
+    Args:
+        file_path: The path of the EPUB file to write.
+        chapters: The number of chapters in the spine.
+        words_per_chapter: The number of words in each chapter.
+        seed: The seed of the text generator, the same seed always produces the same book.
+
+    Returns:
+        The path of the written EPUB file.
+    """
+    rng = random.Random(seed)
+    epub_id = os.path.basename(file_path).replace(".epub", "")
+    manifest = "".join(
+        f'<item id="ch{number}" href="text/chapter{number}.xhtml" media-type="application/xhtml+xml"/>'
+        for number in range(1, chapters + 1)
+    )
+    spine = "".join(f'<itemref idref="ch{number}"/>' for number in range(1, chapters + 1))
+    content_opf = (
+        '<?xml version="1.0"?>'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="2.0">'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f"<dc:title>{escape(f'Synthetic Book {epub_id}')}</dc:title>"
+        f"<dc:creator>Author {seed % 997}</dc:creator>"
+        f"<dc:date>{1800 + seed % 200}</dc:date>"
+        "<dc:language>en</dc:language>"
+        f"</metadata><manifest>{manifest}</manifest><spine>{spine}</spine></package>"
+    )
+    with zipfile.ZipFile(file_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        archive.writestr("META-INF/container.xml", CONTAINER_XML)
+        archive.writestr("OEBPS/content.opf", content_opf)
+        for number in range(1, chapters + 1):
+            archive.writestr(f"OEBPS/text/chapter{number}.xhtml", _chapter_html(rng, number, words_per_chapter))
+    return file_path
+
+
+def write_synthetic_corpus(
+    directory: str, books: int, chapters: int = 20, words_per_chapter: int = 2000, seed: int = 0
+) -> list[str]:
+    """
+    Writes a corpus of synthetic EPUBs named after synthetic_epub_id.
+
+    Args:
+        directory: The directory to write the EPUB files to.
+        books: The number of books.
+        chapters: The number of chapters per book.
+        words_per_chapter: The number of words per chapter.
+        seed: The base seed, book i is generated with seed + i.
+
+    Returns:
+        The paths of the written EPUB files, in order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    return [
+        write_synthetic_epub(
+            os.path.join(directory, f"{synthetic_epub_id(index)}.epub"),
+            chapters=chapters,
+            words_per_chapter=words_per_chapter,
+            seed=seed + index,
+        )
+        for index in range(books)
+    ]
+
+
+def write_publisher_tsv(file_path: str, rows: int, epub_ids: Iterable[str] = (), seed: int = 0) -> str:
+    """
+    Writes a publisher metadata TSV in the layout read by read_publisher_metadata, streaming the rows to disk.
+
+    The given EPUB identifiers come first so that every book of a synthetic corpus has a publisher row, and
+    the remaining rows are filler identifiers, so lookups are measured against a feed of realistic size.
+
+    Args:
+        file_path: The path of the TSV file to write.
+        rows: The total number of data rows, at least the number of epub_ids.
+        epub_ids: The EPUB identifiers to write rows for first.
+        seed: The seed of the generated titles, authors and years.
+
+    Returns:
+        The path of the written TSV file.
+    """
+    rng = random.Random(seed)
+    epub_ids = list(epub_ids)
+    with open(file_path, mode="w", encoding="utf-8", buffering=1 << 20) as file:
+        file.write("id\ttitle\tauthor\tpublishing_year\n")
+        for index in range(max(rows, len(epub_ids))):
+            epub_id = epub_ids[index] if index < len(epub_ids) else f"filler{index}"
+            title = " ".join(rng.choices(WORDS, k=3)).title()
+            file.write(f"{epub_id}\t{title}\tAuthor {rng.randrange(10_000)}\t{rng.randrange(1600, 2025)}\n")
+    return file_path
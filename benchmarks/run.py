@@ -0,0 +1,672 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import TYPE_CHECKING, cast
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pydantic import BaseModel
+from benchmarks.corpus import synthetic_epub_id, write_publisher_tsv, write_synthetic_corpus
+from benchmarks.stub_gemini import StubBatchClient, StubLibrarianAgent
+from src.agent.batch_librarian import BatchLibrarian
+from src.task.process_batch import process_batch
+from src.task.process_book import process_book
+from src.task.process_catalog import process_catalog
+from src.task.process_queue import process_queue
+from src.task.work_queue import WorkQueue
+from src.tool.csv_parser import CompactPublisherMetadata, read_publisher_metadata
+from src.tool.epub import EPUB_BACKENDS, NATIVE_BACKEND, extract_epub_data, get_epub_id, utf8_length
+from src.tool.publisher_store import PublisherMetadataStore
+from src.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from google import genai
+
+EPUB_PARSE_SCENARIO = "epub_parse"
+PUBLISHER_METADATA_SCENARIO = "publisher_metadata"
+PUBLISHER_METADATA_COMPACT_SCENARIO = "publisher_metadata_compact"
+PROCESS_BOOK_SCENARIO = "process_book"
+PROCESS_CATALOG_SCENARIO = "process_catalog"
+PROCESS_BATCH_SCENARIO = "process_batch"
+CLI_STARTUP_SCENARIO = "cli_startup"
+BOOK_MEMORY_SCENARIO = "book_memory"
+PROCESS_QUEUE_SCENARIO = "process_queue"
+SCENARIOS = (
+    EPUB_PARSE_SCENARIO,
+    PUBLISHER_METADATA_SCENARIO,
+    PUBLISHER_METADATA_COMPACT_SCENARIO,
+    PROCESS_BOOK_SCENARIO,
+    PROCESS_CATALOG_SCENARIO,
+    PROCESS_BATCH_SCENARIO,
+    CLI_STARTUP_SCENARIO,
+    BOOK_MEMORY_SCENARIO,
+    PROCESS_QUEUE_SCENARIO,
+)
+
+# Cold starts of the CLI are checked against this fixed budget as well as against the baseline.
+CLI_STARTUP_BUDGET_SECONDS = 1.0
+CLI_STARTUP_RUNS = 5
+# The peak memory process_book allocates for a book may not exceed this multiple of the book's text size.
+BOOK_MEMORY_CEILING = 3.5
+# Nodes sharing the queue in the process_queue scenario, each running model_workers worker threads.
+QUEUE_NODES = 2
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Durations below this are dominated by noise and are not compared against the baseline.
+MIN_COMPARED_SECONDS = 0.25
+# Runs of the reference workload that measures the speed of the machine, the fastest one counts.
+REFERENCE_RUNS = 5
+
+
+class BenchmarkConfig(BaseModel):
+    books: int = 50
+    chapters: int = 20
+    words_per_chapter: int = 2000
+    publisher_rows: int = 500_000
+    latency_seconds: float = 0.05
+    error_rate: float = 0.05
+    parse_workers: int = 4
+    model_workers: int = 8
+    parse_processes: bool = False
+    epub_backend: str = NATIVE_BACKEND
+    token_budget: int | None = None
+    seed: int = 0
+
+
+class ScenarioResult(BaseModel):
+    name: str
+    items: int
+    errors: int = 0
+    wall_seconds: float
+    throughput_per_second: float
+    p50_seconds: float | None = None
+    p95_seconds: float | None = None
+    p99_seconds: float | None = None
+    peak_rss_bytes: int
+    stage_seconds: dict[str, float] = {}
+    max_concurrency: int | None = None
+    peak_memory_ratio: float | None = None
+
+
+class BenchmarkReport(BaseModel):
+    config: BenchmarkConfig
+    reference_seconds: float | None = None
+    scenarios: dict[str, ScenarioResult] = {}
+
+
+class ScenarioRun(BaseModel):
+    items: int
+    errors: int = 0
+    latencies: list[float] = []
+    max_concurrency: int | None = None
+    peak_memory_ratio: float | None = None
+
+
+def percentile(values: list[float], quantile: float) -> float | None:
+    """
+    Computes a percentile with the nearest-rank method.
+
+    Args:
+        values: The measured values.
+        quantile: The quantile, range 0 - 1.
+
+    Returns:
+        The percentile, or None without values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+def peak_rss_bytes() -> int:
+    """Returns the peak resident set size of the current process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure_reference_seconds(runs: int = REFERENCE_RUNS) -> float:
+    """
+    Times a fixed CPU-bound workload of string building, hashing and JSON, measuring the speed of the machine.
+
+    Reports store it, so a baseline recorded on another machine is compared relative to the speed of both.
+
+    Args:
+        runs: The number of runs.
+
+    Returns:
+        The duration of the fastest run.
+    """
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        words = [f"word{index % 997}" for index in range(100_000)]
+        hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+        json.loads(json.dumps(words))
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def _run_epub_parse(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    run = ScenarioRun(items=len(epub_file_paths))
+    for epub_file_path in epub_file_paths:
+        epub_id = get_epub_id(epub_file_path)
+        start_time = time.perf_counter()
+        with metrics.book_scope(epub_id):
+            _, content, _ = extract_epub_data(file_path=epub_file_path, backend=config.epub_backend)
+        run.latencies.append(time.perf_counter() - start_time)
+        metrics.finish_book(epub_id)
+        run.errors += not content
+    return run
+
+
+def _run_publisher_metadata(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    start_time = time.perf_counter()
+    with metrics.time_stage("csv_read"):
+        publisher_metadata = read_publisher_metadata(file_path=tsv_path, separator="\t")
+    return ScenarioRun(items=len(publisher_metadata), latencies=[time.perf_counter() - start_time])
+
+
+def _run_publisher_metadata_compact(
+    config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str
+) -> ScenarioRun:
+    start_time = time.perf_counter()
+    with metrics.time_stage("csv_read"):
+        publisher_metadata = CompactPublisherMetadata.from_file(file_path=tsv_path, separator="\t")
+    return ScenarioRun(items=len(publisher_metadata), latencies=[time.perf_counter() - start_time])
+
+
+def _open_store(tsv_path: str) -> PublisherMetadataStore:
+    # run_benchmarks builds the index up front, so opening it here only checks the fingerprint.
+    return PublisherMetadataStore(file_path=tsv_path, separator="\t")
+
+
+def _run_process_book(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    agent = StubLibrarianAgent(latency_seconds=config.latency_seconds, error_rate=config.error_rate, seed=config.seed)
+    publisher_store = _open_store(tsv_path)
+    run = ScenarioRun(items=len(epub_file_paths))
+    try:
+        for epub_file_path in epub_file_paths:
+            start_time = time.perf_counter()
+            try:
+                process_book(
+                    librarian_agent=agent,
+                    epub_file_path=epub_file_path,
+                    publisher_store=publisher_store,
+                    epub_backend=config.epub_backend,
+                    token_budget=config.token_budget,
+                )
+            except Exception:
+                run.errors += 1
+            run.latencies.append(time.perf_counter() - start_time)
+    finally:
+        publisher_store.close()
+    run.max_concurrency = agent.max_concurrency
+    return run
+
+
+def _run_process_catalog(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    agent = StubLibrarianAgent(latency_seconds=config.latency_seconds, error_rate=config.error_rate, seed=config.seed)
+    publisher_store = _open_store(tsv_path)
+    run = ScenarioRun(items=len(epub_file_paths))
+    try:
+        results = process_catalog(
+            librarian_agent=agent,
+            epub_file_paths=epub_file_paths,
+            publisher_store=publisher_store,
+            parse_workers=config.parse_workers,
+            model_workers=config.model_workers,
+            epub_backend=config.epub_backend,
+            token_budget=config.token_budget,
+            parse_processes=config.parse_processes,
+        )
+        run.errors = sum(result.error is not None for result in results)
+    finally:
+        publisher_store.close()
+    run.max_concurrency = agent.max_concurrency
+    return run
+
+
+def _run_process_queue(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    # Each node has its own queue connection, agent and publisher store, as it would on its own machine.
+    queue_path = os.path.join(workdir, "queue.sqlite")
+    WorkQueue(queue_path).enqueue(epub_file_paths)
+    agents = [
+        StubLibrarianAgent(latency_seconds=config.latency_seconds, error_rate=config.error_rate, seed=config.seed)
+        for _ in range(QUEUE_NODES)
+    ]
+
+    def run_node(index: int):
+        queue = WorkQueue(queue_path)
+        publisher_store = _open_store(tsv_path)
+        try:
+            process_queue(
+                queue=queue,
+                librarian_agent=agents[index],
+                publisher_store=publisher_store,
+                worker_id=f"node-{index}",
+                workers=config.model_workers,
+                epub_backend=config.epub_backend,
+                token_budget=config.token_budget,
+                poll_seconds=0.01,
+            )
+        finally:
+            publisher_store.close()
+            queue.close()
+
+    with ThreadPoolExecutor(max_workers=QUEUE_NODES) as pool:
+        list(pool.map(run_node, range(QUEUE_NODES)))
+    queue = WorkQueue(queue_path)
+    try:
+        errors = sum(result.error is not None for result in queue.results())
+    finally:
+        queue.close()
+    return ScenarioRun(
+        items=len(epub_file_paths), errors=errors, max_concurrency=sum(agent.max_concurrency for agent in agents)
+    )
+
+
+def _run_process_batch(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    client = StubBatchClient(latency_seconds=config.latency_seconds, error_rate=config.error_rate, seed=config.seed)
+    # The stub implements the files and batches calls BatchLibrarian makes, not the whole client.
+    batch_librarian = BatchLibrarian(
+        client=cast("genai.Client", client), poll_interval_seconds=min(config.latency_seconds, 0.01)
+    )
+    publisher_store = _open_store(tsv_path)
+    run = ScenarioRun(items=len(epub_file_paths))
+    try:
+        results = process_batch(
+            batch_librarian=batch_librarian,
+            epub_file_paths=epub_file_paths,
+            publisher_store=publisher_store,
+            state_file_path=os.path.join(workdir, "batch-state.json"),
+            parse_workers=config.parse_workers,
+            epub_backend=config.epub_backend,
+            token_budget=config.token_budget,
+            parse_processes=config.parse_processes,
+        )
+        run.errors = sum(result.error is not None for result in results)
+    finally:
+        publisher_store.close()
+    return run
+
+
+def _run_cli_startup(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    # Each run is a fresh interpreter, as a job fanned out by a scheduler would be.
+    run = ScenarioRun(items=CLI_STARTUP_RUNS)
+    for _ in range(CLI_STARTUP_RUNS):
+        start_time = time.perf_counter()
+        completed = subprocess.run([sys.executable, "main.py", "--help"], cwd=REPO_DIR, capture_output=True)
+        run.latencies.append(time.perf_counter() - start_time)
+        run.errors += completed.returncode != 0
+    return run
+
+
+def _run_book_memory(config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str, workdir: str) -> ScenarioRun:
+    # Traces the allocations of each book on its own and reports the highest peak relative to the book's text size.
+    agent = StubLibrarianAgent(latency_seconds=0.0, seed=config.seed)
+    publisher_store = _open_store(tsv_path)
+    run = ScenarioRun(items=len(epub_file_paths))
+    peak_memory_ratio = 0.0
+    try:
+        for epub_file_path in epub_file_paths:
+            _, content, _ = extract_epub_data(file_path=epub_file_path, backend=config.epub_backend)
+            content_bytes = max(utf8_length(content), 1)
+            del content
+            start_time = time.perf_counter()
+            tracemalloc.start()
+            try:
+                process_book(
+                    librarian_agent=agent,
+                    epub_file_path=epub_file_path,
+                    publisher_store=publisher_store,
+                    epub_backend=config.epub_backend,
+                    token_budget=config.token_budget,
+                )
+            except Exception:
+                run.errors += 1
+            finally:
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            run.latencies.append(time.perf_counter() - start_time)
+            peak_memory_ratio = max(peak_memory_ratio, peak_bytes / content_bytes)
+    finally:
+        publisher_store.close()
+    run.peak_memory_ratio = peak_memory_ratio
+    return run
+
+
+SCENARIO_RUNNERS: dict[str, Callable[[BenchmarkConfig, list[str], str, str], ScenarioRun]] = {
+    EPUB_PARSE_SCENARIO: _run_epub_parse,
+    PUBLISHER_METADATA_SCENARIO: _run_publisher_metadata,
+    PUBLISHER_METADATA_COMPACT_SCENARIO: _run_publisher_metadata_compact,
+    PROCESS_BOOK_SCENARIO: _run_process_book,
+    PROCESS_CATALOG_SCENARIO: _run_process_catalog,
+    PROCESS_BATCH_SCENARIO: _run_process_batch,
+    CLI_STARTUP_SCENARIO: _run_cli_startup,
+    BOOK_MEMORY_SCENARIO: _run_book_memory,
+    PROCESS_QUEUE_SCENARIO: _run_process_queue,
+}
+
+
+def run_scenario(name: str, config: BenchmarkConfig, epub_file_paths: list[str], tsv_path: str) -> ScenarioResult:
+    """
+    Runs one benchmark scenario with metrics enabled and summarizes it.
+
+    Per-book latencies come from the scenario itself where it processes books one at a time, and
+    otherwise from the per-book stage durations recorded by the metrics registry.
+
+    Args:
+        name: The scenario name, one of SCENARIOS.
+        config: The benchmark configuration.
+        epub_file_paths: The paths of the synthetic EPUB files.
+        tsv_path: The path of the synthetic publisher metadata TSV.
+
+    Returns:
+        The scenario result.
+    """
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        book_log_path = os.path.join(workdir, "books.jsonl")
+        metrics.reset()
+        metrics.configure(enabled=True, book_log_path=book_log_path)
+        try:
+            start_time = time.perf_counter()
+            run = SCENARIO_RUNNERS[name](config, epub_file_paths, tsv_path, workdir)
+            wall_seconds = time.perf_counter() - start_time
+            stage_seconds = metrics.stage_totals()
+        finally:
+            metrics.configure(enabled=False)
+            metrics.reset()
+        latencies = run.latencies
+        if not latencies:
+            with open(book_log_path, mode="r", encoding="utf-8") as file:
+                records = [json.loads(line) for line in file]
+            latencies = [sum(value for field, value in record.items() if field.endswith("_seconds")) for record in records]
+    return ScenarioResult(
+        name=name,
+        items=run.items,
+        errors=run.errors,
+        wall_seconds=wall_seconds,
+        throughput_per_second=run.items / wall_seconds if wall_seconds > 0 else 0.0,
+        p50_seconds=percentile(latencies, 0.50),
+        p95_seconds=percentile(latencies, 0.95),
+        p99_seconds=percentile(latencies, 0.99),
+        peak_rss_bytes=peak_rss_bytes(),
+        stage_seconds=stage_seconds,
+        max_concurrency=run.max_concurrency,
+        peak_memory_ratio=run.peak_memory_ratio,
+    )
+
+
+def run_benchmarks(
+    config: BenchmarkConfig, scenarios: tuple[str, ...] = SCENARIOS, workdir: str | None = None, isolate: bool = True
+) -> BenchmarkReport:
+    """
+    Generates the synthetic corpus and runs the benchmark scenarios against it.
+
+    Args:
+        config: The benchmark configuration.
+        scenarios: The scenarios to run, in order.
+        workdir: The directory to generate the corpus in, defaults to a temporary directory.
+        isolate: Whether to run each scenario in a fresh process, so that its peak RSS is its own.
+
+    Returns:
+        The benchmark report.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench-corpus-") as temp_dir:
+        corpus_dir = workdir or temp_dir
+        epub_file_paths = write_synthetic_corpus(
+            os.path.join(corpus_dir, "epubs"),
+            books=config.books,
+            chapters=config.chapters,
+            words_per_chapter=config.words_per_chapter,
+            seed=config.seed,
+        )
+        tsv_path = write_publisher_tsv(
+            os.path.join(corpus_dir, "metadata.tsv"),
+            rows=config.publisher_rows,
+            epub_ids=[synthetic_epub_id(index) for index in range(config.books)],
+            seed=config.seed,
+        )
+        _open_store(tsv_path).close()
+        report = BenchmarkReport(config=config)
+        for name in scenarios:
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    result = pool.submit(run_scenario, name, config, epub_file_paths, tsv_path).result()
+            else:
+                result = run_scenario(name, config, epub_file_paths, tsv_path)
+            report.scenarios[name] = result
+        # Measured last, so its allocations do not count towards the peak RSS of the scenario processes forked from here.
+        report.reference_seconds = measure_reference_seconds()
+        return report
+
+
+def _exceeds(value: float | None, baseline: float | None, tolerance: float, slowdown: float = 1.0) -> bool:
+    if value is None or baseline is None or baseline < MIN_COMPARED_SECONDS:
+        return False
+    return value > baseline * slowdown * (1 + tolerance)
+
+
+def machine_slowdown(report: BenchmarkReport, baseline: BenchmarkReport) -> float:
+    """
+    Estimates how much slower the machine of a report is than the machine the baseline was recorded on.
+
+    Args:
+        report: The report of the current run.
+        baseline: The stored baseline report.
+
+    Returns:
+        The ratio of the reference workload durations, at least 1 so a faster machine is held to the
+        baseline as recorded, or 1 if either report has no reference measurement.
+    """
+    if not report.reference_seconds or not baseline.reference_seconds:
+        return 1.0
+    return max(1.0, report.reference_seconds / baseline.reference_seconds)
+
+
+def compare_reports(report: BenchmarkReport, baseline: BenchmarkReport, tolerance: float = 0.25) -> list[str]:
+    """
+    Compares a report against a stored baseline.
+
+    Durations and throughput are compared relative to the speed of both machines, measured by the
+    reference workload, so a baseline recorded on a faster machine does not fail a slower one.
+
+    Args:
+        report: The report of the current run.
+        baseline: The stored baseline report.
+        tolerance: The allowed relative slowdown or growth, e.g. 0.25 for 25%.
+
+    Returns:
+        One message per regression or scenario missing from the baseline, empty when the run is within
+        tolerance of the baseline.
+
+    Raises:
+        ValueError: If the baseline was recorded with a different configuration.
+    """
+    if report.config != baseline.config:
+        raise ValueError(
+            f"Baseline was recorded with {baseline.config.model_dump()}, not {report.config.model_dump()}"
+        )
+    slowdown = machine_slowdown(report, baseline)
+    regressions = []
+    for name, result in report.scenarios.items():
+        reference = baseline.scenarios.get(name)
+        if reference is None:
+            regressions.append(f"{name}: missing from the baseline, record it with --save-baseline")
+            continue
+        expected_throughput = reference.throughput_per_second / slowdown
+        if reference.wall_seconds >= MIN_COMPARED_SECONDS and result.throughput_per_second < expected_throughput * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{name}: throughput {result.throughput_per_second:.2f}/s below baseline {expected_throughput:.2f}/s"
+            )
+        for field in ("p50_seconds", "p95_seconds", "p99_seconds"):
+            value, reference_value = getattr(result, field), getattr(reference, field)
+            if _exceeds(value, reference_value, tolerance, slowdown):
+                regressions.append(f"{name}: {field} {value:.3f} above baseline {reference_value * slowdown:.3f}")
+        for stage, seconds in result.stage_seconds.items():
+            if _exceeds(seconds, reference.stage_seconds.get(stage), tolerance, slowdown):
+                regressions.append(
+                    f"{name}: stage {stage} took {seconds:.3f}s, baseline {reference.stage_seconds[stage] * slowdown:.3f}s"
+                )
+        if result.peak_rss_bytes > reference.peak_rss_bytes * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {result.peak_rss_bytes / 2**20:.1f} MiB "
+                f"above baseline {reference.peak_rss_bytes / 2**20:.1f} MiB"
+            )
+        if (result.max_concurrency or 0) < (reference.max_concurrency or 0) * (1 - tolerance):
+            regressions.append(f"{name}: concurrency {result.max_concurrency} below baseline {reference.max_concurrency}")
+        if reference.peak_memory_ratio and (result.peak_memory_ratio or 0) > reference.peak_memory_ratio * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory {result.peak_memory_ratio:.2f}x the book size, "
+                f"baseline {reference.peak_memory_ratio:.2f}x"
+            )
+        if result.errors != reference.errors:
+            regressions.append(f"{name}: {result.errors} errors, baseline {reference.errors}")
+    return regressions
+
+
+def check_budgets(report: BenchmarkReport) -> list[str]:
+    """
+    Checks the scenarios that have a fixed budget, independent of any baseline.
+
+    Args:
+        report: The report of the current run.
+
+    Returns:
+        One message per exceeded budget.
+    """
+    violations = []
+    startup = report.scenarios.get(CLI_STARTUP_SCENARIO)
+    if startup is not None and startup.p95_seconds is not None and startup.p95_seconds > CLI_STARTUP_BUDGET_SECONDS:
+        violations.append(
+            f"{CLI_STARTUP_SCENARIO}: p95_seconds {startup.p95_seconds:.3f} above budget {CLI_STARTUP_BUDGET_SECONDS:.3f}"
+        )
+    memory = report.scenarios.get(BOOK_MEMORY_SCENARIO)
+    if memory is not None and memory.peak_memory_ratio is not None and memory.peak_memory_ratio > BOOK_MEMORY_CEILING:
+        violations.append(
+            f"{BOOK_MEMORY_SCENARIO}: peak memory {memory.peak_memory_ratio:.2f}x the book size "
+            f"above ceiling {BOOK_MEMORY_CEILING:.2f}x"
+        )
+    return violations
+
+
+def format_report(report: BenchmarkReport) -> str:
+    """Formats the report as a plain text table."""
+
+    def seconds(value: float | None) -> str:
+        return "-" if value is None else f"{value:.3f}"
+
+    lines = [
+        f"{'scenario':<28}{'items':>10}{'errors':>8}{'wall s':>10}{'items/s':>12}"
+        f"{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'RSS MiB':>10}{'mem x':>8}  stages"
+    ]
+    for result in report.scenarios.values():
+        stages = ", ".join(f"{stage}={value:.3f}" for stage, value in sorted(result.stage_seconds.items()))
+        memory_ratio = "-" if result.peak_memory_ratio is None else f"{result.peak_memory_ratio:.2f}"
+        lines.append(
+            f"{result.name:<28}{result.items:>10}{result.errors:>8}{result.wall_seconds:>10.3f}"
+            f"{result.throughput_per_second:>12.2f}{seconds(result.p50_seconds):>9}{seconds(result.p95_seconds):>9}"
+            f"{seconds(result.p99_seconds):>9}{result.peak_rss_bytes / 2**20:>10.1f}{memory_ratio:>8}  {stages}"
+        )
+    return "\n".join(lines)
+
+
+def load_report(file_path: str) -> BenchmarkReport:
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        return BenchmarkReport.model_validate_json(file.read())
+
+
+def save_report(file_path: str, report: BenchmarkReport):
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        file.write(report.model_dump_json(indent=2) + "\n")
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on a synthetic corpus with a local Gemini stub.")
+    parser.add_argument("--books", type=int, default=defaults.books, help="Number of synthetic EPUBs.")
+    parser.add_argument("--chapters", type=int, default=defaults.chapters, help="Chapters per EPUB.")
+    parser.add_argument("--words-per-chapter", type=int, default=defaults.words_per_chapter, help="Words per chapter.")
+    parser.add_argument("--publisher-rows", type=int, default=defaults.publisher_rows, help="Rows in the publisher TSV.")
+    parser.add_argument("--latency", type=float, default=defaults.latency_seconds, help="Stub model latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of failing model calls.")
+    parser.add_argument("--parse-workers", type=int, default=defaults.parse_workers, help="Concurrent EPUB parses.")
+    parser.add_argument("--model-workers", type=int, default=defaults.model_workers, help="Concurrent model calls.")
+    parser.add_argument("--parse-processes", action="store_true", help="Parse EPUBs in worker processes.")
+    parser.add_argument("--epub-backend", choices=EPUB_BACKENDS, default=defaults.epub_backend, help="EPUB parser.")
+    parser.add_argument("--token-budget", type=int, default=defaults.token_budget, help="Content token budget per book.")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed of the corpus and the stub failures.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Scenario to run, repeatable; default all.")
+    parser.add_argument("--workdir", help="Generate the corpus here instead of in a temporary directory.")
+    parser.add_argument("--no-isolate", action="store_true", help="Run all scenarios in this process.")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", help="Compare against this stored JSON report and fail on regressions.")
+    parser.add_argument("--save-baseline", help="Store the JSON report as the new baseline in this file.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression against the baseline.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the benchmarks, prints the report and compares it against the baseline."""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.WARNING)
+    config = BenchmarkConfig(
+        books=args.books,
+        chapters=args.chapters,
+        words_per_chapter=args.words_per_chapter,
+        publisher_rows=args.publisher_rows,
+        latency_seconds=args.latency,
+        error_rate=args.error_rate,
+        parse_workers=args.parse_workers,
+        model_workers=args.model_workers,
+        parse_processes=args.parse_processes,
+        epub_backend=args.epub_backend,
+        token_budget=args.token_budget,
+        seed=args.seed,
+    )
+    report = run_benchmarks(
+        config, scenarios=tuple(args.scenario or SCENARIOS), workdir=args.workdir, isolate=not args.no_isolate
+    )
+    print(format_report(report))
+    if args.output:
+        save_report(args.output, report)
+    if args.save_baseline:
+        save_report(args.save_baseline, report)
+    over_budget = check_budgets(report)
+    for regression in over_budget:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if over_budget:
+        return 1
+    if args.baseline:
+        baseline = load_report(args.baseline)
+        try:
+            regressions = compare_reports(report, baseline, tolerance=args.tolerance)
+        except ValueError as e:
+            print(f"Cannot compare against {args.baseline}: {e}", file=sys.stderr)
+            return 2
+        slowdown = machine_slowdown(report, baseline)
+        if slowdown > 1.0:
+            print(f"This machine is {slowdown:.2f}x slower than the baseline machine, timings are compared accordingly.")
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} within {args.tolerance:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+from src.agent.librarian import LIBRARIAN_PROMPT
+from src.agent.librarian_model import CharacterAndRelationships, ContentInformation, ThemeSetting
+from src.tool.epub import EpubContent, iter_content_parts
+from src.utils.metrics import metrics
+
+
+class StubGeminiError(Exception):
+    pass
+
+
+def stub_content_information(epub_content: str) -> ContentInformation:
+    """
+    Builds a valid ContentInformation derived from the content, standing in for a model answer.
+
+    Args:
+        epub_content: The book content.
+
+    Returns:
+        The same ContentInformation for the same content.
+    """
+    content_hash = hashlib.sha256()
+    for part in iter_content_parts(epub_content):
+        content_hash.update(part.encode("utf-8"))
+    digest = content_hash.hexdigest()
+    return ContentInformation(
+        genre=f"Genre {digest[:4]}",
+        themes=[f"Theme {digest[index:index + 4]}" for index in (4, 8, 12)],
+        setting=ThemeSetting(time=f"Year {int(digest[16:20], 16) % 2000}", place=f"Place {digest[20:24]}"),
+        cultural_context="Synthetic benchmark content.",
+        narrative_tone="Neutral.",
+        author_writing_style="Generated.",
+        characters_and_relationships=[
+            CharacterAndRelationships(name=f"Character {digest[index:index + 4]}", relationship="Benchmark")
+            for index in (24, 28, 32)
+        ],
+    )
+
+
+def _fails(seed: int, key: str, error_rate: float) -> bool:
+    digest = hashlib.sha256(f"{seed}:".encode("utf-8"))
+    for part in iter_content_parts(key):
+        digest.update(part.encode("utf-8"))
+    return int.from_bytes(digest.digest()[:8], "big") / 2**64 < error_rate
+
+
+class StubLibrarianAgent:
+    def __init__(self, latency_seconds: float = 0.05, error_rate: float = 0.0, seed: int = 0):
+        """
+        Initializes the StubLibrarianAgent, a deterministic local stand-in for LibrarianAgent.
+
+        Each call sleeps for the configured latency, like a network-bound model call, and fails for a
+        deterministic subset of the books, so two runs with the same seed do exactly the same work.
+        The highest number of overlapping calls is tracked to show the concurrency actually reached.
+
+        Args:
+            latency_seconds: The time each call takes.
+            error_rate: The fraction of books whose call raises StubGeminiError, range 0 - 1.
+            seed: The seed selecting which books fail.
+        """
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.seed = seed
+        self.calls = 0
+        self.max_concurrency = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def config_fingerprint(self) -> str:
+        return f"stub:{self.seed}"
+
+    def close(self):
+        pass
+
+    def extract_information(self, epub_content: str | EpubContent) -> ContentInformation:
+        """
+        Returns the stub analysis of the content after the configured latency.
+
+        Args:
+            epub_content: The book content.
+
+        Returns:
+            A ContentInformation object derived from the content.
+
+        Raises:
+            StubGeminiError: For the books selected by the error rate.
+        """
+        with self._lock:
+            self.calls += 1
+            self._active += 1
+            self.max_concurrency = max(self.max_concurrency, self._active)
+        try:
+            # Read and serialized like LibrarianAgent and the Gemini SDK do, so peak memory measurements include the request.
+            epub_content = str(epub_content)
+            request_body = json.dumps(
+                {"system_instruction": LIBRARIAN_PROMPT, "contents": [{"role": "user", "parts": [{"text": epub_content}]}]}
+            )
+            with metrics.time_stage("model_call"):
+                time.sleep(self.latency_seconds)
+            del request_body
+            if _fails(self.seed, epub_content, self.error_rate):
+                raise StubGeminiError("Simulated model failure")
+            return stub_content_information(epub_content)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+class StubBatchClient:
+    def __init__(self, latency_seconds: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Initializes the StubBatchClient, a deterministic local stand-in for the Gemini files and batches endpoints.
+
+        Jobs answer every request with the stub analysis of its content once the latency has passed since
+        creation, and report a request error for the books selected by the error rate.
+
+        Args:
+            latency_seconds: The time a job takes to complete.
+            error_rate: The fraction of requests answered with an error, range 0 - 1.
+            seed: The seed selecting which requests fail.
+        """
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.seed = seed
+        self._files: dict[str, bytes] = {}
+        self._jobs: dict[str, tuple[float, str]] = {}
+        self.files = SimpleNamespace(upload=self._upload, download=self._download)
+        self.batches = SimpleNamespace(create=self._create, get=self._get)
+
+    def _upload(self, file, config=None):
+        name = f"files/input-{len(self._files)}"
+        with open(file, "rb") as handle:
+            self._files[name] = handle.read()
+        return SimpleNamespace(name=name)
+
+    def _download(self, file):
+        return self._files[file]
+
+    def _answer(self, line: str) -> str:
+        record = json.loads(line)
+        content = "".join(part["text"] for part in record["request"]["contents"][0]["parts"][1:])
+        if _fails(self.seed, content, self.error_rate):
+            return json.dumps({"key": record["key"], "error": {"code": 500, "message": "Simulated model failure"}})
+        text = stub_content_information(content).model_dump_json()
+        response = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+        return json.dumps({"key": record["key"], "response": response})
+
+    def _create(self, model, src, config=None):
+        name = f"batches/{len(self._jobs)}"
+        output_name = f"files/output-{len(self._jobs)}"
+        lines = self._files[src].decode("utf-8").splitlines()
+        self._files[output_name] = "\n".join(self._answer(line) for line in lines if line.strip()).encode("utf-8")
+        self._jobs[name] = (time.monotonic() + self.latency_seconds, output_name)
+        return SimpleNamespace(name=name)
+
+    def _get(self, name):
+        done_at, output_name = self._jobs[name]
+        state = "JOB_STATE_SUCCEEDED" if time.monotonic() >= done_at else "JOB_STATE_RUNNING"
+        return SimpleNamespace(
+            name=name, state=SimpleNamespace(name=state), error=None, dest=SimpleNamespace(file_name=output_name)
+        )
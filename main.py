@@ -1,7 +1,27 @@
+import argparse
 import logging
-from src.agent.librarian import LibrarianAgent
+import sys
+from typing import cast
+from src.agent.batch_librarian import BatchLibrarian
+from src.agent.cascade_librarian import CascadeLibrarian
+from src.agent.librarian import Analyzer, LibrarianAgent
+from src.agent.map_reduce_librarian import MapReduceLibrarian
+from src.agent.packed_librarian import PackedLibrarian
+from src.agent.result_cache import ResultCache
+from src.task.book_model import BookResult
+from src.task.job_ledger import JobLedger
+from src.task.output_sink import OUTPUT_FORMATS, create_sink
+from src.task.process_batch import process_batch
 from src.task.process_book import process_book
-from src.utils.logger import log_execution_time
+from src.task.process_catalog import process_catalog
+from src.task.process_queue import process_queue
+from src.task.work_queue import WorkQueue
+from src.tool.catalog import discover_epub_files
+from src.tool.dedup import DedupIndex
+from src.tool.epub import EPUB_BACKENDS, TIKA_BACKEND, use_tika_servers
+from src.tool.publisher_store import PublisherMetadataStore
+from src.utils.logger import get_logger, log_execution_time
+from src.utils.metrics import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -9,25 +29,294 @@ logging.basicConfig(
 )
 
 
+DEFAULT_EPUB_FILE_PATH = "./dataset/pg74.epub"
+DEFAULT_METADATA_FILE_PATH = "./dataset/metadata.csv"
+DEFAULT_MODEL_NAME = "gemini-2.5-flash"
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract rich metadata from EPUB files.")
+    parser.add_argument(
+        "epub_file", nargs="?", default=DEFAULT_EPUB_FILE_PATH, help="The EPUB file to process when not in catalog mode."
+    )
+    parser.add_argument("--metadata", default=DEFAULT_METADATA_FILE_PATH, help="The publisher metadata file.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="The Gemini model that analyzes the books.")
+    parser.add_argument(
+        "--catalog",
+        help="Process a catalog in batch mode: a directory, glob pattern or manifest file of EPUB paths.",
+    )
+    parser.add_argument("--output", help="Write the results to this file instead of printing them to stdout.")
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        help="Format of --output: JSON lines, Parquet or a SQLite table upserted by epub_id. Inferred from the extension.",
+    )
+    parser.add_argument("--rpm", type=int, help="Limit the requests per minute sent to --model, e.g. to its quota.")
+    parser.add_argument("--tpm", type=int, help="Limit the prompt and output tokens per minute sent to --model.")
+    parser.add_argument("--parse-workers", type=int, default=4, help="Number of concurrent EPUB parses in catalog mode.")
+    parser.add_argument("--model-workers", type=int, default=4, help="Number of concurrent model calls in catalog mode.")
+    parser.add_argument(
+        "--parse-processes",
+        action="store_true",
+        help="Parse EPUBs in worker processes instead of threads, so CPU-bound parsing uses every core.",
+    )
+    parser.add_argument(
+        "--epub-backend",
+        choices=EPUB_BACKENDS,
+        default=TIKA_BACKEND,
+        help="EPUB parser: Apache Tika or the pure-Python reader.",
+    )
+    parser.add_argument("--tika-jar", help="Start Tika servers from this tika-server-standard jar for the tika backend.")
+    parser.add_argument("--tika-servers", type=int, default=1, help="Number of Tika servers to start with --tika-jar.")
+    parser.add_argument(
+        "--tika-endpoint", action="append", help="URL of an already running Tika server to use, repeatable."
+    )
+    parser.add_argument(
+        "--token-budget", type=int, help="Strip boilerplate and sample each book down to this many content tokens."
+    )
+    parser.add_argument(
+        "--max-chunk-tokens",
+        type=int,
+        help="Analyze books longer than this many tokens in chapter-aligned chunks and merge the results.",
+    )
+    parser.add_argument(
+        "--cascade-model",
+        help="Analyze samples of each book with this cheaper model first and only escalate unsure books to --model.",
+    )
+    parser.add_argument(
+        "--cascade-sample-tokens", type=int, default=8000, help="Content tokens per sample sent to --cascade-model."
+    )
+    parser.add_argument(
+        "--cascade-min-confidence",
+        type=float,
+        default=0.5,
+        help="Agreement of the two cheap samples below which a book is escalated, range 0 - 1.",
+    )
+    parser.add_argument(
+        "--pack-tokens",
+        type=int,
+        help="Analyze short books several per request, packing up to this many content tokens into each request.",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Reuse the analysis of an identical or nearly identical edition analyzed earlier in the catalog run.",
+    )
+    parser.add_argument(
+        "--ledger",
+        help="Checkpoint per-book stage completion in this SQLite file, so a restarted catalog run resumes where it stopped.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With --ledger, only redo the stages of books whose EPUB file, publisher row or model settings changed.",
+    )
+    parser.add_argument(
+        "--batch-state",
+        help="Run the catalog through the Gemini Batch API, recording progress in this job state file to resume from.",
+    )
+    parser.add_argument(
+        "--queue",
+        help="Share a catalog run across workers through this SQLite lease queue: enqueue --catalog, if given, "
+        "and process queued books until the queue is finished.",
+    )
+    parser.add_argument(
+        "--lease-seconds", type=float, default=300.0, help="How long a worker's claim on a book is valid without a heartbeat."
+    )
+    parser.add_argument("--worker-id", help="Identifier of this worker in the queue, defaults to host name and process id.")
+    parser.add_argument("--metrics-jsonl", help="Record per-stage metrics and append one JSON line per book to this file.")
+    parser.add_argument(
+        "--metrics-prometheus", help="Record per-stage metrics and write the histograms in Prometheus text format here."
+    )
+    parser.add_argument("--cache-dir", help="Cache validated model results in this directory and reuse them on re-runs.")
+    parser.add_argument("--cache-max-bytes", type=int, help="Evict least recently used cache entries beyond this size.")
+    parser.add_argument(
+        "--context-cache",
+        action="store_true",
+        help="Read the prompt, and the book content of re-asked books, from Gemini context caches.",
+    )
+    args = parser.parse_args(argv)
+    if args.incremental and not args.ledger:
+        parser.error("--incremental requires --ledger")
+    return args
+
+
+def base_librarian_agent(analyzer: Analyzer) -> LibrarianAgent:
+    """Finds the LibrarianAgent of --model wrapped by an analyzer, which batch and packed requests call directly."""
+    if isinstance(analyzer, CascadeLibrarian):
+        return base_librarian_agent(analyzer.strong_agent)
+    if isinstance(analyzer, MapReduceLibrarian):
+        return analyzer.librarian_agent
+    # Every analyzer main builds wraps a LibrarianAgent, which is what is left.
+    return cast(LibrarianAgent, analyzer)
+
+
+def run_catalog(args: argparse.Namespace, analyzer: Analyzer):
+    """Processes every book of the catalog and streams one JSON line per book as it finishes."""
+    librarian_agent = base_librarian_agent(analyzer)
+    publisher_store = PublisherMetadataStore(file_path=args.metadata, separator="\t")
+    ledger = JobLedger(path=args.ledger) if args.ledger else None
+    packer = None
+    dedup = None
+    if args.batch_state:
+        batch_librarian = BatchLibrarian(
+            client=librarian_agent.client,
+            model_name=librarian_agent.model_name,
+            temperature=librarian_agent.temperature,
+            max_output_tokens=librarian_agent.max_output_tokens,
+            top_p=librarian_agent.top_p,
+        )
+        results = process_batch(
+            batch_librarian=batch_librarian,
+            epub_file_paths=discover_epub_files(args.catalog),
+            publisher_store=publisher_store,
+            state_file_path=args.batch_state,
+            parse_workers=args.parse_workers,
+            epub_backend=args.epub_backend,
+            token_budget=args.token_budget,
+            parse_processes=args.parse_processes,
+        )
+    else:
+        if args.pack_tokens:
+            packer = PackedLibrarian(librarian_agent=librarian_agent, max_pack_tokens=args.pack_tokens)
+        if args.dedup:
+            dedup = DedupIndex()
+        results = process_catalog(
+            librarian_agent=analyzer,
+            epub_file_paths=discover_epub_files(args.catalog),
+            publisher_store=publisher_store,
+            parse_workers=args.parse_workers,
+            model_workers=args.model_workers,
+            epub_backend=args.epub_backend,
+            token_budget=args.token_budget,
+            ledger=ledger,
+            parse_processes=args.parse_processes,
+            incremental=args.incremental,
+            packer=packer,
+            dedup=dedup,
+        )
+    try:
+        with create_sink(args.output, args.output_format) as sink:
+            for result in results:
+                sink.write(result)
+    finally:
+        publisher_store.close()
+        if ledger is not None:
+            ledger.close()
+        if packer is not None:
+            get_logger(__name__).info(f"Packing stats: {packer.stats.model_dump()}")
+        if dedup is not None:
+            get_logger(__name__).info(f"Dedup stats: {dedup.stats.model_dump()}")
+
+
+def run_queue(args: argparse.Namespace, analyzer: Analyzer):
+    """Enqueues the catalog, processes queued books as a worker and exports every result once the queue is finished."""
+    queue = WorkQueue(path=args.queue, lease_seconds=args.lease_seconds)
+    publisher_store = PublisherMetadataStore(file_path=args.metadata, separator="\t")
+    try:
+        if args.catalog:
+            added = queue.enqueue(discover_epub_files(args.catalog))
+            get_logger(__name__).info(f"Enqueued {added} books into {args.queue}.")
+        worker_stats = process_queue(
+            queue=queue,
+            librarian_agent=analyzer,
+            publisher_store=publisher_store,
+            worker_id=args.worker_id,
+            workers=args.model_workers,
+            epub_backend=args.epub_backend,
+            token_budget=args.token_budget,
+        )
+        get_logger(__name__).info(f"Worker stats: {worker_stats.model_dump()}, queue stats: {queue.stats.model_dump()}")
+        if args.output:
+            with create_sink(args.output, args.output_format) as sink:
+                for result in queue.results():
+                    sink.write(result)
+    finally:
+        publisher_store.close()
+        queue.close()
+
+
 @log_execution_time
-def main():
+def main(argv: list[str] | None = None):
     """Initializes the agent, processes the book, and prints the metadata."""
-    # These paths can be configured or passed as arguments
-    EPUB_FILE_PATH = "./dataset/pg74.epub"
-    METADATA_FILE_PATH = "./dataset/metadata.csv"
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.metrics_jsonl or args.metrics_prometheus:
+        metrics.configure(enabled=True, book_log_path=args.metrics_jsonl)
 
-    librarian_agent = LibrarianAgent(model_name="gemini-2.5-flash")
+    cache = ResultCache(directory=args.cache_dir, max_bytes=args.cache_max_bytes) if args.cache_dir else None
+    librarian_agent = LibrarianAgent(
+        model_name=args.model,
+        cache=cache,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        context_cache=args.context_cache,
+    )
+    analyzer: Analyzer = librarian_agent
+    if args.max_chunk_tokens:
+        analyzer = MapReduceLibrarian(librarian_agent=librarian_agent, max_chunk_tokens=args.max_chunk_tokens)
+    cascade = None
+    if args.cascade_model:
+        cascade = CascadeLibrarian(
+            cheap_agent=LibrarianAgent(model_name=args.cascade_model, cache=cache),
+            strong_agent=analyzer,
+            sample_tokens=args.cascade_sample_tokens,
+            min_confidence=args.cascade_min_confidence,
+        )
+        analyzer = cascade
+    tika_servers = None
     try:
+        if args.tika_jar or args.tika_endpoint:
+            from src.tool.tika_server import TikaServerPool
+
+            tika_servers = TikaServerPool(jar_path=args.tika_jar, instances=args.tika_servers, endpoints=args.tika_endpoint)
+            use_tika_servers(tika_servers.start())
+
+        if args.queue:
+            run_queue(args=args, analyzer=analyzer)
+            return
+
+        if args.catalog:
+            run_catalog(args=args, analyzer=analyzer)
+            return
+
         book_metadata = process_book(
-            librarian_agent=librarian_agent,
-            epub_file_path=EPUB_FILE_PATH,
-            metadata_file_path=METADATA_FILE_PATH,
+            librarian_agent=analyzer,
+            epub_file_path=args.epub_file,
+            metadata_file_path=args.metadata,
+            epub_backend=args.epub_backend,
+            token_budget=args.token_budget,
         )
+        if args.output:
+            with create_sink(args.output, args.output_format) as sink:
+                sink.write(
+                    BookResult(epub_file_path=args.epub_file, epub_id=book_metadata.epub_id, book_metadata=book_metadata)
+                )
+            return
+
         GREEN = "\033[92m"
         ENDC = "\033[0m"
 
         print(GREEN + book_metadata.model_dump_json(indent=4) + ENDC)
     finally:
+        if cache is not None:
+            get_logger(__name__).info(f"Result cache stats: {cache.stats.model_dump()}")
+        get_logger(__name__).info(f"Retry stats: {librarian_agent.retry_stats.model_dump()}")
+        if cascade is not None:
+            get_logger(__name__).info(f"Cascade stats: {cascade.stats.summary()}")
+            get_logger(__name__).info(f"Cascade retry stats: {cascade.cheap_agent.retry_stats.model_dump()}")
+            cascade.cheap_agent.client.close()
+        context_cache = librarian_agent.context_cache
+        if context_cache is not None:
+            get_logger(__name__).info(f"Context cache stats: {context_cache.stats.model_dump()}")
+            context_cache.close()
+        if args.metrics_prometheus:
+            with open(args.metrics_prometheus, mode="w", encoding="utf-8") as file:
+                file.write(metrics.to_prometheus())
+        metrics.close()
+        if tika_servers is not None:
+            use_tika_servers(None)
+            tika_servers.close()
         librarian_agent.client.close()
 
 
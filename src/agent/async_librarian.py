@@ -0,0 +1,119 @@
+import asyncio
+from typing import TYPE_CHECKING
+from src.agent.librarian import LIBRARIAN_PROMPT
+from src.agent.librarian_model import ContentInformation
+from src.agent.result_cache import ResultCache
+from src.agent.retry import RetryPolicy, RetryState, RetryStats
+from src.tool.content_reducer import estimate_tokens
+from src.utils.metrics import metrics
+from src.utils.rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    from google.genai import types
+
+
+class AsyncLibrarianAgent:
+    def __init__(
+        self,
+        model_name: str = "gemini-2.5-flash",
+        temperature: float = 0.2,
+        max_output_tokens: int = 200,
+        top_p: float = 0.95,
+        cache: ResultCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        max_concurrency: int = 64,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ):
+        """
+        Initializes the AsyncLibrarianAgent, an asyncio-native LibrarianAgent built on the async Gemini client.
+
+        All calls share one client and therefore one connection pool. In-flight requests are bounded by a
+        semaphore and paced by a requests and tokens per minute limiter, so a single event loop can keep
+        hundreds of analyses in flight without a thread per request.
+
+        Args:
+            model_name: The name of the Gemini model to use.
+            temperature: The sampling temperature to use control creativity, lower more consistent range 0 - 1.
+            max_output_tokens: The maximum number of tokens to generate.
+            top_p: The nucleus sampling probability control diversity, higher better range 0 - 1.
+            cache: An optional result cache, checked before calling the model.
+            retry_policy: How to retry rate limits, server errors and invalid output, defaults to RetryPolicy().
+            max_concurrency: The maximum number of requests in flight at once.
+            requests_per_minute: The maximum number of requests per minute, or None for no limit.
+            tokens_per_minute: The maximum number of prompt and output tokens per minute, or None for no limit.
+        """
+        from google import genai
+
+        self.client = genai.Client()
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.top_p = top_p
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.rate_limiter = RateLimiter(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def close(self):
+        await self.client.aio.aclose()
+        self.client.close()
+
+    async def extract_information(self, epub_content: str) -> ContentInformation:
+        prompt = LIBRARIAN_PROMPT
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(
+                content=epub_content,
+                prompt=prompt,
+                model_name=self.model_name,
+                temperature=self.temperature,
+                max_output_tokens=self.max_output_tokens,
+                top_p=self.top_p,
+            )
+            # The cache reads files, keep the event loop free for the other requests meanwhile.
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        retry = RetryState(
+            policy=self.retry_policy,
+            stats=self.retry_stats,
+            rate_limiter=self.rate_limiter,
+            max_output_tokens=self.max_output_tokens,
+        )
+        request_tokens = estimate_tokens(prompt) + estimate_tokens(epub_content)
+        contents: "list[types.PartUnionDict]" = [{"text": prompt}, {"text": epub_content}]
+        with metrics.time_stage("model_call"):
+            while True:
+                async with self._semaphore:
+                    await self.rate_limiter.acquire_async(request_tokens + retry.max_output_tokens)
+                    try:
+                        response = await self.client.aio.models.generate_content(
+                            model=self.model_name,
+                            contents=contents,
+                            config={
+                                "response_mime_type": "application/json",
+                                "response_schema": ContentInformation,
+                                "temperature": self.temperature,
+                                "max_output_tokens": retry.max_output_tokens,
+                                "top_p": self.top_p,
+                            },
+                        )
+                        # An empty response fails validation like truncated JSON and is re-asked the same way.
+                        output_text = response.text or ""
+                        content_information = ContentInformation.model_validate_json(output_text)
+                        break
+                    except Exception as e:
+                        delay = retry.next_delay(e)
+                # Backs off outside the semaphore, so a retrying book does not hold a slot other books could use.
+                await asyncio.sleep(delay)
+        metrics.observe("prompt_tokens", request_tokens)
+        metrics.observe("output_tokens", estimate_tokens(output_text))
+        metrics.observe("model_retries", retry.attempt)
+
+        if self.cache is not None and cache_key is not None:
+            await asyncio.to_thread(self.cache.put, cache_key, content_information)
+        return content_information
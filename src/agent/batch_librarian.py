@@ -0,0 +1,178 @@
+import json
+import time
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+from src.agent.librarian import LIBRARIAN_PROMPT
+from src.agent.librarian_model import ContentInformation
+from src.utils.logger import get_logger
+
+SUCCEEDED_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+FAILED_STATES = {"JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+if TYPE_CHECKING:
+    from google import genai
+
+
+class BatchJobError(Exception):
+    pass
+
+
+class BatchLibrarian:
+    def __init__(
+        self,
+        client: "genai.Client",
+        model_name: str = "gemini-2.5-flash",
+        temperature: float = 0.2,
+        max_output_tokens: int = 200,
+        top_p: float = 0.95,
+        poll_interval_seconds: float = 60.0,
+    ):
+        """
+        Initializes the BatchLibrarian, which runs the LibrarianAgent analysis through the Gemini Batch API.
+
+        Batch jobs trade interactive latency for lower cost and higher total throughput, which suits
+        offline back-catalog enrichment.
+
+        Args:
+            client: The Gemini client, usually shared with a LibrarianAgent.
+            model_name: The name of the Gemini model to use.
+            temperature: The sampling temperature to use control creativity, lower more consistent range 0 - 1.
+            max_output_tokens: The maximum number of tokens to generate.
+            top_p: The nucleus sampling probability control diversity, higher better range 0 - 1.
+            poll_interval_seconds: The time between job status checks.
+        """
+        self.client = client
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.top_p = top_p
+        self.poll_interval_seconds = poll_interval_seconds
+
+    def build_request(self, epub_content: str) -> dict:
+        """
+        Builds the GenerateContent request of one book, with the same prompt and schema as LibrarianAgent.
+
+        Args:
+            epub_content: The book content.
+
+        Returns:
+            The request as a JSON-serializable dict.
+        """
+        return {
+            "contents": [{"role": "user", "parts": [{"text": LIBRARIAN_PROMPT}, {"text": epub_content}]}],
+            "generation_config": {
+                "response_mime_type": "application/json",
+                "response_json_schema": ContentInformation.model_json_schema(),
+                "temperature": self.temperature,
+                "max_output_tokens": self.max_output_tokens,
+                "top_p": self.top_p,
+            },
+        }
+
+    def write_job_file(self, job_file_path: str, books: Iterable[tuple[str, str]]) -> int:
+        """
+        Writes the batch job file, one JSON line per book keyed by epub_id.
+
+        Args:
+            job_file_path: The path of the JSONL job file.
+            books: Pairs of epub_id and book content, consumed lazily.
+
+        Returns:
+            The number of requests written.
+        """
+        count = 0
+        with open(job_file_path, mode="w", encoding="utf-8") as file:
+            for epub_id, epub_content in books:
+                file.write(json.dumps({"key": epub_id, "request": self.build_request(epub_content)}) + "\n")
+                count += 1
+        return count
+
+    def upload(self, job_file_path: str, display_name: str) -> str:
+        """
+        Uploads the job file.
+
+        Args:
+            job_file_path: The path of the JSONL job file.
+            display_name: The display name of the uploaded file.
+
+        Returns:
+            The uploaded file name.
+
+        Raises:
+            BatchJobError: If the upload returned no file name.
+        """
+        uploaded_file = self.client.files.upload(
+            file=job_file_path, config={"display_name": display_name, "mime_type": "jsonl"}
+        )
+        if uploaded_file.name is None:
+            raise BatchJobError(f"Upload of {job_file_path} returned no file name")
+        return uploaded_file.name
+
+    def create_job(self, uploaded_file_name: str, display_name: str) -> str:
+        """
+        Creates the batch job from an uploaded job file.
+
+        Args:
+            uploaded_file_name: The uploaded file name.
+            display_name: The display name of the job.
+
+        Returns:
+            The batch job name.
+
+        Raises:
+            BatchJobError: If the job was created without a name.
+        """
+        job = self.client.batches.create(model=self.model_name, src=uploaded_file_name, config={"display_name": display_name})
+        if job.name is None:
+            raise BatchJobError(f"Batch job for {uploaded_file_name} was created without a name")
+        get_logger(__name__).info(f"Submitted batch job {job.name} with input file {uploaded_file_name}")
+        return job.name
+
+    def wait(self, job_name: str):
+        """
+        Polls the batch job until it reaches a terminal state.
+
+        Args:
+            job_name: The batch job name.
+
+        Returns:
+            The completed batch job.
+
+        Raises:
+            BatchJobError: If the job failed, was cancelled or expired.
+        """
+        logger = get_logger(__name__)
+        while True:
+            job = self.client.batches.get(name=job_name)
+            state = getattr(job.state, "name", str(job.state))
+            if state in SUCCEEDED_STATES:
+                return job
+            if state in FAILED_STATES:
+                raise BatchJobError(f"Batch job {job_name} ended in {state}: {job.error}")
+            logger.info(f"Batch job {job_name} is {state}, checking again in {self.poll_interval_seconds} seconds.")
+            time.sleep(self.poll_interval_seconds)
+
+    def read_results(self, job) -> Iterator[tuple[str, ContentInformation | Exception]]:
+        """
+        Downloads the results of a completed batch job and validates each one independently.
+
+        Args:
+            job: The completed batch job.
+
+        Returns:
+            An iterator of epub_id and either the validated ContentInformation or the error for that book.
+        """
+        data = self.client.files.download(file=job.dest.file_name)
+        for line in data.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key = record.get("key", "")
+            try:
+                if record.get("error"):
+                    raise BatchJobError(f"Request failed: {record['error']}")
+                parts = record["response"]["candidates"][0]["content"]["parts"]
+                text = "".join(part.get("text", "") for part in parts)
+                yield key, ContentInformation.model_validate_json(text)
+            except Exception as e:
+                yield key, e
@@ -0,0 +1,244 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+from src.agent.librarian import LIBRARIAN_PROMPT, Analyzer, LibrarianAgent
+from src.agent.librarian_model import ContentInformation
+from src.agent.map_reduce_librarian import MapReduceLibrarian, reduce_content_information
+from src.tool.content_reducer import estimate_tokens, select_chunks, strip_boilerplate
+from src.tool.epub import EpubContent
+from src.utils.logger import get_logger, log_execution_time
+from src.utils.metrics import metrics
+
+# List prices in USD per million input and output tokens, used to estimate the cost of each book.
+MODEL_PRICES = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+class CascadeStats(BaseModel):
+    books: int = 0
+    escalations: int = 0
+    cheap_calls: int = 0
+    strong_calls: int = 0
+    cost: float = 0.0
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.books if self.books else 0.0
+
+    @property
+    def cost_per_book(self) -> float:
+        return self.cost / self.books if self.books else 0.0
+
+    def summary(self) -> dict:
+        return {**self.model_dump(), "escalation_rate": self.escalation_rate, "cost_per_book": self.cost_per_book}
+
+
+def split_samples(epub_content: str, sample_tokens: int) -> tuple[str, str]:
+    """
+    Takes two independent samples of a book, one from each half of its text without boilerplate.
+
+    Args:
+        epub_content: The book content.
+        sample_tokens: The maximum number of tokens per sample.
+
+    Returns:
+        The samples of the first and the second half.
+    """
+    content = strip_boilerplate(epub_content)
+    middle = content.find("\n", len(content) // 2)
+    middle = middle if middle != -1 else len(content) // 2
+    return select_chunks(content[:middle], sample_tokens), select_chunks(content[middle:], sample_tokens)
+
+
+def meets_constraints(content_information: ContentInformation) -> bool:
+    """
+    Checks that an analysis has no blank fields and at least the minimum number of themes and characters.
+
+    Args:
+        content_information: The analysis.
+
+    Returns:
+        Whether the analysis is complete.
+    """
+    for name in ("themes", "characters_and_relationships"):
+        constraints = ContentInformation.model_fields[name].metadata
+        min_length = max((getattr(constraint, "min_length", 0) for constraint in constraints), default=0)
+        if len(getattr(content_information, name)) < min_length:
+            return False
+    texts = [
+        content_information.genre,
+        content_information.setting.time,
+        content_information.setting.place,
+        content_information.cultural_context,
+        content_information.narrative_tone,
+        content_information.author_writing_style,
+        *content_information.themes,
+        *(character.name for character in content_information.characters_and_relationships),
+    ]
+    return all(text.strip() for text in texts)
+
+
+def _overlap(first: list[str], second: list[str]) -> float:
+    first_set = {value.strip().casefold() for value in first}
+    second_set = {value.strip().casefold() for value in second}
+    return len(first_set & second_set) / len(first_set | second_set) if first_set | second_set else 1.0
+
+
+def score_agreement(first: ContentInformation, second: ContentInformation) -> float:
+    """
+    Scores how well two analyses of the same book agree.
+
+    Args:
+        first: The analysis of one sample.
+        second: The analysis of another sample.
+
+    Returns:
+        The mean of the genre match and the overlaps of the themes and character names, range 0 - 1.
+    """
+    genre = float(first.genre.strip().casefold() == second.genre.strip().casefold())
+    themes = _overlap(first.themes, second.themes)
+    characters = _overlap(
+        [character.name for character in first.characters_and_relationships],
+        [character.name for character in second.characters_and_relationships],
+    )
+    return (genre + themes + characters) / 3
+
+
+class CascadeLibrarian:
+    def __init__(
+        self,
+        cheap_agent: LibrarianAgent,
+        strong_agent: Analyzer,
+        sample_tokens: int = 8_000,
+        min_confidence: float = 0.5,
+        prices: dict[str, tuple[float, float]] | None = None,
+    ):
+        """
+        Initializes the CascadeLibrarian, which analyzes a book with a cheap model first and escalates when unsure.
+
+        The cheap model analyzes two samples of the book, taken from each half. Their analyses must be
+        valid and complete, and they must agree, for the book to be answered with their merged analysis.
+        Other books are escalated to the strong agent with the full content, so the easy majority of a
+        catalog costs a few small requests to the cheap model.
+
+        Args:
+            cheap_agent: The agent of the cheap model, e.g. gemini-2.5-flash-lite.
+            strong_agent: The agent analyzing escalated books with their full content.
+            sample_tokens: The maximum number of content tokens per sample sent to the cheap model.
+            min_confidence: The agreement of the two samples below which a book is escalated, range 0 - 1.
+            prices: The USD prices per million input and output tokens by model name, defaults to MODEL_PRICES.
+        """
+        self.cheap_agent = cheap_agent
+        self.strong_agent = strong_agent
+        self.sample_tokens = sample_tokens
+        self.min_confidence = min_confidence
+        self.prices = prices if prices is not None else MODEL_PRICES
+        self.stats = CascadeStats()
+        self._lock = threading.Lock()
+
+    def _model_name(self, agent: Analyzer) -> str:
+        if isinstance(agent, MapReduceLibrarian):
+            return agent.librarian_agent.model_name
+        # Analyzers without a model name, e.g. benchmark stubs, have no price.
+        return getattr(agent, "model_name", "")
+
+    def _cost(self, model_name: str, content: str, result: ContentInformation | None) -> float:
+        input_price, output_price = self.prices.get(model_name, (0.0, 0.0))
+        input_tokens = estimate_tokens(LIBRARIAN_PROMPT) + estimate_tokens(content)
+        output_tokens = estimate_tokens(result.model_dump_json()) if result is not None else 0
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def _analyze_sample(self, sample: str) -> ContentInformation | Exception:
+        try:
+            return self.cheap_agent.extract_information(epub_content=sample)
+        except Exception as e:
+            return e
+
+    def confidence(self, candidates: list[ContentInformation | Exception]) -> float:
+        """
+        Scores the cheap model's analyses of a book's samples.
+
+        Args:
+            candidates: The analysis, or the error, of each sample.
+
+        Returns:
+            0 unless both samples were analyzed, passed validation and are complete, otherwise the agreement
+            of the samples.
+        """
+        analyses = [candidate for candidate in candidates if not isinstance(candidate, Exception)]
+        if len(analyses) != 2 or len(candidates) != 2 or not all(meets_constraints(analysis) for analysis in analyses):
+            return 0.0
+        first, second = analyses
+        return score_agreement(first, second)
+
+    @log_execution_time
+    def extract_information(self, epub_content: str | EpubContent) -> ContentInformation:
+        """
+        Analyzes the samples with the cheap model and escalates to the strong agent when the confidence is low.
+
+        Args:
+            epub_content: The book content.
+
+        Returns:
+            The merged analysis of the samples, or the strong agent's analysis of the full content.
+        """
+        epub_content = str(epub_content)
+        samples = split_samples(epub_content, self.sample_tokens)
+        candidates: list[ContentInformation | Exception] = []
+        # A book too short to split into two samples with text, e.g. a title page, goes to the strong agent.
+        if all(sample.strip() for sample in samples):
+            with ThreadPoolExecutor(max_workers=len(samples), thread_name_prefix="cascade") as pool:
+                # Run in a copy of this context, so the measurements stay attributed to the book in scope.
+                futures = [pool.submit(contextvars.copy_context().run, self._analyze_sample, sample) for sample in samples]
+                candidates = [future.result() for future in futures]
+
+        cheap_model = self._model_name(self.cheap_agent)
+        cost = sum(
+            self._cost(cheap_model, sample, None if isinstance(candidate, Exception) else candidate)
+            for sample, candidate in zip(samples, candidates)
+        )
+        confidence = self.confidence(candidates)
+        analyses = [candidate for candidate in candidates if not isinstance(candidate, Exception)]
+        if analyses and len(analyses) == len(candidates) and confidence >= self.min_confidence:
+            self._record(confidence=confidence, escalated=False, cheap_calls=len(candidates), cost=cost)
+            return reduce_content_information(analyses)
+
+        get_logger(__name__).info(f"Escalating to the strong model, confidence {confidence:.2f}.")
+        result = None
+        try:
+            result = self.strong_agent.extract_information(epub_content=epub_content)
+            return result
+        finally:
+            cost += self._cost(self._model_name(self.strong_agent), epub_content, result)
+            self._record(confidence=confidence, escalated=True, cheap_calls=len(candidates), cost=cost)
+
+    def _record(self, confidence: float, escalated: bool, cheap_calls: int, cost: float):
+        with self._lock:
+            self.stats.books += 1
+            self.stats.escalations += escalated
+            self.stats.cheap_calls += cheap_calls
+            self.stats.strong_calls += escalated
+            self.stats.cost += cost
+        metrics.observe("cascade_confidence", confidence)
+        metrics.observe("cascade_escalations", int(escalated))
+        metrics.observe("model_cost_usd", cost)
+
+    def config_fingerprint(self) -> str:
+        """
+        Identifies the analysis configuration, including both models and the cascade settings.
+
+        Returns:
+            The fingerprint of the analysis configuration.
+        """
+        return (
+            f"cascade:{self.cheap_agent.config_fingerprint()}:{self.strong_agent.config_fingerprint()}:"
+            f"{self.sample_tokens}:{self.min_confidence}"
+        )
+
+    def close(self):
+        self.cheap_agent.close()
+        self.strong_agent.close()
@@ -0,0 +1,167 @@
+import threading
+import time
+from typing import TYPE_CHECKING
+from pydantic import BaseModel
+from src.tool.content_reducer import estimate_tokens
+from src.utils.logger import get_logger
+
+# The smallest context Gemini 2.5 Flash accepts for explicit caching.
+MIN_CACHE_TOKENS = 1024
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+
+class ContextCacheStats(BaseModel):
+    prefix_caches_created: int = 0
+    prefix_cache_refreshes: int = 0
+    book_caches_created: int = 0
+    cached_calls: int = 0
+    cached_tokens: int = 0
+    failures: int = 0
+
+
+class ContextCache:
+    def __init__(
+        self,
+        client: "genai.Client",
+        model_name: str,
+        ttl_seconds: int = 3600,
+        refresh_margin_seconds: int = 300,
+        book_ttl_seconds: int = 600,
+        min_tokens: int = MIN_CACHE_TOKENS,
+    ):
+        """
+        Initializes the ContextCache, which manages Gemini explicit context caches for the LibrarianAgent.
+
+        The instruction prompt shared by every call is cached once per model and refreshed before its TTL
+        expires, as soon as it is long enough for explicit caching. When a book needs another pass, e.g.
+        after invalid output, the prompt and book content are cached together so the follow-up passes only
+        pay for the new tokens. The tokens read from caches instead of being sent again are counted in stats.
+
+        Args:
+            client: The Gemini client.
+            model_name: The name of the Gemini model the caches are created for.
+            ttl_seconds: The time to live of the prompt cache.
+            refresh_margin_seconds: How long before expiry the prompt cache is extended.
+            book_ttl_seconds: The time to live of a book cache, which is deleted once the book is done anyway.
+            min_tokens: The smallest context worth caching, Gemini rejects smaller explicit caches.
+        """
+        self.client = client
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.book_ttl_seconds = book_ttl_seconds
+        self.min_tokens = min_tokens
+        self.stats = ContextCacheStats()
+        self._lock = threading.Lock()
+        self._prefix_caches: dict[str, tuple[str, float]] = {}
+
+    def _count(self, **increments: int):
+        with self._lock:
+            for field, increment in increments.items():
+                setattr(self.stats, field, getattr(self.stats, field) + increment)
+
+    def record_hit(self, cached_tokens: int):
+        """
+        Counts a model call served partly from a cache.
+
+        Args:
+            cached_tokens: The estimated number of tokens read from the cache.
+        """
+        self._count(cached_calls=1, cached_tokens=cached_tokens)
+
+    def prefix_cache(self, prompt: str) -> str | None:
+        """
+        Returns the cache holding the instruction prompt, creating it or extending its TTL when needed.
+
+        Args:
+            prompt: The instruction prompt.
+
+        Returns:
+            The cache name, or None if the prompt is too short to cache or the cache could not be created.
+        """
+        if estimate_tokens(prompt) < self.min_tokens:
+            return None
+        with self._lock:
+            name, expires_at = self._prefix_caches.get(prompt, (None, 0.0))
+            if name is not None and time.time() < expires_at - self.refresh_margin_seconds:
+                return name
+            try:
+                if name is not None:
+                    try:
+                        self.client.caches.update(name=name, config={"ttl": f"{self.ttl_seconds}s"})
+                        self.stats.prefix_cache_refreshes += 1
+                    except Exception:
+                        # The cache expired or was deleted in the meantime, create it again.
+                        name = None
+                if name is None:
+                    cached_content = self.client.caches.create(
+                        model=self.model_name,
+                        config={
+                            "system_instruction": prompt,
+                            "display_name": "librarian-prompt",
+                            "ttl": f"{self.ttl_seconds}s",
+                        },
+                    )
+                    if cached_content.name is None:
+                        raise ValueError("the created cache has no name")
+                    name = cached_content.name
+                    self.stats.prefix_caches_created += 1
+            except Exception as e:
+                get_logger(__name__).warning(f"Failed to cache the instruction prompt, sending it in full: {e}")
+                self.stats.failures += 1
+                self._prefix_caches.pop(prompt, None)
+                return None
+            self._prefix_caches[prompt] = (name, time.time() + self.ttl_seconds)
+            return name
+
+    def create_book_cache(self, prompt: str, epub_content: str) -> str | None:
+        """
+        Caches the prompt and the content of a book for follow-up passes over the same book.
+
+        Args:
+            prompt: The instruction prompt.
+            epub_content: The book content.
+
+        Returns:
+            The cache name, or None if the book is too short to cache or the cache could not be created.
+        """
+        if estimate_tokens(prompt) + estimate_tokens(epub_content) < self.min_tokens:
+            return None
+        contents: "list[types.ContentUnionDict]" = [{"role": "user", "parts": [{"text": epub_content}]}]
+        config: "types.CreateCachedContentConfigDict" = {
+            "system_instruction": prompt,
+            "contents": contents,
+            "display_name": "librarian-book",
+            "ttl": f"{self.book_ttl_seconds}s",
+        }
+        try:
+            cached_content = self.client.caches.create(model=self.model_name, config=config)
+        except Exception as e:
+            get_logger(__name__).warning(f"Failed to cache the book content, resending it in full: {e}")
+            self._count(failures=1)
+            return None
+        self._count(book_caches_created=1)
+        return cached_content.name
+
+    def delete(self, name: str):
+        """
+        Deletes a cache, e.g. the book cache once the book is done.
+
+        Args:
+            name: The cache name.
+        """
+        try:
+            self.client.caches.delete(name=name)
+        except Exception as e:
+            get_logger(__name__).warning(f"Failed to delete context cache {name}, it expires on its own: {e}")
+
+    def close(self):
+        """Deletes the prompt caches."""
+        with self._lock:
+            names = [name for name, _ in self._prefix_caches.values()]
+            self._prefix_caches.clear()
+        for name in names:
+            self.delete(name)
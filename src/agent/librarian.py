@@ -1,10 +1,46 @@
-import outlines
-from google import genai
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, Protocol, TypeVar
+from src.agent.context_cache import ContextCache
 from src.agent.librarian_model import ContentInformation
+from src.agent.result_cache import ResultCache
+from src.agent.retry import RetryPolicy, RetryState, RetryStats
+from src.tool.content_reducer import estimate_tokens
+from src.tool.epub import EpubContent
 from src.utils.logger import log_execution_time
+from src.utils.metrics import metrics
+from src.utils.rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    from outlines.inputs import Chat
+
+LIBRARIAN_PROMPT = """
+        You're an expert in literature and literary analysis. Your task is to extract and summarize key information from the provided book content. Please provide the following details in a structured format:
+            genre (str): Give only 1 main genre of the book (e.g., science fiction, crime, fantasy, romance)
+            themes (list[str]): A list of the main themes being featured in the book.
+            setting (dict[str, str]): A dictionary of the time and place that the story takes place in.
+            cultural_context (str): A brief 1/2 sentence of the relevant cultural context invoked in the story.
+            narrative_tone (str): A brief 1/2 sentence of the attitude or mood conveyed by the storytelling.
+            author_writing_style (str): A brief 1/2 sentence of the writing style and techniques employed by the author.
+            characters_and_relationships (list[dict[str, str]]): A list of dictionaries outlining the central characters and their most important relationships using the fields name and relationship.
+        """  # noqa: E501
+
+T = TypeVar("T")
+
+# Sent instead of the book when the prompt and book content are read from a context cache.
+CACHED_BOOK_PROMPT = "Extract the details described in your instructions from the book content above."
+
+
+class Analyzer(Protocol):
+    """The interface of the agents that analyze a whole book, e.g. LibrarianAgent, MapReduceLibrarian and CascadeLibrarian."""
+
+    def extract_information(self, epub_content: str | EpubContent) -> ContentInformation: ...
+
+    def config_fingerprint(self) -> str: ...
+
+    def close(self): ...
 
 
-@log_execution_time
 class LibrarianAgent:
     def __init__(
         self,
@@ -12,6 +48,11 @@ class LibrarianAgent:
         temperature: float = 0.2,
         max_output_tokens: int = 200,
         top_p: float = 0.95,
+        cache: ResultCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        context_cache: bool = False,
     ):
         """
         Initializes the LibrarianAgent.
@@ -21,34 +62,197 @@ class LibrarianAgent:
             temperature: The sampling temperature to use control creativity, lower more consistent range 0 - 1.
             max_output_tokens: The maximum number of tokens to generate.
             top_p: The nucleus sampling probability control diversity, higher better range 0 - 1.
+            cache: An optional result cache, checked before calling the model.
+            retry_policy: How to retry rate limits, server errors and invalid output, defaults to RetryPolicy().
+            requests_per_minute: The maximum number of requests per minute, or None for no limit.
+            tokens_per_minute: The maximum number of prompt and output tokens per minute, or None for no limit.
+            context_cache: Whether to read the prompt, and the book content on retries, from Gemini context caches.
         """
+        # Imported here so that importing this module, e.g. for --help, does not load outlines and the Gemini SDK.
+        import outlines
+        from google import genai
+
         self.client = genai.Client()
+        self.model_name = model_name
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
         self.top_p = top_p
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.rate_limiter = RateLimiter(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
         self.model = outlines.from_gemini(client=self.client, model_name=model_name)
+        self.context_cache = ContextCache(client=self.client, model_name=model_name) if context_cache else None
 
     def close(self):
+        if self.context_cache is not None:
+            self.context_cache.close()
         self.client.close()
 
-    def extract_information(self, epub_content: str) -> ContentInformation:
-        prompt = """
-        You're an expert in literature and literary analysis. Your task is to extract and summarize key information from the provided book content. Please provide the following details in a structured format:
-            genre (str): Give only 1 main genre of the book (e.g., science fiction, crime, fantasy, romance)
-            themes (list[str]): A list of the main themes being featured in the book.
-            setting (dict[str, str]): A dictionary of the time and place that the story takes place in.
-            cultural_context (str): A brief 1/2 sentence of the relevant cultural context invoked in the story.
-            narrative_tone (str): A brief 1/2 sentence of the attitude or mood conveyed by the storytelling.
-            author_writing_style (str): A brief 1/2 sentence of the writing style and techniques employed by the author.
-            characters_and_relationships (list[dict[str, str]]): A list of dictionaries outlining the central characters and their most important relationships using the fields name and relationship.
+    def config_fingerprint(self) -> str:
         """
+        Identifies the prompt, model and generation settings, so stored analyses can be redone when they change.
 
-        result = self.model(
-            model_input=prompt + epub_content,
-            output_type=ContentInformation,
+        Returns:
+            The hex digest of the analysis configuration.
+        """
+        return ResultCache.make_key(
+            content="",
+            prompt=LIBRARIAN_PROMPT,
+            model_name=self.model_name,
             temperature=self.temperature,
             max_output_tokens=self.max_output_tokens,
             top_p=self.top_p,
         )
 
-        return ContentInformation.model_validate_json(result)
+    def result_cache_key(self, epub_content: str | EpubContent) -> str:
+        """
+        Returns the result cache key of a book's analysis with the current prompt, model and generation settings.
+
+        Args:
+            epub_content: The book content.
+
+        Returns:
+            The hex digest identifying the analysis.
+        """
+        return ResultCache.make_key(
+            content=epub_content,
+            prompt=LIBRARIAN_PROMPT,
+            model_name=self.model_name,
+            temperature=self.temperature,
+            max_output_tokens=self.max_output_tokens,
+            top_p=self.top_p,
+        )
+
+    @staticmethod
+    def build_model_input(prompt: str, epub_content: str) -> "Chat":
+        """
+        Builds the model input of a book, with the prompt as the system instruction and the content as the message.
+
+        The content is passed through as is, so the request holds the book once instead of a copy joined to the prompt.
+
+        Args:
+            prompt: The instruction prompt.
+            epub_content: The book content.
+
+        Returns:
+            The outlines Chat input.
+        """
+        from outlines.inputs import Chat
+
+        return Chat([{"role": "system", "content": prompt}, {"role": "user", "content": epub_content}])
+
+    def _call_model(
+        self,
+        build_request: Callable[[], tuple[Any, dict]],
+        output_type: Any,
+        parse: Callable[[str], T],
+        request_tokens: int,
+        max_output_tokens: int,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> T:
+        """
+        Calls the model until its output parses, with rate limiting and the retry policy of the agent.
+
+        Args:
+            build_request: Builds the model input and any extra generation arguments of the next attempt.
+            output_type: The structured output type requested from the model.
+            parse: Validates the model output, raising to retry it.
+            request_tokens: The estimated number of prompt tokens of a request.
+            max_output_tokens: The maximum number of tokens to generate on the first attempt.
+            on_error: Called with the error of a failed attempt that will be retried.
+
+        Returns:
+            The parsed output.
+
+        Raises:
+            The last error once it is not retryable or the attempts are used up.
+        """
+        retry = RetryState(
+            policy=self.retry_policy,
+            stats=self.retry_stats,
+            rate_limiter=self.rate_limiter,
+            max_output_tokens=max_output_tokens,
+        )
+        with metrics.time_stage("model_call"):
+            while True:
+                self.rate_limiter.acquire(request_tokens + retry.max_output_tokens)
+                model_input, model_kwargs = build_request()
+                try:
+                    result = self.model(
+                        model_input=model_input,
+                        output_type=output_type,
+                        temperature=self.temperature,
+                        max_output_tokens=retry.max_output_tokens,
+                        top_p=self.top_p,
+                        **model_kwargs,
+                    )
+                    parsed = parse(result)
+                    break
+                except Exception as e:
+                    delay = retry.next_delay(e)
+                    if on_error is not None:
+                        on_error(e)
+                    time.sleep(delay)
+        metrics.observe("prompt_tokens", request_tokens)
+        metrics.observe("output_tokens", estimate_tokens(result))
+        metrics.observe("model_retries", retry.attempt)
+        return parsed
+
+    @log_execution_time
+    def extract_information(self, epub_content: str | EpubContent) -> ContentInformation:
+        prompt = LIBRARIAN_PROMPT
+        # Lazy content is read from the EPUB only now, once, straight into the text sent to the model.
+        epub_content = str(epub_content)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.result_cache_key(epub_content)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        request_tokens = estimate_tokens(prompt) + estimate_tokens(epub_content)
+        context_cache = self.context_cache
+        prefix_cache = context_cache.prefix_cache(prompt) if context_cache is not None else None
+        book_cache = None
+        cached_tokens = 0
+
+        def build_request() -> tuple[Any, dict]:
+            nonlocal cached_tokens
+            if book_cache is not None:
+                cached_tokens = request_tokens
+                return CACHED_BOOK_PROMPT, {"cached_content": book_cache}
+            if prefix_cache is not None:
+                cached_tokens = estimate_tokens(prompt)
+                return epub_content, {"cached_content": prefix_cache}
+            cached_tokens = 0
+            return self.build_model_input(prompt, epub_content), {}
+
+        def parse(result: str) -> ContentInformation:
+            if cached_tokens and context_cache is not None:
+                context_cache.record_hit(cached_tokens)
+            return ContentInformation.model_validate_json(result)
+
+        def on_error(error: Exception):
+            nonlocal book_cache
+            # Re-asking resends the whole book, so cache it once and only send the short prompt after.
+            if context_cache is not None and book_cache is None:
+                book_cache = context_cache.create_book_cache(prompt, epub_content)
+
+        try:
+            content_information = self._call_model(
+                build_request=build_request,
+                output_type=ContentInformation,
+                parse=parse,
+                request_tokens=request_tokens,
+                max_output_tokens=self.max_output_tokens,
+                on_error=on_error,
+            )
+        finally:
+            if context_cache is not None and book_cache is not None:
+                context_cache.delete(book_cache)
+
+        if self.cache is not None and cache_key is not None:
+            self.cache.put(cache_key, content_information)
+        return content_information
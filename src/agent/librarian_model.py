@@ -33,3 +33,11 @@ class BookMetadata(BaseModel):
     narrative_tone: str
     author_writing_style: str
     characters_and_relationships: list[CharacterAndRelationships] = Field(min_length=3, max_length=10)
+
+
+class PackedContentInformation(ContentInformation):
+    epub_id: str
+
+
+class PackedContentInformationList(BaseModel):
+    books: list[PackedContentInformation]
@@ -0,0 +1,183 @@
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from src.agent.librarian import LibrarianAgent
+from src.agent.librarian_model import CharacterAndRelationships, ContentInformation, ThemeSetting
+from src.tool.content_reducer import CHARS_PER_TOKEN, estimate_tokens
+from src.tool.epub import EpubContent
+from src.utils.logger import get_logger, log_execution_time
+
+CHAPTER_HEADING = re.compile(r"^(?=(?:chapter|book|part|volume)\s+[\divxlc]+\b)", re.IGNORECASE | re.MULTILINE)
+SECTION_BREAK = re.compile(r"\n\s*\n")
+MAX_LIST_LENGTH = 10
+
+
+def _split_oversized(text: str, max_chars: int) -> list[str]:
+    """Splits a text longer than max_chars on paragraph boundaries, cutting mid-paragraph only when unavoidable."""
+    pieces: list[str] = []
+    current = ""
+    for paragraph in text.splitlines(keepends=True):
+        while len(paragraph) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if len(current) + len(paragraph) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(content: str, max_chunk_tokens: int) -> list[str]:
+    """
+    Splits the content into chapter-aligned chunks of at most max_chunk_tokens.
+
+    Chapters are found by their headings, or by blank lines when the content has no recognizable headings.
+    Consecutive chapters are packed into the same chunk while they fit, a chapter longer than a chunk is
+    split on paragraph boundaries.
+
+    Args:
+        content: The book content.
+        max_chunk_tokens: The maximum number of tokens per chunk.
+
+    Returns:
+        The list of chunks, in reading order.
+    """
+    if estimate_tokens(content) <= max_chunk_tokens:
+        return [content]
+
+    max_chars = max_chunk_tokens * CHARS_PER_TOKEN
+    chunks: list[str] = []
+    current = ""
+    chapters = CHAPTER_HEADING.split(content) if len(CHAPTER_HEADING.findall(content)) > 1 else SECTION_BREAK.split(content)
+    for chapter in chapters:
+        chapter = chapter.strip()
+        if not chapter:
+            continue
+        for piece in _split_oversized(chapter, max_chars) if len(chapter) > max_chars else [chapter]:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _rank(values: list[str]) -> list[str]:
+    """Deduplicates values case-insensitively, ranked by frequency and then by first appearance."""
+    counts = Counter(value.strip().casefold() for value in values)
+    first_seen: dict[str, str] = {}
+    for value in values:
+        first_seen.setdefault(value.strip().casefold(), value.strip())
+    order = list(first_seen)
+    return [first_seen[key] for key in sorted(order, key=lambda key: (-counts[key], order.index(key)))]
+
+
+def reduce_content_information(candidates: list[ContentInformation]) -> ContentInformation:
+    """
+    Merges the partial analyses of a book's chunks into one ContentInformation.
+
+    Themes and characters are deduplicated and ranked by how many chunks mention them. Genre, setting
+    time and place are decided by majority vote, and the descriptive fields are taken from the first
+    chunk that agrees with the consensus genre.
+
+    Args:
+        candidates: The partial analyses, in reading order.
+
+    Returns:
+        The merged ContentInformation.
+    """
+    genre = _rank([candidate.genre for candidate in candidates])[0]
+    representative = next(candidate for candidate in candidates if candidate.genre.strip().casefold() == genre.casefold())
+
+    relationships: dict[str, str] = {}
+    for candidate in candidates:
+        for character in candidate.characters_and_relationships:
+            relationships.setdefault(character.name.strip().casefold(), character.relationship)
+    character_names = _rank(
+        [character.name for candidate in candidates for character in candidate.characters_and_relationships]
+    )
+
+    return ContentInformation(
+        genre=genre,
+        themes=_rank([theme for candidate in candidates for theme in candidate.themes])[:MAX_LIST_LENGTH],
+        setting=ThemeSetting(
+            time=_rank([candidate.setting.time for candidate in candidates])[0],
+            place=_rank([candidate.setting.place for candidate in candidates])[0],
+        ),
+        cultural_context=representative.cultural_context,
+        narrative_tone=representative.narrative_tone,
+        author_writing_style=representative.author_writing_style,
+        characters_and_relationships=[
+            CharacterAndRelationships(name=name, relationship=relationships[name.casefold()])
+            for name in character_names[:MAX_LIST_LENGTH]
+        ],
+    )
+
+
+class MapReduceLibrarian:
+    def __init__(self, librarian_agent: LibrarianAgent, max_chunk_tokens: int = 200_000, max_workers: int = 4):
+        """
+        Initializes the MapReduceLibrarian, which analyzes books that exceed the model context in chunks.
+
+        Args:
+            librarian_agent: The agent used to analyze each chunk.
+            max_chunk_tokens: The maximum number of content tokens per request.
+            max_workers: The number of chunks analyzed in parallel.
+        """
+        self.librarian_agent = librarian_agent
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_workers = max_workers
+
+    @log_execution_time
+    def extract_information(self, epub_content: str | EpubContent) -> ContentInformation:
+        """
+        Analyzes the content in one request if it fits, otherwise maps the chunks in parallel and reduces them.
+
+        Args:
+            epub_content: The book content.
+
+        Returns:
+            The ContentInformation of the whole book.
+
+        Raises:
+            The error of the first chunk if every chunk failed.
+        """
+        epub_content = str(epub_content)
+        chunks = split_into_chunks(epub_content, self.max_chunk_tokens)
+        if len(chunks) == 1:
+            return self.librarian_agent.extract_information(epub_content=epub_content)
+
+        def analyze(chunk: str) -> ContentInformation | Exception:
+            try:
+                return self.librarian_agent.extract_information(epub_content=chunk)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chunk") as pool:
+            results = list(pool.map(analyze, chunks))
+
+        candidates = [result for result in results if isinstance(result, ContentInformation)]
+        errors = [result for result in results if isinstance(result, Exception)]
+        if not candidates:
+            raise errors[0]
+        if errors:
+            get_logger(__name__).warning(f"{len(errors)} of {len(chunks)} chunks failed, reducing the remaining ones.")
+        return reduce_content_information(candidates)
+
+    def config_fingerprint(self) -> str:
+        """
+        Identifies the analysis configuration, including the chunk size since it changes the merged result.
+
+        Returns:
+            The fingerprint of the analysis configuration.
+        """
+        return f"{self.librarian_agent.config_fingerprint()}:{self.max_chunk_tokens}"
+
+    def close(self):
+        self.librarian_agent.close()
@@ -0,0 +1,141 @@
+import threading
+from pydantic import BaseModel, ValidationError
+from src.agent.librarian import LIBRARIAN_PROMPT, LibrarianAgent
+from src.agent.librarian_model import ContentInformation, PackedContentInformation, PackedContentInformationList
+from src.tool.content_reducer import estimate_tokens
+from src.utils.logger import get_logger, log_execution_time
+from src.utils.metrics import metrics
+
+PACKED_PROMPT = (
+    LIBRARIAN_PROMPT
+    + """
+        The content below holds several books, each starting with a line "=== BOOK <epub_id> ===". Analyze every book on its own and answer with one entry per book in the "books" list, giving the epub_id of the book in each entry.
+        """  # noqa: E501
+)
+BOOK_HEADER = "\n=== BOOK {epub_id} ===\n"
+
+
+class PackStats(BaseModel):
+    packs: int = 0
+    packed_books: int = 0
+    cached_books: int = 0
+    fallbacks: int = 0
+
+
+class _PackedEntries(BaseModel):
+    # Only the list is checked here, so one invalid entry does not discard the valid ones next to it.
+    books: list[dict]
+
+
+class PackedLibrarian:
+    def __init__(self, librarian_agent: LibrarianAgent, max_pack_tokens: int = 32_000, max_book_tokens: int | None = None):
+        """
+        Initializes the PackedLibrarian, which analyzes several short books in one model request.
+
+        For short stories, poems and novellas the prompt and the per-request latency outweigh the content,
+        so the books are concatenated under epub_id headers and answered as one list keyed by epub_id.
+        Each entry is validated on its own, and the books whose entry is missing or invalid are analyzed
+        again with single-book requests.
+
+        Args:
+            librarian_agent: The agent whose model, generation settings, retry policy, rate limiter and result
+                cache are used, and which analyzes the books that fall back to single requests.
+            max_pack_tokens: The maximum number of content tokens per packed request.
+            max_book_tokens: The largest book that is packed, defaults to a quarter of max_pack_tokens.
+        """
+        self.librarian_agent = librarian_agent
+        self.max_pack_tokens = max_pack_tokens
+        self.max_book_tokens = max_book_tokens if max_book_tokens is not None else max_pack_tokens // 4
+        self.stats = PackStats()
+        self._lock = threading.Lock()
+
+    def is_packable(self, epub_content: str) -> bool:
+        """
+        Checks whether a book is short enough to share a request.
+
+        Args:
+            epub_content: The book content.
+
+        Returns:
+            True if the book is at most max_book_tokens long.
+        """
+        return estimate_tokens(epub_content) <= self.max_book_tokens
+
+    def _count(self, **increments: int):
+        with self._lock:
+            for field, increment in increments.items():
+                setattr(self.stats, field, getattr(self.stats, field) + increment)
+
+    def _request(self, books: dict[str, str]) -> list[dict]:
+        agent = self.librarian_agent
+        model_input = "".join(BOOK_HEADER.format(epub_id=epub_id) + content for epub_id, content in books.items())
+        entries = agent._call_model(
+            build_request=lambda: (PACKED_PROMPT + model_input, {}),
+            output_type=PackedContentInformationList,
+            parse=lambda result: _PackedEntries.model_validate_json(result).books,
+            request_tokens=estimate_tokens(PACKED_PROMPT) + estimate_tokens(model_input),
+            max_output_tokens=agent.max_output_tokens * len(books),
+        )
+        metrics.observe("packed_books", len(books))
+        return entries
+
+    def _analyze_single(self, epub_content: str) -> ContentInformation | Exception:
+        try:
+            return self.librarian_agent.extract_information(epub_content=epub_content)
+        except Exception as e:
+            return e
+
+    @log_execution_time
+    def extract_packed(self, books: dict[str, str]) -> dict[str, ContentInformation | Exception]:
+        """
+        Analyzes several books in one request, falling back to single-book requests for the failed entries.
+
+        Args:
+            books: The content of each book, keyed by epub_id.
+
+        Returns:
+            The ContentInformation of each book, or the exception its single-book request raised, keyed by epub_id.
+        """
+        agent = self.librarian_agent
+        results: dict[str, ContentInformation | Exception] = {}
+        cache_keys = {}
+        if agent.cache is not None:
+            for epub_id, content in books.items():
+                cache_keys[epub_id] = agent.result_cache_key(content)
+                cached = agent.cache.get(cache_keys[epub_id])
+                if cached is not None:
+                    results[epub_id] = cached
+            self._count(cached_books=len(results))
+        pending = {epub_id: content for epub_id, content in books.items() if epub_id not in results}
+        if len(pending) == 1:
+            epub_id, content = next(iter(pending.items()))
+            results[epub_id] = self._analyze_single(content)
+            return results
+        if not pending:
+            return results
+
+        try:
+            entries = self._request(pending)
+        except Exception as e:
+            get_logger(__name__).warning(f"Packed request of {len(pending)} books failed, analyzing them one by one: {e}")
+            entries = []
+        self._count(packs=1, packed_books=len(pending))
+
+        for entry in entries:
+            try:
+                packed = PackedContentInformation.model_validate(entry)
+            except ValidationError:
+                continue
+            if packed.epub_id in pending and packed.epub_id not in results:
+                content_information = ContentInformation.model_validate(packed.model_dump(exclude={"epub_id"}))
+                results[packed.epub_id] = content_information
+                if agent.cache is not None:
+                    agent.cache.put(cache_keys[packed.epub_id], content_information)
+
+        missing = [epub_id for epub_id in pending if epub_id not in results]
+        if missing:
+            get_logger(__name__).warning(f"{len(missing)} of {len(pending)} packed books failed, analyzing them one by one.")
+        self._count(fallbacks=len(missing))
+        for epub_id in missing:
+            results[epub_id] = self._analyze_single(pending[epub_id])
+        return results
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pydantic import BaseModel
+from src.agent.librarian_model import ContentInformation
+from src.tool.epub import EpubContent, iter_content_parts
+from src.utils.logger import get_logger
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int | None = None, max_age_seconds: float | None = None):
+        """
+        Initializes the ResultCache, an on-disk cache of validated ContentInformation results.
+
+        Entries are addressed by a hash of everything that determines the model output, so a cached result
+        is only reused when the content, prompt, model and sampling parameters are all unchanged.
+
+        Args:
+            directory: The directory holding the cache entries, created if missing.
+            max_bytes: The maximum total size of the cache, least recently used entries are evicted beyond it.
+            max_age_seconds: The maximum age of an entry, older entries are treated as misses and removed.
+
+        The entries on disk are listed once, into an in-memory index of their sizes in least recently used
+        order, so eviction does not scan the directory on every write.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index: OrderedDict[str, int] = OrderedDict(
+            (path, size) for path, _, size in sorted(self._entries(), key=lambda entry: entry[1])
+        )
+        self._total_bytes = sum(self._index.values())
+
+    @staticmethod
+    def make_key(
+        content: "str | EpubContent", prompt: str, model_name: str, temperature: float, max_output_tokens: int, top_p: float
+    ) -> str:
+        """
+        Computes the cache key of a model call.
+
+        Args:
+            content: The book content sent to the model.
+            prompt: The instruction prompt sent with the content.
+            model_name: The name of the model.
+            temperature: The sampling temperature.
+            max_output_tokens: The maximum number of tokens to generate.
+            top_p: The nucleus sampling probability.
+
+        Returns:
+            The hex digest identifying the call.
+        """
+        params = json.dumps(
+            {
+                "prompt": prompt,
+                "model_name": model_name,
+                "temperature": temperature,
+                "max_output_tokens": max_output_tokens,
+                "top_p": top_p,
+            },
+            sort_keys=True,
+        )
+        digest = hashlib.sha256(params.encode("utf-8"))
+        digest.update(b"\0")
+        for part in iter_content_parts(content):
+            digest.update(part.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self) -> list[tuple[str, float, int]]:
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _remove(self, path: str):
+        self._total_bytes -= self._index.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self.stats.evictions += 1
+
+    def get(self, key: str) -> ContentInformation | None:
+        """
+        Looks up a cached result.
+
+        Args:
+            key: The cache key from make_key.
+
+        Returns:
+            The cached ContentInformation, or None on a miss.
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+                if self.max_age_seconds is not None and time.time() - stat.st_mtime > self.max_age_seconds:
+                    self._remove(path)
+                    raise FileNotFoundError(path)
+                with open(path, mode="r", encoding="utf-8") as file:
+                    content_information = ContentInformation.model_validate_json(file.read())
+            except (FileNotFoundError, ValueError):
+                self.stats.misses += 1
+                return None
+            if self.max_age_seconds is None:
+                # Refresh the modification time so the next run's index starts in least recently used order.
+                os.utime(path)
+            if path not in self._index:
+                self._total_bytes += stat.st_size
+            self._index[path] = stat.st_size
+            self._index.move_to_end(path)
+            self.stats.hits += 1
+            return content_information
+
+    def put(self, key: str, content_information: ContentInformation):
+        """
+        Stores a result, evicting the least recently used entries when the cache exceeds max_bytes.
+
+        Args:
+            key: The cache key from make_key.
+            content_information: The validated result to store.
+        """
+        path = self._path(key)
+        data = content_information.model_dump_json().encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+            self._total_bytes += len(data) - self._index.pop(path, 0)
+            self._index[path] = len(data)
+            self.stats.writes += 1
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        while self._index and self.max_bytes is not None and self._total_bytes > self.max_bytes:
+            self._remove(next(iter(self._index)))
+        get_logger(__name__).info(f"Evicted cache entries, {self._total_bytes} bytes remaining in {self.directory}")
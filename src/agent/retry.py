@@ -0,0 +1,163 @@
+import random
+import re
+from pydantic import BaseModel, ValidationError
+from src.utils.logger import get_logger
+from src.utils.rate_limiter import RateLimiter
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RATE_LIMIT_STATUS_CODE = 429
+RETRY_INFO_TYPE = "type.googleapis.com/google.rpc.RetryInfo"
+
+
+class RetryPolicy(BaseModel):
+    max_attempts: int = 5
+    initial_backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 60.0
+    backoff_multiplier: float = 2.0
+    max_output_tokens_growth: float = 2.0
+    max_output_tokens_limit: int = 8192
+
+
+class RetryStats(BaseModel):
+    calls: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    truncation_retries: int = 0
+
+
+def get_status_code(error: Exception) -> int | None:
+    """
+    Extracts the HTTP status code of a Gemini error, also when wrapped by outlines.
+
+    Args:
+        error: The raised exception.
+
+    Returns:
+        The HTTP status code, or None if the error carries none.
+    """
+    for candidate in (error, getattr(error, "original_exception", None)):
+        for attribute in ("status_code", "code"):
+            value = getattr(candidate, attribute, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+    return None
+
+
+def _parse_seconds(value) -> float | None:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)s?\s*", str(value))
+    return float(match.group(1)) if match else None
+
+
+def get_retry_after(error: Exception) -> float | None:
+    """
+    Extracts the server's retry hint from a Retry-After header or a google.rpc.RetryInfo error detail.
+
+    Args:
+        error: The raised exception.
+
+    Returns:
+        The number of seconds to wait before retrying, or None if the error carries no hint.
+    """
+    for candidate in (error, getattr(error, "original_exception", None)):
+        headers = getattr(getattr(candidate, "response", None), "headers", None)
+        if headers is not None and headers.get("retry-after") is not None:
+            seconds = _parse_seconds(headers.get("retry-after"))
+            if seconds is not None:
+                return seconds
+
+        details = getattr(candidate, "details", None)
+        if isinstance(details, dict):
+            for detail in details.get("error", {}).get("details", []) or []:
+                if isinstance(detail, dict) and detail.get("@type") == RETRY_INFO_TYPE:
+                    seconds = _parse_seconds(detail.get("retryDelay", ""))
+                    if seconds is not None:
+                        return seconds
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Tells whether an error is transient: rate limits, server errors, timeouts and connection failures.
+
+    Args:
+        error: The raised exception.
+
+    Returns:
+        True if the call should be retried.
+    """
+    if getattr(error, "retryable", False):
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class RetryState:
+    def __init__(self, policy: RetryPolicy, stats: RetryStats, rate_limiter: RateLimiter | None, max_output_tokens: int):
+        """
+        Initializes the RetryState, which decides how to proceed after each failed attempt of one model call.
+
+        Args:
+            policy: The retry policy.
+            stats: The stats to update, shared across calls.
+            rate_limiter: The rate limiter to pause when the quota is exhausted, shared across calls.
+            max_output_tokens: The maximum number of tokens to generate on the first attempt.
+        """
+        self.policy = policy
+        self.stats = stats
+        self.rate_limiter = rate_limiter
+        self.max_output_tokens = max_output_tokens
+        self.attempt = 0
+        stats.calls += 1
+
+    def next_delay(self, error: Exception) -> float:
+        """
+        Records a failed attempt and returns how long to wait before the next one.
+
+        Validation failures, typically JSON cut off at max_output_tokens, are re-asked immediately with a
+        larger max_output_tokens. Transient errors are retried with exponential backoff and full jitter,
+        waiting at least as long as the server's retry hint. A rate limit also pauses the shared rate
+        limiter, so concurrent calls back off together instead of bursting into the limit again.
+
+        Args:
+            error: The exception raised by the attempt.
+
+        Returns:
+            The number of seconds to wait before the next attempt.
+
+        Raises:
+            The given error if it is not retryable or the attempts are exhausted.
+        """
+        self.attempt += 1
+        logger = get_logger(__name__)
+
+        if isinstance(error, ValidationError):
+            if self.attempt >= self.policy.max_attempts or self.max_output_tokens >= self.policy.max_output_tokens_limit:
+                raise error
+            self.max_output_tokens = min(
+                int(self.max_output_tokens * self.policy.max_output_tokens_growth), self.policy.max_output_tokens_limit
+            )
+            self.stats.retries += 1
+            self.stats.truncation_retries += 1
+            logger.warning(f"Invalid model output, retrying with max_output_tokens={self.max_output_tokens}.")
+            return 0.0
+
+        if not is_retryable(error) or self.attempt >= self.policy.max_attempts:
+            raise error
+
+        backoff = min(
+            self.policy.initial_backoff_seconds * self.policy.backoff_multiplier ** (self.attempt - 1),
+            self.policy.max_backoff_seconds,
+        )
+        delay = random.uniform(0, backoff)
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        self.stats.retries += 1
+        if get_status_code(error) == RATE_LIMIT_STATUS_CODE:
+            self.stats.rate_limited += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+        logger.warning(f"Model call failed with {error!r}, retrying in {delay:.2f} seconds (attempt {self.attempt}).")
+        return delay
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from src.agent.librarian_model import BookMetadata
+from src.tool.dedup import ContentFingerprint
+
+
+class BookResult(BaseModel):
+    epub_file_path: str
+    epub_id: str
+    book_metadata: BookMetadata | None = None
+    error: str | None = None
+    saved_tokens: int = 0
+    duplicate_of: str | None = None
+
+
+class ParsedBook(BaseModel):
+    epub_id: str
+    epub_metadata: dict
+    epub_content: str
+    saved_tokens: int = 0
+    fingerprint: ContentFingerprint | None = None
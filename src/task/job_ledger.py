@@ -0,0 +1,170 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pydantic import BaseModel
+
+PARSED_STAGE = "parsed"
+ANALYZED_STAGE = "analyzed"
+MERGED_STAGE = "merged"
+
+
+class BookFingerprints(BaseModel):
+    content: str
+    publisher: str
+    config: str
+
+
+def fingerprint_file(file_path: str) -> str:
+    """
+    Computes the fingerprint of a file's bytes.
+
+    Args:
+        file_path: The path to the file.
+
+    Returns:
+        The SHA-256 hex digest of the file.
+    """
+    with open(file_path, mode="rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def fingerprint_value(value) -> str:
+    """
+    Computes the fingerprint of a JSON-serializable value, e.g. a publisher row or a configuration.
+
+    Args:
+        value: The value.
+
+    Returns:
+        The SHA-256 hex digest of its canonical JSON form.
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class JobLedger:
+    def __init__(self, path: str):
+        """
+        Initializes the JobLedger, a SQLite state file recording which stages each book has completed.
+
+        Every completed stage is stored with its artifact, so a restarted run can skip finished books and
+        resume the others from their last completed stage instead of parsing and analyzing them again.
+
+        Args:
+            path: The path to the SQLite ledger file, created if missing.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stages (
+                epub_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                artifact TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (epub_id, stage)
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                epub_id TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                publisher TEXT NOT NULL,
+                config TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def record(self, epub_id: str, stage: str, artifact: str):
+        """
+        Records that a book completed a stage.
+
+        Args:
+            epub_id: The EPUB identifier.
+            stage: The completed stage.
+            artifact: The JSON artifact produced by the stage.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?)", (epub_id, stage, artifact, time.time())
+            )
+
+    def completed_stages(self, epub_id: str) -> dict[str, str]:
+        """
+        Looks up the stages a book has completed.
+
+        Args:
+            epub_id: The EPUB identifier.
+
+        Returns:
+            A dictionary of completed stage to its artifact.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT stage, artifact FROM stages WHERE epub_id = ?", (epub_id,)).fetchall()
+        return dict(rows)
+
+    def reset(self, epub_id: str, stages: tuple[str, ...] = (PARSED_STAGE, ANALYZED_STAGE, MERGED_STAGE)):
+        """
+        Forgets completed stages of a book, so they run again.
+
+        Args:
+            epub_id: The EPUB identifier.
+            stages: The stages to forget, all of them by default.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM stages WHERE epub_id = ? AND stage = ?", [(epub_id, s) for s in stages])
+
+    def fingerprints(self, epub_id: str) -> BookFingerprints | None:
+        """
+        Looks up the fingerprints of the inputs a book was last processed from.
+
+        Args:
+            epub_id: The EPUB identifier.
+
+        Returns:
+            The stored fingerprints, or None if the book was never processed incrementally.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, publisher, config FROM fingerprints WHERE epub_id = ?", (epub_id,)
+            ).fetchone()
+        return BookFingerprints(content=row[0], publisher=row[1], config=row[2]) if row else None
+
+    def invalidate(self, epub_id: str, fingerprints: BookFingerprints) -> tuple[str, ...]:
+        """
+        Forgets the stages whose inputs changed since the book was last processed and stores the new fingerprints.
+
+        A changed EPUB file or analysis configuration invalidates every stage. A changed publisher row only
+        invalidates the merge, so the stored parse and analysis are merged again with the new row.
+
+        Args:
+            epub_id: The EPUB identifier.
+            fingerprints: The fingerprints of the current inputs.
+
+        Returns:
+            The completed stages that were forgotten.
+        """
+        stored = self.fingerprints(epub_id)
+        if stored == fingerprints:
+            return ()
+        if stored is not None and (stored.content, stored.config) == (fingerprints.content, fingerprints.config):
+            stages: tuple[str, ...] = (MERGED_STAGE,)
+        else:
+            stages = (PARSED_STAGE, ANALYZED_STAGE, MERGED_STAGE)
+        completed = self.completed_stages(epub_id)
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM stages WHERE epub_id = ? AND stage = ?", [(epub_id, s) for s in stages])
+            self._connection.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)",
+                (epub_id, fingerprints.content, fingerprints.publisher, fingerprints.config),
+            )
+        return tuple(stage for stage in stages if stage in completed)
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,342 @@
+import abc
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import types
+import typing
+from pydantic import BaseModel
+from src.agent.librarian_model import BookMetadata
+from src.task.book_model import BookResult
+
+JSONL_FORMAT = "jsonl"
+PARQUET_FORMAT = "parquet"
+SQLITE_FORMAT = "sqlite"
+OUTPUT_FORMATS = (JSONL_FORMAT, PARQUET_FORMAT, SQLITE_FORMAT)
+FORMAT_EXTENSIONS = {".parquet": PARQUET_FORMAT, ".sqlite": SQLITE_FORMAT, ".db": SQLITE_FORMAT}
+SQLITE_TABLE = "books"
+
+
+def result_columns() -> dict[str, typing.Any]:
+    """
+    Derives the flat columns of a result from the BookResult and BookMetadata models.
+
+    Returns:
+        The type annotation of each column, keyed by column name in output order. The BookMetadata
+        columns are optional, since failed books have no metadata.
+    """
+    columns: dict[str, typing.Any] = {
+        name: field.annotation for name, field in BookResult.model_fields.items() if name != "book_metadata"
+    }
+    for name, field in BookMetadata.model_fields.items():
+        columns.setdefault(name, typing.Optional[field.annotation])
+    return columns
+
+
+def result_row(result: BookResult) -> dict:
+    """
+    Flattens a result into one row, with the BookMetadata fields next to the result fields.
+
+    Args:
+        result: The result of a book.
+
+    Returns:
+        The row, keyed by the names of result_columns.
+    """
+    row = result.model_dump(exclude={"book_metadata"})
+    metadata = result.book_metadata.model_dump() if result.book_metadata is not None else {}
+    for name in BookMetadata.model_fields:
+        row.setdefault(name, metadata.get(name))
+    return row
+
+
+def _non_optional(annotation):
+    if typing.get_origin(annotation) in (types.UnionType, typing.Union):
+        return next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    return annotation
+
+
+def arrow_type(annotation):
+    """
+    Maps a Pydantic field annotation to the Arrow type of its column.
+
+    Args:
+        annotation: The annotation, e.g. str, list[str] or a BaseModel subclass.
+
+    Returns:
+        The pyarrow DataType.
+
+    Raises:
+        TypeError: If the annotation has no Arrow equivalent.
+    """
+    import pyarrow as pa
+
+    annotation = _non_optional(annotation)
+    origin = typing.get_origin(annotation)
+    if origin is list:
+        return pa.list_(arrow_type(typing.get_args(annotation)[0]))
+    if origin is dict:
+        key, value = typing.get_args(annotation)
+        return pa.map_(arrow_type(key), arrow_type(value))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pa.struct([pa.field(name, arrow_type(field.annotation)) for name, field in annotation.model_fields.items()])
+    scalar_types = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+    if annotation in scalar_types:
+        return scalar_types[annotation]
+    raise TypeError(f"No Arrow type for {annotation}")
+
+
+def arrow_schema():
+    """
+    Derives the Arrow schema of the flat result rows from the Pydantic models.
+
+    Returns:
+        The pyarrow Schema.
+    """
+    import pyarrow as pa
+
+    return pa.schema([pa.field(name, arrow_type(annotation)) for name, annotation in result_columns().items()])
+
+
+class OutputSink(abc.ABC):
+    def __init__(self, batch_size: int):
+        """
+        Initializes the OutputSink, which buffers results and writes them in batches.
+
+        Args:
+            batch_size: The number of results buffered before they are written.
+        """
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer: list[BookResult] = []
+
+    def write(self, result: BookResult):
+        """
+        Buffers a result, writing the batch once it is full.
+
+        Args:
+            result: The result of a book.
+        """
+        self._buffer.append(result)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered results."""
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self.written += len(self._buffer)
+            self._buffer = []
+
+    @abc.abstractmethod
+    def _write_batch(self, results: list[BookResult]):
+        pass
+
+    def _finalize(self):
+        pass
+
+    def close(self):
+        """Writes the buffered results and finalizes the output."""
+        self.flush()
+        self._finalize()
+
+    def abort(self):
+        """Discards the buffered results without finalizing the output."""
+        self._buffer = []
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # A run that failed or was interrupted must not replace a previous complete output.
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def _file_mode(path: str) -> int:
+    """Returns the mode of the file at path, or the mode a new file gets under the current umask."""
+    if os.path.exists(path):
+        return os.stat(path).st_mode & 0o777
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class _AtomicFileSink(OutputSink):
+    def __init__(self, path: str | None, batch_size: int):
+        super().__init__(batch_size)
+        # Both are None for a sink streaming to stdout, which has no file to move into place.
+        self.path: str | None = path
+        self.temp_path: str | None = None
+        if path is not None:
+            file_descriptor, self.temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(path)), prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+            )
+            os.close(file_descriptor)
+
+    def abort(self):
+        """Discards the output, leaving any existing file at the path untouched."""
+        super().abort()
+        self._close_file()
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def _close_file(self):
+        pass
+
+    def _finalize(self):
+        self._close_file()
+        if self.path is None or self.temp_path is None:
+            return
+        # mkstemp creates the file readable by its owner only, give it the mode of a normally created file.
+        os.chmod(self.temp_path, _file_mode(self.path))
+        # Readers see either the previous file or the complete new one, never a partially written file.
+        os.replace(self.temp_path, self.path)
+
+
+class JsonlSink(_AtomicFileSink):
+    def __init__(self, path: str | None = None, batch_size: int = 1000):
+        """
+        Initializes the JsonlSink, which writes one compact BookResult JSON line per book.
+
+        A file is written under a temporary name and moved into place when the sink is closed. Without a
+        path, the lines are streamed to stdout as soon as they are written.
+
+        Args:
+            path: The path of the JSONL file, or None for stdout.
+            batch_size: The number of lines buffered before they are written to the file.
+        """
+        super().__init__(path, batch_size if path is not None else 1)
+        self._file = sys.stdout if self.temp_path is None else open(self.temp_path, mode="w", encoding="utf-8")
+
+    def _write_batch(self, results: list[BookResult]):
+        self._file.write("".join(result.model_dump_json() + "\n" for result in results))
+        self._file.flush()
+
+    def _close_file(self):
+        if self._file is not sys.stdout and not self._file.closed:
+            self._file.close()
+
+
+class ParquetSink(_AtomicFileSink):
+    def __init__(self, path: str, batch_size: int = 10_000, compression: str = "zstd"):
+        """
+        Initializes the ParquetSink, which writes the results as a Parquet file with one flat row per book.
+
+        The schema is derived from the BookResult and BookMetadata models, with lists and nested models
+        kept as Arrow list and struct columns, so analytics jobs can read only the columns they need.
+        Each batch is written as one row group, and the file is written under a temporary name and moved
+        into place when the sink is closed.
+
+        Args:
+            path: The path of the Parquet file.
+            batch_size: The number of rows per row group.
+            compression: The Parquet compression codec.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("The parquet output format requires pyarrow, install it with `uv sync --extra parquet`") from e
+        super().__init__(path, batch_size)
+        self.schema = arrow_schema()
+        self._writer = pq.ParquetWriter(self.temp_path, self.schema, compression=compression)
+
+    def _write_batch(self, results: list[BookResult]):
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist([result_row(result) for result in results], schema=self.schema)
+        self._writer.write_table(table, row_group_size=len(results))
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SqliteSink(OutputSink):
+    def __init__(self, path: str, batch_size: int = 1000, table: str = SQLITE_TABLE):
+        """
+        Initializes the SqliteSink, which upserts one row per book into a SQLite table keyed by epub_id.
+
+        Re-running a catalog into the same database replaces the rows of the books processed again and
+        keeps the others. Scalar fields are stored in typed columns and lists and nested models as JSON.
+        Each batch is written in one transaction, so the table never holds part of a batch.
+
+        Args:
+            path: The path of the SQLite database, created if missing.
+            batch_size: The number of rows written per transaction.
+            table: The name of the table, created if missing.
+        """
+        super().__init__(batch_size)
+        self.path = path
+        self.table = table
+        self.columns = result_columns()
+        column_types = {str: "TEXT", int: "INTEGER", float: "REAL", bool: "INTEGER"}
+        definitions = ", ".join(
+            f"{name} {column_types.get(_non_optional(annotation), 'TEXT')}"
+            + (" PRIMARY KEY" if name == "epub_id" else "")
+            for name, annotation in self.columns.items()
+        )
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definitions})")
+        self._connection.commit()
+        names = ", ".join(self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in self.columns if name != "epub_id")
+        self._upsert = f"INSERT INTO {table} ({names}) VALUES ({placeholders}) ON CONFLICT(epub_id) DO UPDATE SET {updates}"
+
+    def _write_batch(self, results: list[BookResult]):
+        rows = []
+        for result in results:
+            row = result_row(result)
+            rows.append(
+                tuple(json.dumps(row[name]) if isinstance(row[name], (list, dict)) else row[name] for name in self.columns)
+            )
+        with self._connection:
+            self._connection.executemany(self._upsert, rows)
+
+    def _finalize(self):
+        self._connection.close()
+
+    def abort(self):
+        """Discards the buffered results, keeping the batches already written."""
+        super().abort()
+        self._connection.close()
+
+
+def create_sink(path: str | None, output_format: str | None = None, batch_size: int | None = None) -> OutputSink:
+    """
+    Creates the output sink of a catalog run.
+
+    Args:
+        path: The output path, or None to stream JSONL to stdout.
+        output_format: One of OUTPUT_FORMATS, inferred from the path's extension when None.
+        batch_size: The number of results written at once, or None for the sink's default.
+
+    Returns:
+        The output sink.
+
+    Raises:
+        ValueError: If the format is unknown, or needs a path and none was given.
+    """
+    if output_format is None:
+        output_format = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), JSONL_FORMAT) if path else JSONL_FORMAT
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    options: dict[str, typing.Any] = {"batch_size": batch_size} if batch_size is not None else {}
+    if path is None:
+        if output_format != JSONL_FORMAT:
+            raise ValueError(f"The {output_format} output format needs an output path")
+        return JsonlSink(None, **options)
+    if output_format == PARQUET_FORMAT:
+        return ParquetSink(path, **options)
+    if output_format == SQLITE_FORMAT:
+        return SqliteSink(path, **options)
+    return JsonlSink(path, **options)
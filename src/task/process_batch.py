@@ -0,0 +1,176 @@
+import itertools
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from functools import partial
+from pydantic import BaseModel
+from src.agent.batch_librarian import BatchLibrarian
+from src.task.book_model import BookResult
+from src.task.process_book import build_book_metadata
+from src.task.process_catalog import ANALYZE_STAGE, PARSE_STAGE, create_parse_pool, parse_book
+from src.tool.epub import TIKA_BACKEND, get_epub_id
+from src.tool.publisher_store import PublisherMetadataStore
+from src.utils.logger import get_logger
+
+
+class BatchBook(BaseModel):
+    epub_file_path: str
+    epub_metadata: dict = {}
+    saved_tokens: int = 0
+    error: str | None = None
+
+
+class BatchJobState(BaseModel):
+    job_file_path: str
+    uploaded_file_name: str | None = None
+    job_name: str | None = None
+    books: dict[str, BatchBook] = {}
+
+
+def load_batch_state(state_file_path: str) -> BatchJobState | None:
+    """
+    Loads the job state of a previous batch run.
+
+    Args:
+        state_file_path: The path to the job state file.
+
+    Returns:
+        The job state, or None if no run was started yet.
+    """
+    if not os.path.exists(state_file_path):
+        return None
+    with open(state_file_path, mode="r", encoding="utf-8") as file:
+        return BatchJobState.model_validate_json(file.read())
+
+
+def save_batch_state(state_file_path: str, state: BatchJobState):
+    """
+    Saves the job state atomically, so an interrupted write never corrupts it.
+
+    Args:
+        state_file_path: The path to the job state file.
+        state: The job state.
+    """
+    temp_path = f"{state_file_path}.tmp"
+    with open(temp_path, mode="w", encoding="utf-8") as file:
+        file.write(state.model_dump_json())
+    os.replace(temp_path, state_file_path)
+
+
+def _parse_or_error(epub_file_path: str, epub_backend: str, token_budget: int | None):
+    try:
+        return parse_book(epub_file_path, epub_backend, token_budget)
+    except Exception as e:
+        return e
+
+
+def process_batch(
+    batch_librarian: BatchLibrarian,
+    epub_file_paths: Iterable[str],
+    publisher_store: PublisherMetadataStore,
+    state_file_path: str,
+    parse_workers: int = 4,
+    epub_backend: str = TIKA_BACKEND,
+    token_budget: int | None = None,
+    display_name: str = "epub-metadata-extractor",
+    parse_processes: bool = False,
+) -> Iterator[BookResult]:
+    """
+    Processes a catalog of books through the Gemini Batch API.
+
+    The books are parsed into a batch job file, which is uploaded and submitted as one job. Progress is
+    recorded in a job state file after every step, so a restarted run resumes polling the submitted job
+    instead of parsing and paying for the catalog again. Each result is validated independently and merged
+    with the publisher and EPUB metadata like process_book does.
+
+    Args:
+        batch_librarian: The batch librarian used to submit and read the job.
+        epub_file_paths: The paths to the EPUB files, ignored when resuming a submitted job.
+        publisher_store: The indexed publisher metadata store.
+        state_file_path: The path to the job state file.
+        parse_workers: The number of concurrent EPUB parses.
+        epub_backend: The EPUB parser to use, "tika" or "native".
+        token_budget: The maximum number of content tokens sent per book, or None to send the whole content.
+        display_name: The display name of the uploaded file and batch job.
+        parse_processes: Whether to parse EPUBs in worker processes instead of threads.
+
+    Returns:
+        An iterator of BookResult objects, one per book.
+    """
+    logger = get_logger(__name__)
+    state = load_batch_state(state_file_path)
+    if state is None or state.uploaded_file_name is None:
+        state = BatchJobState(job_file_path=f"{state_file_path}.requests.jsonl")
+
+        def parsed_books() -> Iterator[tuple[str, str]]:
+            # Paths are read and parsed through a bounded window, so memory does not grow with the catalog.
+            max_in_flight = 2 * parse_workers
+            paths = iter(epub_file_paths)
+            in_flight: deque[tuple[str, Future]] = deque()
+            with create_parse_pool(parse_workers, parse_processes) as parse_pool:
+                parse = partial(_parse_or_error, epub_backend=epub_backend, token_budget=token_budget)
+                while True:
+                    for epub_file_path in itertools.islice(paths, max_in_flight - len(in_flight)):
+                        in_flight.append((epub_file_path, parse_pool.submit(parse, epub_file_path)))
+                    if not in_flight:
+                        break
+                    epub_file_path, future = in_flight.popleft()
+                    parsed = future.result()
+                    epub_id = get_epub_id(epub_file_path)
+                    if isinstance(parsed, Exception):
+                        logger.error(f"Failed to process {epub_file_path} during {PARSE_STAGE}: {parsed}")
+                        state.books[epub_id] = BatchBook(epub_file_path=epub_file_path, error=f"{PARSE_STAGE}: {parsed}")
+                        continue
+                    state.books[parsed.epub_id] = BatchBook(
+                        epub_file_path=epub_file_path, epub_metadata=parsed.epub_metadata, saved_tokens=parsed.saved_tokens
+                    )
+                    yield parsed.epub_id, parsed.epub_content
+
+        batch_librarian.write_job_file(state.job_file_path, parsed_books())
+        state.uploaded_file_name = batch_librarian.upload(state.job_file_path, display_name=display_name)
+        save_batch_state(state_file_path, state)
+
+    if state.job_name is None:
+        state.job_name = batch_librarian.create_job(state.uploaded_file_name, display_name=display_name)
+        save_batch_state(state_file_path, state)
+    else:
+        logger.info(f"Resuming batch job {state.job_name} from {state_file_path}")
+
+    for epub_id, book in state.books.items():
+        if book.error is not None:
+            yield BookResult(epub_file_path=book.epub_file_path, epub_id=epub_id, error=book.error)
+
+    job = batch_librarian.wait(state.job_name)
+    pending = {epub_id for epub_id, book in state.books.items() if book.error is None}
+    for epub_id, content_information in batch_librarian.read_results(job):
+        # Skips unknown keys and books already answered, pending only holds books of the state.
+        if epub_id not in pending:
+            continue
+        book = state.books[epub_id]
+        pending.discard(epub_id)
+        try:
+            if isinstance(content_information, Exception):
+                raise content_information
+            book_metadata = build_book_metadata(
+                epub_id=epub_id,
+                epub_metadata=book.epub_metadata,
+                publisher_metadata=publisher_store,
+                content_information=content_information,
+            )
+        except Exception as e:
+            logger.error(f"Failed to process {book.epub_file_path} during {ANALYZE_STAGE}: {e}")
+            yield BookResult(epub_file_path=book.epub_file_path, epub_id=epub_id, error=f"{ANALYZE_STAGE}: {e}")
+            continue
+        yield BookResult(
+            epub_file_path=book.epub_file_path,
+            epub_id=epub_id,
+            book_metadata=book_metadata,
+            saved_tokens=book.saved_tokens,
+        )
+
+    for epub_id in sorted(pending):
+        book = state.books[epub_id]
+        yield BookResult(
+            epub_file_path=book.epub_file_path, epub_id=epub_id, error=f"{ANALYZE_STAGE}: Missing from batch results"
+        )
@@ -1,43 +1,132 @@
-from src.agent.librarian import LibrarianAgent
-from src.agent.librarian_model import BookMetadata
+from src.agent.librarian import Analyzer
+from src.agent.librarian_model import BookMetadata, ContentInformation
+from src.tool.content_reducer import ReducedContent, reduce_content
 from src.tool.csv_parser import read_publisher_metadata
-from src.tool.epub import extract_epub_data
-from src.utils.logger import log_execution_time
+from src.tool.epub import TIKA_BACKEND, extract_epub_data, get_epub_id
+from src.tool.publisher_store import PublisherMetadataStore
+from src.utils.logger import get_logger, log_execution_time
+from src.utils.metrics import metrics
+
+
+def build_book_metadata(
+    epub_id: str,
+    epub_metadata: dict,
+    publisher_metadata: dict | PublisherMetadataStore,
+    content_information: ContentInformation,
+) -> BookMetadata:
+    """
+    Combines publisher metadata, EPUB metadata and the content analysis into a BookMetadata object.
+
+    Publisher metadata takes precedence over the EPUB's own metadata on a per-field basis.
+
+    Args:
+        epub_id: The EPUB identifier.
+        epub_metadata: The metadata embedded in the EPUB file.
+        publisher_metadata: The publisher metadata, keyed by EPUB identifier, as a dict or an index.
+        content_information: The content analysis produced by the librarian agent.
+
+    Returns:
+        A BookMetadata object containing the combined book information.
+    """
+    with metrics.time_stage("csv_lookup"):
+        publisher_row = publisher_metadata.get(epub_id, {}) or {}
+
+    with metrics.time_stage("merge"):
+        book_title = publisher_row.get("title") or epub_metadata.get("dc:title") or "Unknown Title"
+        book_author = publisher_row.get("author") or epub_metadata.get("dc:creator") or "Unknown Author"
+        publishing_year = publisher_row.get("publishing_year") or epub_metadata.get("dc:date") or 0
+
+        return BookMetadata(
+            title=book_title,
+            author=book_author,
+            publishing_year=publishing_year,
+            epub_id=epub_id,
+            genre=content_information.genre,
+            themes=content_information.themes,
+            setting=content_information.setting,
+            cultural_context=content_information.cultural_context,
+            narrative_tone=content_information.narrative_tone,
+            author_writing_style=content_information.author_writing_style,
+            characters_and_relationships=content_information.characters_and_relationships,
+        )
+
+
+def reduce_book_content(epub_id: str, epub_content: str, token_budget: int) -> ReducedContent:
+    """
+    Reduces the book content to the token budget and reports the tokens saved.
+
+    Args:
+        epub_id: The EPUB identifier, used for reporting.
+        epub_content: The book content.
+        token_budget: The maximum number of content tokens.
+
+    Returns:
+        A ReducedContent object with the reduced content and its token counts.
+    """
+    with metrics.time_stage("content_reduction"):
+        reduced = reduce_content(content=epub_content, token_budget=token_budget)
+    metrics.observe("saved_tokens", reduced.saved_tokens)
+    get_logger(__name__).info(
+        f"Reduced content of {epub_id} from {reduced.original_tokens} to {reduced.reduced_tokens} tokens, "
+        f"saving {reduced.saved_tokens} tokens."
+    )
+    return reduced
 
 
 @log_execution_time
-def process_book(librarian_agent: LibrarianAgent, epub_file_path: str, metadata_file_path: str) -> BookMetadata:
+def process_book(
+    librarian_agent: Analyzer,
+    epub_file_path: str,
+    metadata_file_path: str | None = None,
+    publisher_store: PublisherMetadataStore | None = None,
+    epub_backend: str = TIKA_BACKEND,
+    token_budget: int | None = None,
+) -> BookMetadata:
     """
     Processes a book by extracting metadata, analyzing content, and combining the information.
 
     Args:
         epub_file_path: The path to the EPUB file.
-        metadata_file_path: The path to the publisher metadata CSV file.
+        metadata_file_path: The path to the publisher metadata CSV file, streamed on every call keeping only this book's row.
+        publisher_store: An indexed publisher metadata store to use in place of metadata_file_path,
+            loaded once and shared across books.
+        epub_backend: The EPUB parser to use, "tika" or "native".
+        token_budget: The maximum number of content tokens sent to the librarian agent, the content is
+            stripped of boilerplate and sampled down to it when set.
 
     Returns:
         A BookMetadata object containing the combined book information.
     """
-    publisher_metadata = read_publisher_metadata(file_path=metadata_file_path, separator="\t")
-
-    epub_metadata, epub_content, epub_id = extract_epub_data(file_path=epub_file_path)
-
-    content_information = librarian_agent.extract_information(epub_content=epub_content)
-
-    book_title = publisher_metadata.get(epub_id, {}).get("title") or epub_metadata.get("dc:title") or "Unknown Title"
-    book_author = publisher_metadata.get(epub_id, {}).get("author") or epub_metadata.get("dc:creator") or "Unknown Author"
-    publishing_year = publisher_metadata.get(epub_id, {}).get("publishing_year") or epub_metadata.get("dc:date") or 0
-
-    response = BookMetadata(
-        title=book_title,
-        author=book_author,
-        publishing_year=publishing_year,
-        epub_id=epub_id,
-        genre=content_information.genre,
-        themes=content_information.themes,
-        setting=content_information.setting,
-        cultural_context=content_information.cultural_context,
-        narrative_tone=content_information.narrative_tone,
-        author_writing_style=content_information.author_writing_style,
-        characters_and_relationships=content_information.characters_and_relationships,
-    )
-    return response
+    epub_id = get_epub_id(epub_file_path)
+    with metrics.book_scope(epub_id):
+        try:
+            if publisher_store is not None:
+                publisher_metadata: dict | PublisherMetadataStore = publisher_store
+            elif metadata_file_path is not None:
+                # Timed apart from the row lookup, which build_book_metadata times as csv_lookup.
+                with metrics.time_stage("csv_read"):
+                    publisher_metadata = read_publisher_metadata(
+                        file_path=metadata_file_path, separator="\t", epub_ids={epub_id}
+                    )
+            else:
+                raise ValueError("Either metadata_file_path or publisher_store must be provided")
+
+            # The native backend's content is read from the EPUB only when it is sent or reduced.
+            epub_metadata, epub_content, epub_id = extract_epub_data(
+                file_path=epub_file_path, backend=epub_backend, lazy=True
+            )
+
+            if token_budget is not None:
+                reduced = reduce_book_content(epub_id=epub_id, epub_content=str(epub_content), token_budget=token_budget)
+                epub_content = reduced.content
+
+            content_information = librarian_agent.extract_information(epub_content=epub_content)
+
+            return build_book_metadata(
+                epub_id=epub_id,
+                epub_metadata=epub_metadata,
+                publisher_metadata=publisher_metadata,
+                content_information=content_information,
+            )
+        finally:
+            metrics.finish_book(epub_id)
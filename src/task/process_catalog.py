@@ -0,0 +1,403 @@
+import multiprocessing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from src.agent.librarian import Analyzer
+from src.agent.librarian_model import BookMetadata, ContentInformation
+from src.agent.packed_librarian import PackedLibrarian
+from src.task.book_model import BookResult, ParsedBook
+from src.task.job_ledger import (
+    ANALYZED_STAGE,
+    MERGED_STAGE,
+    PARSED_STAGE,
+    BookFingerprints,
+    JobLedger,
+    fingerprint_file,
+    fingerprint_value,
+)
+from src.task.process_book import build_book_metadata, reduce_book_content
+from src.tool.content_reducer import estimate_tokens
+from src.tool.dedup import DedupIndex, fingerprint_content
+from src.tool.epub import TIKA_BACKEND, connect_tika_servers, extract_epub_data, get_epub_id, get_tika_servers
+from src.tool.publisher_store import PublisherMetadataStore
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+PARSE_STAGE = "parse"
+ANALYZE_STAGE = "analyze"
+PACK_STAGE = "pack"
+MERGE_STAGE = "merge"
+
+
+def parse_book(epub_file_path: str, epub_backend: str, token_budget: int | None, fingerprint: bool = False) -> ParsedBook:
+    """
+    Parses an EPUB file and reduces its content to the token budget.
+
+    Args:
+        epub_file_path: The path to the EPUB file.
+        epub_backend: The EPUB parser to use, "tika" or "native".
+        token_budget: The maximum number of content tokens, or None to keep the whole content.
+        fingerprint: Whether to fingerprint the whole content for deduplication, before it is reduced.
+
+    Returns:
+        A ParsedBook object with the EPUB metadata, the content, the number of tokens saved and the fingerprint.
+    """
+    epub_metadata, epub_content, epub_id = extract_epub_data(file_path=epub_file_path, backend=epub_backend)
+    if not epub_content:
+        raise ValueError("No content extracted from EPUB file")
+    content_fingerprint = None
+    if fingerprint:
+        with metrics.time_stage("fingerprint"):
+            content_fingerprint = fingerprint_content(epub_content)
+    if token_budget is None:
+        return ParsedBook(
+            epub_id=epub_id, epub_metadata=epub_metadata, epub_content=epub_content, fingerprint=content_fingerprint
+        )
+    reduced = reduce_book_content(epub_id=epub_id, epub_content=epub_content, token_budget=token_budget)
+    return ParsedBook(
+        epub_id=epub_id,
+        epub_metadata=epub_metadata,
+        epub_content=reduced.content,
+        saved_tokens=reduced.saved_tokens,
+        fingerprint=content_fingerprint,
+    )
+
+
+def parse_book_with_metrics(
+    epub_file_path: str, epub_backend: str, token_budget: int | None, record_metrics: bool, fingerprint: bool = False
+) -> tuple[ParsedBook, list]:
+    """
+    Parses a book in a worker process and returns the measurements taken, which the parent registry cannot see.
+
+    Args:
+        epub_file_path: The path to the EPUB file.
+        epub_backend: The EPUB parser to use, "tika" or "native".
+        token_budget: The maximum number of content tokens, or None to keep the whole content.
+        record_metrics: Whether to capture the measurements, i.e. whether the parent has metrics enabled.
+        fingerprint: Whether to fingerprint the content for deduplication.
+
+    Returns:
+        The ParsedBook and the captured measurements to replay in the parent.
+    """
+    if not record_metrics:
+        return parse_book(epub_file_path, epub_backend, token_budget, fingerprint), []
+    with metrics.capture() as observations:
+        parsed = parse_book(epub_file_path, epub_backend, token_budget, fingerprint)
+    return parsed, observations
+
+
+def create_parse_pool(parse_workers: int, parse_processes: bool = False) -> Executor:
+    """
+    Creates the executor of the EPUB parse stage.
+
+    Args:
+        parse_workers: The number of concurrent EPUB parses.
+        parse_processes: Whether to parse in worker processes, which lets CPU-bound parsing with the native
+            backend use every core instead of contending for the GIL with the model calls.
+
+    Returns:
+        A process pool started with "spawn", connected to the Tika servers of this process if any, or a thread pool.
+    """
+    if parse_processes:
+        mp_context = multiprocessing.get_context("spawn")
+        tika_servers = get_tika_servers()
+        if tika_servers is None:
+            return ProcessPoolExecutor(max_workers=parse_workers, mp_context=mp_context)
+        return ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=mp_context,
+            initializer=connect_tika_servers,
+            initargs=(tika_servers.endpoints,),
+        )
+    return ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="parse")
+
+
+def process_catalog(
+    librarian_agent: Analyzer,
+    epub_file_paths: Iterable[str],
+    publisher_store: PublisherMetadataStore,
+    parse_workers: int = 4,
+    model_workers: int = 4,
+    epub_backend: str = TIKA_BACKEND,
+    token_budget: int | None = None,
+    ledger: JobLedger | None = None,
+    parse_processes: bool = False,
+    incremental: bool = False,
+    packer: PackedLibrarian | None = None,
+    dedup: DedupIndex | None = None,
+) -> Iterator[BookResult]:
+    """
+    Processes a catalog of books, yielding a BookResult as soon as each book finishes.
+
+    EPUB parsing runs in a bounded worker pool and the librarian agent calls run with bounded
+    concurrency, so parsing of later books overlaps with the analysis of earlier ones. At most
+    parse_workers + 2 * model_workers books are in flight at once, which keeps memory bounded for
+    arbitrarily large catalogs. A failure while processing one book is reported in its BookResult
+    and does not stop the run.
+
+    With a ledger, every completed stage is recorded with its artifact. Books merged by a previous run
+    are returned from the ledger, and partially processed books resume from their last completed stage.
+    In incremental mode the ledger also keeps fingerprints of each book's EPUB file, publisher row and
+    analysis configuration, and only the stages affected by a change run again: a changed publisher row
+    is merged again with the stored analysis, while a changed file or configuration is analyzed again.
+
+    With a packer, short books are collected into packs of up to packer.max_pack_tokens and each pack is
+    analyzed in one request. A pack is sent once it is full, or as soon as no parse could add to it.
+
+    With a dedup index, each book's content is fingerprinted while parsing, and a book whose content is
+    the same or nearly the same as an edition seen earlier in the run reuses that edition's analysis
+    instead of a model call. A duplicate found while its edition is still being analyzed waits for it.
+    Each edition is still merged with its own EPUB and publisher metadata.
+
+    Args:
+        librarian_agent: The agent used to analyze book content, shared across the whole run.
+        epub_file_paths: The paths to the EPUB files; consumed lazily.
+        publisher_store: The indexed publisher metadata store, shared across the whole run.
+        parse_workers: The number of concurrent EPUB parses.
+        model_workers: The number of concurrent librarian agent calls.
+        epub_backend: The EPUB parser to use, "tika" or "native".
+        token_budget: The maximum number of content tokens sent per book, or None to send the whole content.
+        ledger: An optional job ledger to checkpoint progress in and resume from.
+        parse_processes: Whether to parse EPUBs in worker processes instead of threads.
+        incremental: Whether to redo the stages whose inputs changed since the ledger recorded them.
+        packer: An optional packed librarian to analyze short books several per request.
+        dedup: An optional index of the editions analyzed in this run, to reuse their analyses for duplicates.
+
+    Returns:
+        An iterator of BookResult objects in completion order.
+
+    Raises:
+        ValueError: If incremental is set without a ledger.
+    """
+    if incremental and ledger is None:
+        raise ValueError("Incremental processing requires a ledger")
+    logger = get_logger(__name__)
+    config_fingerprint = ""
+    if incremental:
+        config_fingerprint = fingerprint_value(
+            {
+                "analysis": librarian_agent.config_fingerprint(),
+                "epub_backend": epub_backend,
+                "token_budget": token_budget,
+            }
+        )
+    pending_paths = iter(epub_file_paths)
+    max_in_flight = parse_workers + 2 * model_workers
+    in_flight: dict[Future, tuple[str, str]] = {}
+    analyses: dict[Future, ParsedBook] = {}
+    packs: dict[Future, list[tuple[str, ParsedBook]]] = {}
+    pack: dict[str, tuple[str, ParsedBook]] = {}
+    duplicates: dict[str, list[tuple[str, ParsedBook]]] = {}
+    canonical_analyses: dict[str, ContentInformation] = {}
+    ready: list[BookResult] = []
+
+    def books_in_flight() -> int:
+        waiting = sum(len(members) for members in duplicates.values())
+        return len(in_flight) + sum(len(members) - 1 for members in packs.values()) + len(pack) + waiting + len(ready)
+
+    def failed(epub_file_path: str, stage: str, error: Exception) -> BookResult:
+        logger.error(f"Failed to process {epub_file_path} during {stage}: {error}")
+        epub_id = get_epub_id(epub_file_path)
+        metrics.finish_book(epub_id, error=f"{stage}: {error}")
+        return BookResult(epub_file_path=epub_file_path, epub_id=epub_id, error=f"{stage}: {error}")
+
+    def merge(
+        epub_file_path: str, parsed: ParsedBook, content_information: ContentInformation, duplicate_of: str | None = None
+    ) -> BookResult:
+        with metrics.book_scope(parsed.epub_id):
+            book_metadata = build_book_metadata(
+                epub_id=parsed.epub_id,
+                epub_metadata=parsed.epub_metadata,
+                publisher_metadata=publisher_store,
+                content_information=content_information,
+            )
+        if ledger is not None:
+            ledger.record(parsed.epub_id, MERGED_STAGE, book_metadata.model_dump_json())
+        metrics.finish_book(parsed.epub_id)
+        return BookResult(
+            epub_file_path=epub_file_path,
+            epub_id=parsed.epub_id,
+            book_metadata=book_metadata,
+            saved_tokens=parsed.saved_tokens,
+            duplicate_of=duplicate_of,
+        )
+
+    with (
+        create_parse_pool(parse_workers, parse_processes) as parse_pool,
+        ThreadPoolExecutor(max_workers=model_workers, thread_name_prefix="model") as model_pool,
+    ):
+
+        def submit_pack():
+            members = list(pack.values())
+            pack.clear()
+            books = {parsed.epub_id: parsed.epub_content for _, parsed in members}
+            analysis = model_pool.submit(packer.extract_packed, books)
+            in_flight[analysis] = (PACK_STAGE, "")
+            packs[analysis] = members
+
+        def analyze(epub_file_path: str, parsed: ParsedBook):
+            if dedup is not None and parsed.fingerprint is not None:
+                canonical_id = dedup.find(parsed.fingerprint)
+                if canonical_id is None:
+                    dedup.add(parsed.epub_id, parsed.fingerprint)
+                elif canonical_id in canonical_analyses:
+                    analyzed(epub_file_path, parsed, canonical_analyses[canonical_id], duplicate_of=canonical_id)
+                    return
+                else:
+                    duplicates.setdefault(canonical_id, []).append((epub_file_path, parsed))
+                    return
+            if packer is not None and packer.is_packable(parsed.epub_content):
+                pack_tokens = sum(estimate_tokens(member.epub_content) for _, member in pack.values())
+                pack_tokens += estimate_tokens(parsed.epub_content)
+                if pack and (parsed.epub_id in pack or pack_tokens > packer.max_pack_tokens):
+                    submit_pack()
+                pack[parsed.epub_id] = (epub_file_path, parsed)
+                return
+            extract_information = metrics.bind(parsed.epub_id, librarian_agent.extract_information)
+            analysis = model_pool.submit(extract_information, epub_content=parsed.epub_content)
+            in_flight[analysis] = (ANALYZE_STAGE, epub_file_path)
+            analyses[analysis] = parsed
+
+        def invalidate(epub_file_path: str, ledger: JobLedger):
+            epub_id = get_epub_id(epub_file_path)
+            fingerprints = BookFingerprints(
+                content=fingerprint_file(epub_file_path),
+                publisher=fingerprint_value(publisher_store.get(epub_id)),
+                config=config_fingerprint,
+            )
+            stages = ledger.invalidate(epub_id, fingerprints)
+            if stages:
+                logger.info(f"Inputs of {epub_file_path} changed, redoing {', '.join(stages)}")
+
+        def resume(epub_file_path: str) -> bool:
+            completed = ledger.completed_stages(get_epub_id(epub_file_path)) if ledger is not None else {}
+            if MERGED_STAGE in completed:
+                book_metadata = BookMetadata.model_validate_json(completed[MERGED_STAGE])
+                ready.append(
+                    BookResult(epub_file_path=epub_file_path, epub_id=book_metadata.epub_id, book_metadata=book_metadata)
+                )
+                return True
+            if PARSED_STAGE not in completed:
+                return False
+            parsed = ParsedBook.model_validate_json(completed[PARSED_STAGE])
+            if ANALYZED_STAGE in completed:
+                content_information = ContentInformation.model_validate_json(completed[ANALYZED_STAGE])
+                ready.append(merge(epub_file_path, parsed, content_information))
+            else:
+                analyze(epub_file_path, parsed)
+            return True
+
+        def analyzed(
+            epub_file_path: str,
+            parsed: ParsedBook,
+            content_information: ContentInformation | Exception,
+            duplicate_of: str | None = None,
+        ):
+            if dedup is not None and duplicate_of is None:
+                resolve_duplicates(dedup, parsed.epub_id, content_information)
+            try:
+                if isinstance(content_information, Exception):
+                    raise content_information
+                if ledger is not None:
+                    ledger.record(parsed.epub_id, ANALYZED_STAGE, content_information.model_dump_json())
+            except Exception as e:
+                ready.append(failed(epub_file_path, ANALYZE_STAGE, e))
+                return
+            try:
+                ready.append(merge(epub_file_path, parsed, content_information, duplicate_of))
+            except Exception as e:
+                ready.append(failed(epub_file_path, MERGE_STAGE, e))
+
+        def resolve_duplicates(index: DedupIndex, canonical_id: str, content_information: ContentInformation | Exception):
+            waiting = duplicates.pop(canonical_id, [])
+            if isinstance(content_information, Exception):
+                # Let the next edition become canonical and be analyzed, the others wait for it.
+                index.remove(canonical_id)
+                for epub_file_path, parsed in waiting:
+                    analyze(epub_file_path, parsed)
+                return
+            canonical_analyses[canonical_id] = content_information
+            for epub_file_path, parsed in waiting:
+                logger.info(f"Reusing the analysis of {canonical_id} for its edition {parsed.epub_id}")
+                analyzed(epub_file_path, parsed, content_information, duplicate_of=canonical_id)
+
+        def submit_parses():
+            while books_in_flight() < max_in_flight:
+                epub_file_path = next(pending_paths, None)
+                if epub_file_path is None:
+                    return
+                if incremental and ledger is not None:
+                    try:
+                        invalidate(epub_file_path, ledger)
+                    except Exception as e:
+                        ready.append(failed(epub_file_path, PARSE_STAGE, e))
+                        continue
+                try:
+                    if resume(epub_file_path):
+                        continue
+                except Exception as e:
+                    ready.append(failed(epub_file_path, MERGE_STAGE, e))
+                    continue
+                if parse_processes:
+                    parse = parse_pool.submit(
+                        parse_book_with_metrics,
+                        epub_file_path,
+                        epub_backend,
+                        token_budget,
+                        metrics.enabled,
+                        dedup is not None,
+                    )
+                else:
+                    parse = parse_pool.submit(
+                        metrics.bind(get_epub_id(epub_file_path), parse_book),
+                        epub_file_path,
+                        epub_backend,
+                        token_budget,
+                        dedup is not None,
+                    )
+                in_flight[parse] = (PARSE_STAGE, epub_file_path)
+
+        def schedule():
+            submit_parses()
+            # Nothing else can join the open pack once no parse is running, so send it rather than wait.
+            if pack and all(stage != PARSE_STAGE for stage, _ in in_flight.values()):
+                submit_pack()
+
+        schedule()
+        while in_flight or ready:
+            yield from ready
+            ready.clear()
+            if not in_flight:
+                schedule()
+                continue
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, epub_file_path = in_flight.pop(future)
+                if stage == PACK_STAGE:
+                    members = packs.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        results = {parsed.epub_id: e for _, parsed in members}
+                    for member_path, member in members:
+                        analyzed(member_path, member, results[member.epub_id])
+                    continue
+                if stage == ANALYZE_STAGE:
+                    try:
+                        content_information = future.result()
+                    except Exception as e:
+                        content_information = e
+                    analyzed(epub_file_path, analyses.pop(future), content_information)
+                    continue
+                try:
+                    parsed = future.result()
+                    if parse_processes:
+                        parsed, observations = parsed
+                        metrics.replay(observations, book=parsed.epub_id)
+                    if ledger is not None:
+                        ledger.record(parsed.epub_id, PARSED_STAGE, parsed.model_dump_json())
+                except Exception as e:
+                    ready.append(failed(epub_file_path, stage, e))
+                    continue
+                analyze(epub_file_path, parsed)
+            schedule()
@@ -0,0 +1,142 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+from src.agent.librarian import Analyzer
+from src.task.book_model import BookResult
+from src.task.process_book import process_book
+from src.task.work_queue import Lease, WorkQueue
+from src.tool.epub import TIKA_BACKEND
+from src.tool.publisher_store import PublisherMetadataStore
+from src.utils.logger import get_logger
+
+
+class WorkerStats(BaseModel):
+    claimed: int = 0
+    completed: int = 0
+    failed: int = 0
+    lost_leases: int = 0
+
+
+def default_worker_id() -> str:
+    """Identifies this worker process by its host name and process id."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseHeartbeat:
+    def __init__(self, queue: WorkQueue, lease: Lease, interval_seconds: float):
+        """
+        Initializes the LeaseHeartbeat, which renews a lease in the background while its book is processed.
+
+        Args:
+            queue: The queue holding the lease.
+            lease: The lease to renew.
+            interval_seconds: The time between renewals, well below the lease duration.
+        """
+        self.queue = queue
+        self.lease = lease
+        self.interval_seconds = interval_seconds
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{lease.epub_id}", daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            try:
+                renewed = self.queue.heartbeat(self.lease)
+            except Exception as e:
+                # A busy database is retried on the next beat, the lease outlives a few missed ones.
+                get_logger(__name__).warning(f"Heartbeat of {self.lease.epub_id} failed: {e}")
+                continue
+            if not renewed:
+                self.lost = True
+                get_logger(__name__).warning(f"Lost the lease on {self.lease.epub_id}, another worker claimed it.")
+                return
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def process_queue(
+    queue: WorkQueue,
+    librarian_agent: Analyzer,
+    publisher_store: PublisherMetadataStore,
+    worker_id: str | None = None,
+    workers: int = 1,
+    epub_backend: str = TIKA_BACKEND,
+    token_budget: int | None = None,
+    heartbeat_seconds: float | None = None,
+    poll_seconds: float = 1.0,
+) -> WorkerStats:
+    """
+    Processes books claimed from a shared queue until every queued book is done or failed.
+
+    Each of the worker threads claims one book at a time with a lease, renews it with heartbeats while
+    the book is processed and stores the result in the queue. Several machines can run this against
+    the same queue. While other workers still hold leases, the threads keep polling, so the books of a
+    worker that stopped are picked up once their leases expire.
+
+    Args:
+        queue: The shared work queue.
+        librarian_agent: The agent analyzing the books, shared by the worker threads.
+        publisher_store: The indexed publisher metadata store.
+        worker_id: The identifier of this worker, defaults to the host name and process id.
+        workers: The number of books processed concurrently.
+        epub_backend: The EPUB parser to use, "tika" or "native".
+        token_budget: The maximum number of content tokens per book, or None to send the full content.
+        heartbeat_seconds: The time between lease renewals, defaults to a third of the lease duration.
+        poll_seconds: The time to wait before claiming again when no book is claimable.
+
+    Returns:
+        The WorkerStats of this worker.
+    """
+    worker_id = worker_id or default_worker_id()
+    heartbeat_seconds = heartbeat_seconds if heartbeat_seconds is not None else queue.lease_seconds / 3
+    stats = WorkerStats()
+    lock = threading.Lock()
+
+    def work(thread_worker_id: str):
+        while True:
+            lease = queue.claim(thread_worker_id)
+            if lease is None:
+                if queue.is_finished():
+                    return
+                time.sleep(poll_seconds)
+                continue
+            with lock:
+                stats.claimed += 1
+            with LeaseHeartbeat(queue, lease, heartbeat_seconds) as heartbeat:
+                try:
+                    book_metadata = process_book(
+                        librarian_agent=librarian_agent,
+                        epub_file_path=lease.epub_file_path,
+                        publisher_store=publisher_store,
+                        epub_backend=epub_backend,
+                        token_budget=token_budget,
+                    )
+                    result = BookResult(
+                        epub_file_path=lease.epub_file_path, epub_id=lease.epub_id, book_metadata=book_metadata
+                    )
+                except Exception as e:
+                    get_logger(__name__).warning(f"Attempt {lease.attempt} of {lease.epub_id} failed: {e}")
+                    result = BookResult(epub_file_path=lease.epub_file_path, epub_id=lease.epub_id, error=f"process: {e}")
+            stored = queue.complete(lease, result) if result.error is None else queue.fail(lease, result)
+            with lock:
+                stats.lost_leases += heartbeat.lost
+                if stored and result.error is None:
+                    stats.completed += 1
+                elif stored and lease.attempt >= queue.max_attempts:
+                    stats.failed += 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="queue-worker") as pool:
+        futures = [pool.submit(work, f"{worker_id}/{index}") for index in range(workers)]
+        for future in futures:
+            future.result()
+    return stats
@@ -0,0 +1,318 @@
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from pydantic import BaseModel
+from src.task.book_model import BookResult
+from src.tool.epub import get_epub_id
+
+PENDING_STATUS = "pending"
+LEASED_STATUS = "leased"
+DONE_STATUS = "done"
+FAILED_STATUS = "failed"
+TASK_STATUSES = (PENDING_STATUS, LEASED_STATUS, DONE_STATUS, FAILED_STATUS)
+
+
+class Lease(BaseModel):
+    epub_id: str
+    epub_file_path: str
+    worker_id: str
+    token: str
+    attempt: int
+    expires_at: float
+
+
+class QueueStats(BaseModel):
+    claims: int = 0
+    reassigned: int = 0
+    completed: int = 0
+    retried: int = 0
+    failed: int = 0
+    duplicates: int = 0
+
+
+class WorkQueue:
+    def __init__(self, path: str, lease_seconds: float = 300.0, max_attempts: int = 3, timeout_seconds: float = 30.0):
+        """
+        Initializes the WorkQueue, a SQLite lease queue of books shared by workers on one or more machines.
+
+        A worker claims a book with a lease that expires unless the worker renews it with heartbeats, so
+        the books of a worker that crashed or was stopped are claimed again by the others once their lease
+        expires. Results are stored once per epub_id, and a book finished by a worker whose lease was
+        reassigned is not written twice. The database uses a rollback journal rather than WAL, so it can
+        live on a local disk shared by processes or on a network file system whose file locks work across
+        machines, e.g. NFSv4 with locking enabled.
+
+        Args:
+            path: The path to the SQLite queue file, created if missing.
+            lease_seconds: How long a claim is valid without a heartbeat.
+            max_attempts: The number of claims after which a failing book is recorded as failed.
+            timeout_seconds: How long to wait for another worker's transaction to finish.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.stats = QueueStats()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout_seconds, isolation_level=None, check_same_thread=False)
+        # WAL needs shared memory between the processes of one host, the rollback journal works across machines.
+        self._connection.execute("PRAGMA journal_mode=DELETE")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                epub_id TEXT PRIMARY KEY,
+                epub_file_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                lease_token TEXT,
+                lease_expires_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_claimable ON tasks (status, lease_expires_at)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                epub_id TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                worker_id TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _transaction(self, statements):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same book.
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+    def enqueue(self, epub_file_paths: Iterable[str]) -> int:
+        """
+        Adds books to the queue, skipping books that are already queued or finished.
+
+        Args:
+            epub_file_paths: The paths to the EPUB files, readable by every worker.
+
+        Returns:
+            The number of books added.
+        """
+        now = time.time()
+        rows = [(get_epub_id(path), path, PENDING_STATUS, now) for path in epub_file_paths]
+        return self._transaction(
+            lambda connection: connection.executemany(
+                "INSERT OR IGNORE INTO tasks (epub_id, epub_file_path, status, updated_at) VALUES (?, ?, ?, ?)", rows
+            ).rowcount
+        )
+
+    def claim(self, worker_id: str) -> Lease | None:
+        """
+        Claims the next pending book, or a book whose lease expired.
+
+        A book whose lease expired on its last attempt, e.g. because it crashes every worker that claims it,
+        is recorded as failed instead of being claimed again.
+
+        Args:
+            worker_id: The identifier of the claiming worker.
+
+        Returns:
+            The lease on the book, or None if no book can be claimed right now.
+        """
+
+        def claim_next(connection: sqlite3.Connection) -> tuple[Lease | None, bool, int]:
+            now = time.time()
+            expired = 0
+            while True:
+                row = connection.execute(
+                    """
+                    SELECT epub_id, epub_file_path, status, attempts FROM tasks
+                    WHERE status = ? OR (status = ? AND lease_expires_at < ?)
+                    ORDER BY status = ? DESC, updated_at LIMIT 1
+                    """,
+                    (PENDING_STATUS, LEASED_STATUS, now, PENDING_STATUS),
+                ).fetchone()
+                if row is None:
+                    return None, False, expired
+                epub_id, epub_file_path, status, attempts = row
+                if status != LEASED_STATUS or attempts < self.max_attempts:
+                    break
+                error = f"process: lease expired after {attempts} attempts"
+                result = BookResult(epub_file_path=epub_file_path, epub_id=epub_id, error=error)
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (epub_id, result.model_dump_json(), worker_id, now),
+                )
+                connection.execute(
+                    """
+                    UPDATE tasks SET status = ?, worker_id = NULL, lease_token = NULL, lease_expires_at = NULL,
+                    error = ?, updated_at = ? WHERE epub_id = ?
+                    """,
+                    (FAILED_STATUS, error, now, epub_id),
+                )
+                expired += 1
+            lease = Lease(
+                epub_id=epub_id,
+                epub_file_path=epub_file_path,
+                worker_id=worker_id,
+                token=uuid.uuid4().hex,
+                attempt=attempts + 1,
+                expires_at=now + self.lease_seconds,
+            )
+            connection.execute(
+                """
+                UPDATE tasks SET status = ?, worker_id = ?, lease_token = ?, lease_expires_at = ?, attempts = ?,
+                updated_at = ? WHERE epub_id = ?
+                """,
+                (LEASED_STATUS, worker_id, lease.token, lease.expires_at, lease.attempt, now, epub_id),
+            )
+            return lease, status == LEASED_STATUS, expired
+
+        lease, reassigned, expired = self._transaction(claim_next)
+        with self._lock:
+            self.stats.failed += expired
+            if lease is not None:
+                self.stats.claims += 1
+                self.stats.reassigned += reassigned
+        return lease
+
+    def heartbeat(self, lease: Lease) -> bool:
+        """
+        Extends a lease.
+
+        Args:
+            lease: The lease to extend.
+
+        Returns:
+            False if the lease expired and the book was claimed by another worker or finished.
+        """
+        expires_at = time.time() + self.lease_seconds
+        renewed = self._transaction(
+            lambda connection: connection.execute(
+                "UPDATE tasks SET lease_expires_at = ? WHERE epub_id = ? AND lease_token = ? AND status = ?",
+                (expires_at, lease.epub_id, lease.token, LEASED_STATUS),
+            ).rowcount
+        )
+        if renewed:
+            lease.expires_at = expires_at
+        return bool(renewed)
+
+    def _finish(
+        self, lease: Lease, status: str, result: BookResult | None, error: str | None = None, allow_stale: bool = False
+    ) -> bool:
+        def finish(connection: sqlite3.Connection) -> bool:
+            now = time.time()
+            row = connection.execute(
+                "SELECT status, lease_token, lease_expires_at FROM tasks WHERE epub_id = ?", (lease.epub_id,)
+            ).fetchone()
+            # Another worker already finished the book after this lease expired, keep its result.
+            if row is None or row[0] in (DONE_STATUS, FAILED_STATUS):
+                return False
+            task_status, lease_token, lease_expires_at = row
+            if lease_token != lease.token:
+                # The lease was reassigned. Only a finished book is kept, and only while no other worker holds a live lease.
+                live = task_status == LEASED_STATUS and lease_expires_at is not None and lease_expires_at >= now
+                if not allow_stale or live:
+                    return False
+            if result is not None:
+                connection.execute(
+                    """
+                    INSERT INTO results VALUES (?, ?, ?, ?) ON CONFLICT(epub_id) DO UPDATE SET
+                    result = excluded.result, worker_id = excluded.worker_id, updated_at = excluded.updated_at
+                    """,
+                    (lease.epub_id, result.model_dump_json(), lease.worker_id, now),
+                )
+            connection.execute(
+                """
+                UPDATE tasks SET status = ?, worker_id = NULL, lease_token = NULL, lease_expires_at = NULL, error = ?,
+                updated_at = ? WHERE epub_id = ?
+                """,
+                (status, error, now, lease.epub_id),
+            )
+            return True
+
+        return self._transaction(finish)
+
+    def complete(self, lease: Lease, result: BookResult) -> bool:
+        """
+        Stores the result of a book and marks it done.
+
+        A worker whose lease expired still stores its result when no other worker holds a live lease on the book.
+
+        Args:
+            lease: The lease on the book.
+            result: The result of the book.
+
+        Returns:
+            False if another worker already finished the book or holds a live lease on it.
+        """
+        completed = self._finish(lease, DONE_STATUS, result, allow_stale=True)
+        with self._lock:
+            if completed:
+                self.stats.completed += 1
+            else:
+                self.stats.duplicates += 1
+        return completed
+
+    def fail(self, lease: Lease, result: BookResult) -> bool:
+        """
+        Returns a failed book to the queue, or records its failed result once it used up its attempts.
+
+        Args:
+            lease: The lease on the book.
+            result: The result of the book, with its error.
+
+        Returns:
+            False if the lease expired and the book was claimed by another worker or finished, leaving it untouched.
+        """
+        if lease.attempt < self.max_attempts:
+            retried = self._finish(lease, PENDING_STATUS, None, error=result.error)
+            with self._lock:
+                self.stats.retried += retried
+            return retried
+        failed = self._finish(lease, FAILED_STATUS, result, error=result.error)
+        with self._lock:
+            self.stats.failed += failed
+        return failed
+
+    def counts(self) -> dict[str, int]:
+        """
+        Counts the books in each status.
+
+        Returns:
+            The number of books by status, including statuses without books.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return {status: 0 for status in TASK_STATUSES} | dict(rows)
+
+    def is_finished(self) -> bool:
+        """Checks whether every queued book is done or failed."""
+        counts = self.counts()
+        return counts[PENDING_STATUS] == 0 and counts[LEASED_STATUS] == 0
+
+    def results(self) -> Iterator[BookResult]:
+        """
+        Reads the stored results, one per book, ordered by epub_id.
+
+        Returns:
+            An iterator of BookResult objects.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT result FROM results ORDER BY epub_id").fetchall()
+        for (result,) in rows:
+            yield BookResult.model_validate_json(result)
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,40 @@
+import glob
+import os
+from src.utils.logger import log_execution_time
+
+EPUB_EXTENSION = ".epub"
+
+
+@log_execution_time
+def discover_epub_files(source: str) -> list[str]:
+    """
+    Resolves a catalog source into a list of EPUB file paths.
+
+    Args:
+        source: A directory (searched recursively), a glob pattern, a single EPUB file,
+            or a manifest file listing one EPUB path per line. Blank lines and lines
+            starting with "#" are ignored in manifests, and relative paths are resolved
+            against the manifest's directory.
+
+    Returns:
+        A list of EPUB file paths, sorted for directories and globs and in file order for manifests.
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", f"*{EPUB_EXTENSION}")
+        return sorted(glob.glob(pattern, recursive=True))
+
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source, recursive=True) if path.endswith(EPUB_EXTENSION))
+
+    if source.endswith(EPUB_EXTENSION):
+        return [source]
+
+    manifest_dir = os.path.dirname(source)
+    with open(source, mode="r", encoding="utf-8") as file:
+        paths = []
+        for line in file:
+            path = line.strip()
+            if not path or path.startswith("#"):
+                continue
+            paths.append(path if os.path.isabs(path) else os.path.join(manifest_dir, path))
+        return paths
@@ -0,0 +1,181 @@
+import math
+import re
+from pydantic import BaseModel
+
+CHARS_PER_TOKEN = 4
+CHUNK_SEPARATOR = "\n\n[...]\n\n"
+OPENING_SHARE = 0.25
+ENDING_SHARE = 0.15
+SAMPLE_TOKENS = 1500
+
+GUTENBERG_START = re.compile(r"^\*{3}\s*START OF (THE|THIS) PROJECT GUTENBERG E-?BOOK.*$", re.IGNORECASE | re.MULTILINE)
+GUTENBERG_END = re.compile(
+    r"^(\*{3}\s*END OF (THE|THIS) PROJECT GUTENBERG E-?BOOK|End of (the )?Project Gutenberg'?s?).*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+FRONT_MATTER_LINE = re.compile(
+    r"^(produced by|e-?text prepared by|transcriber'?s note|this ebook is for the use of anyone)", re.IGNORECASE
+)
+CONTENTS_HEADING = re.compile(r"^(table of )?contents\.?$", re.IGNORECASE)
+CONTENTS_ENTRY_MAX_CHARS = 100
+CONTENTS_MAX_ENTRIES = 100
+# Stripping that keeps less than this share of the text between the Gutenberg markers misread the book.
+MIN_STRIPPED_SHARE = 0.5
+
+
+class ReducedContent(BaseModel):
+    content: str
+    original_tokens: int
+    reduced_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.reduced_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of model tokens of a text, using the common four characters per token heuristic.
+
+    Args:
+        text: The text to estimate.
+
+    Returns:
+        The estimated number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def strip_gutenberg(content: str) -> str:
+    """
+    Removes the Project Gutenberg header and license text around the book.
+
+    Args:
+        content: The book content.
+
+    Returns:
+        The text between the Gutenberg start and end markers, or the whole content without them.
+    """
+    start = GUTENBERG_START.search(content)
+    if start:
+        content = content[start.end() :]
+    end = GUTENBERG_END.search(content)
+    if end:
+        content = content[: end.start()]
+    return content
+
+
+def strip_boilerplate(content: str) -> str:
+    """
+    Removes Project Gutenberg headers and license text, production credits and the table of contents.
+
+    Args:
+        content: The book content.
+
+    Returns:
+        The book content without boilerplate, or only without the Gutenberg header and license when
+        stripping the rest would remove most of the book.
+    """
+    content = strip_gutenberg(content)
+
+    lines = []
+    in_contents = False
+    contents_entries = 0
+    for line in content.splitlines():
+        stripped = line.strip()
+        if CONTENTS_HEADING.match(stripped):
+            in_contents, contents_entries = True, 0
+            continue
+        if in_contents:
+            # The table of contents is one block of short entries, ended by the blank line after it, a long
+            # paragraph, or more entries than a table of contents has.
+            if not stripped:
+                in_contents = contents_entries == 0
+                continue
+            if len(stripped) < CONTENTS_ENTRY_MAX_CHARS and contents_entries < CONTENTS_MAX_ENTRIES:
+                contents_entries += 1
+                continue
+            in_contents = False
+        if FRONT_MATTER_LINE.match(stripped):
+            continue
+        lines.append(line)
+    body = content.strip()
+    stripped_content = "\n".join(lines).strip()
+    # Short-line text such as poetry can be mistaken for a table of contents, never drop most of the book.
+    if len(stripped_content) < len(body) * MIN_STRIPPED_SHARE:
+        return body
+    return stripped_content
+
+
+def _take_paragraphs(content: str, start: int, max_chars: int, min_start: int = 0) -> tuple[str, int]:
+    """Takes whole paragraphs from start onward, up to max_chars, and returns them with their end offset."""
+    paragraph_start = content.rfind("\n", 0, start) + 1
+    # Text with few line breaks has paragraphs longer than a sample, cut into those at start instead.
+    if paragraph_start < max(start - max_chars, min_start):
+        paragraph_start = max(start, min_start)
+    end = paragraph_start + max_chars
+    if end >= len(content):
+        return content[paragraph_start:], len(content)
+    paragraph_end = content.rfind("\n", paragraph_start, end)
+    if paragraph_end <= paragraph_start:
+        paragraph_end = end
+    return content[paragraph_start:paragraph_end], paragraph_end
+
+
+def select_chunks(content: str, token_budget: int) -> str:
+    """
+    Selects representative chunks of the content that fit the token budget.
+
+    The selection keeps the opening of the book, evenly spaced samples from the middle, and the ending,
+    each aligned to paragraph boundaries.
+
+    Args:
+        content: The book content.
+        token_budget: The maximum number of tokens of the selected content.
+
+    Returns:
+        The selected chunks joined by an elision marker, or the whole content when it already fits.
+    """
+    if estimate_tokens(content) <= token_budget:
+        return content
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    opening_chars = int(budget_chars * OPENING_SHARE)
+    ending_chars = int(budget_chars * ENDING_SHARE)
+    sample_count = max((budget_chars - opening_chars - ending_chars) // (SAMPLE_TOKENS * CHARS_PER_TOKEN), 1)
+    separators_chars = (sample_count + 1) * len(CHUNK_SEPARATOR)
+    sample_chars = max((budget_chars - opening_chars - ending_chars - separators_chars) // sample_count, 0)
+
+    opening, opening_end = _take_paragraphs(content, 0, opening_chars)
+    ending_start = len(content) - ending_chars
+    ending_paragraph = content.find("\n", ending_start)
+    ending = content[ending_paragraph + 1 if ending_paragraph != -1 else ending_start :]
+
+    chunks = [opening]
+    middle_start = opening_end
+    middle_length = max(len(content) - len(ending) - middle_start, 0)
+    previous_end = opening_end
+    for index in range(sample_count):
+        offset = middle_start + middle_length * (2 * index + 1) // (2 * sample_count)
+        sample, previous_end = _take_paragraphs(content, offset, sample_chars, min_start=previous_end)
+        if sample.strip():
+            chunks.append(sample)
+    chunks.append(ending)
+    return CHUNK_SEPARATOR.join(chunk.strip() for chunk in chunks if chunk.strip())
+
+
+def reduce_content(content: str, token_budget: int) -> ReducedContent:
+    """
+    Strips boilerplate from the content and samples it down to the token budget.
+
+    Args:
+        content: The book content.
+        token_budget: The maximum number of tokens of the reduced content.
+
+    Returns:
+        A ReducedContent object with the reduced content and the token counts before and after.
+    """
+    reduced = select_chunks(strip_boilerplate(content), token_budget)
+    return ReducedContent(
+        content=reduced, original_tokens=estimate_tokens(content), reduced_tokens=estimate_tokens(reduced)
+    )
@@ -1,31 +1,176 @@
 import csv
+from array import array
+from collections.abc import Collection, Iterable, Iterator
+from typing import NamedTuple
 from src.utils.logger import log_execution_time
 
+PUBLISHER_FIELDS = ("title", "author", "publishing_year")
 
-@log_execution_time
-def read_publisher_metadata(file_path: str, separator: str = ",") -> dict:
+FIELD_SEPARATOR = "\x1f"
+FIELD_SEPARATOR_BYTE = ord(FIELD_SEPARATOR)
+EMPTY_SLOT = -1
+MIN_SLOTS = 8
+
+
+class PublisherRow(NamedTuple):
+    epub_id: str
+    title: str
+    author: str
+    publishing_year: str
+
+    def as_metadata(self) -> dict:
+        """Returns the row in the dictionary layout of read_publisher_metadata."""
+        return {"title": self.title, "author": self.author, "publishing_year": self.publishing_year}
+
+
+def iter_publisher_metadata(
+    file_path: str, separator: str = ",", epub_ids: Collection[str] | None = None
+) -> Iterator[PublisherRow]:
     """
-    Reads publisher metadata from a CSV file.
+    Streams the publisher metadata rows of a CSV file without holding more than one row in memory.
 
     Args:
         file_path: The path to the CSV file.
         separator: The delimiter used in the CSV file.
+        epub_ids: Only yield the rows of these EPUB identifiers, e.g. the books of the current batch.
 
     Returns:
-        A dictionary containing the publisher metadata.
+        An iterator of PublisherRow objects in file order.
     """
-    with open(file_path, mode="r", encoding="utf-8") as file:
+    wanted = set(epub_ids) if epub_ids is not None else None
+    with open(file_path, mode="r", encoding="utf-8", newline="") as file:
         reader = csv.reader(file, delimiter=separator)
 
         # Skip header
         next(reader, None)
 
-        metadata = {}
-
         for rows in reader:
-            metadata[rows[0]] = {
-                "title": rows[1],
-                "author": rows[2],
-                "publishing_year": rows[3],
-            }
-        return metadata
+            if wanted is None or rows[0] in wanted:
+                yield PublisherRow(rows[0], rows[1], rows[2], rows[3])
+
+
+@log_execution_time
+def read_publisher_metadata(file_path: str, separator: str = ",", epub_ids: Collection[str] | None = None) -> dict:
+    """
+    Reads publisher metadata from a CSV file.
+
+    Args:
+        file_path: The path to the CSV file.
+        separator: The delimiter used in the CSV file.
+        epub_ids: Only read the rows of these EPUB identifiers, the whole file is read when None.
+
+    Returns:
+        A dictionary containing the publisher metadata.
+    """
+    return {row.epub_id: row.as_metadata() for row in iter_publisher_metadata(file_path, separator, epub_ids)}
+
+
+class CompactPublisherMetadata:
+    def __init__(self, rows: Iterable[PublisherRow] = ()):
+        """
+        Initializes the CompactPublisherMetadata, a memory-efficient in-memory index of the publisher metadata.
+
+        Rows are packed into a single UTF-8 buffer with an array of row offsets, and epub_ids are located
+        through an open-addressing hash table of row numbers. A row costs a few dozen bytes instead of the
+        several hundred a dict of dicts takes, and lookups return the same dictionaries as
+        read_publisher_metadata. A later row with the same epub_id replaces the earlier one. The pipeline
+        itself reads one book's row from the stream, or looks rows up in the SQLite PublisherMetadataStore,
+        so this index is for callers that need the whole feed in memory.
+
+        Args:
+            rows: The rows to index, e.g. from iter_publisher_metadata.
+        """
+        self._data = bytearray()
+        self._offsets = array("Q", [0])
+        self._hashes = array("q")
+        self._slots = array("i", [EMPTY_SLOT]) * MIN_SLOTS
+        self._count = 0
+        for row in rows:
+            self.add(row)
+
+    @classmethod
+    @log_execution_time
+    def from_file(
+        cls, file_path: str, separator: str = ",", epub_ids: Collection[str] | None = None
+    ) -> "CompactPublisherMetadata":
+        """
+        Streams a publisher metadata CSV file into a compact index.
+
+        Args:
+            file_path: The path to the CSV file.
+            separator: The delimiter used in the CSV file.
+            epub_ids: Only index the rows of these EPUB identifiers, the whole file is indexed when None.
+
+        Returns:
+            The compact index.
+        """
+        return cls(iter_publisher_metadata(file_path, separator, epub_ids))
+
+    def _row_key(self, row: int) -> bytes:
+        start = self._offsets[row]
+        return bytes(self._data[start : self._data.index(FIELD_SEPARATOR_BYTE, start)])
+
+    def _find_slot(self, slots: array, key: bytes, key_hash: int) -> int:
+        mask = len(slots) - 1
+        slot = key_hash & mask
+        while True:
+            row = slots[slot]
+            # Compare the stored hashes first, so keys are only sliced out of the buffer on a likely match.
+            if row == EMPTY_SLOT or (self._hashes[row] == key_hash and self._row_key(row) == key):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        slots = array("i", [EMPTY_SLOT]) * (len(self._slots) * 2)
+        mask = len(slots) - 1
+        for row in self._slots:
+            if row != EMPTY_SLOT:
+                slot = self._hashes[row] & mask
+                while slots[slot] != EMPTY_SLOT:
+                    slot = (slot + 1) & mask
+                slots[slot] = row
+        self._slots = slots
+
+    def add(self, row: PublisherRow):
+        """
+        Adds a row to the index.
+
+        Args:
+            row: The publisher metadata row.
+        """
+        key = row.epub_id.encode("utf-8")
+        key_hash = hash(key)
+        slot = self._find_slot(self._slots, key, key_hash)
+        if self._slots[slot] == EMPTY_SLOT:
+            self._count += 1
+        self._data += FIELD_SEPARATOR.join(row).encode("utf-8")
+        self._offsets.append(len(self._data))
+        self._hashes.append(key_hash)
+        self._slots[slot] = len(self._hashes) - 1
+        # Keep the table at most half full so probe sequences stay short.
+        if self._count * 2 > len(self._slots):
+            self._grow()
+
+    def get(self, epub_id: str, default: dict | None = None) -> dict | None:
+        """
+        Looks up the publisher metadata of a book.
+
+        Args:
+            epub_id: The EPUB identifier.
+            default: The value returned when the book is not in the feed.
+
+        Returns:
+            A dictionary with the title, author and publishing_year of the book, or default.
+        """
+        key = epub_id.encode("utf-8")
+        row = self._slots[self._find_slot(self._slots, key, hash(key))]
+        if row == EMPTY_SLOT:
+            return default
+        fields = self._data[self._offsets[row] : self._offsets[row + 1]].decode("utf-8").split(FIELD_SEPARATOR)
+        return dict(zip(PUBLISHER_FIELDS, fields[1:]))
+
+    def __contains__(self, epub_id: str) -> bool:
+        return self.get(epub_id) is not None
+
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,203 @@
+import hashlib
+import re
+import threading
+from pydantic import BaseModel
+from src.tool.content_reducer import strip_gutenberg
+
+WORD = re.compile(r"\w+")
+SHINGLE_WORDS = 5
+SIGNATURE_SIZE = 128
+LSH_BANDS = 16
+HASH_BITS = 64
+EMPTY_BIN = 2**HASH_BITS - 1
+# Shorter texts, e.g. a title page around an unreadable body, share too much boilerplate to be told apart.
+MIN_WORDS = 50
+
+
+class ContentFingerprint(BaseModel):
+    exact: str
+    signature: list[int]
+
+
+class DedupStats(BaseModel):
+    books: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+
+
+def normalize_text(content: str) -> list[str]:
+    """
+    Normalizes a book's text for comparison across editions.
+
+    Project Gutenberg headers and licenses are stripped, and the remaining text is reduced to casefolded
+    words, so differences in markup, punctuation and line wrapping are ignored. The table of contents is
+    kept, since telling it from short-line text such as poetry is a guess a fingerprint must not depend on.
+
+    Args:
+        content: The book content.
+
+    Returns:
+        The words of the content, in reading order.
+    """
+    return WORD.findall(strip_gutenberg(content).casefold())
+
+
+def _hash(value: str) -> int:
+    # Unlike hash(), stable across processes and runs, so fingerprints from worker processes and the ledger agree.
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=HASH_BITS // 8).digest(), "big")
+
+
+def minhash_signature(words: list[str], shingle_words: int = SHINGLE_WORDS, size: int = SIGNATURE_SIZE) -> list[int]:
+    """
+    Computes a MinHash signature of the word shingles with one permutation hashing.
+
+    Each shingle is hashed once and the hash both selects one of size bins and competes for that bin's
+    minimum, which costs one hash per shingle instead of one per shingle and permutation. Empty bins, only
+    possible for very short texts, borrow the minimum of the next non-empty bin, so two signatures agree in
+    a position with probability equal to the Jaccard similarity of the shingle sets.
+
+    Args:
+        words: The normalized words.
+        shingle_words: The number of consecutive words per shingle.
+        size: The number of signature positions.
+
+    Returns:
+        The signature, one integer per position.
+    """
+    signature = [EMPTY_BIN] * size
+    shingles = {" ".join(words[index : index + shingle_words]) for index in range(max(len(words) - shingle_words + 1, 1))}
+    for shingle in shingles:
+        shingle_hash = _hash(shingle)
+        position, value = shingle_hash % size, shingle_hash // size
+        if value < signature[position]:
+            signature[position] = value
+    filled = {position for position, value in enumerate(signature) if value != EMPTY_BIN}
+    if filled and len(filled) < size:
+        for position in range(size):
+            if signature[position] == EMPTY_BIN:
+                offset = next((offset for offset in range(1, size) if (position + offset) % size in filled), 0)
+                signature[position] = signature[(position + offset) % size] + offset
+    return signature
+
+
+def fingerprint_content(content: str, min_words: int = MIN_WORDS) -> ContentFingerprint | None:
+    """
+    Fingerprints a book's content with an exact hash and a MinHash signature of its normalized text.
+
+    Args:
+        content: The book content, as returned by extract_epub_data.
+        min_words: The minimum number of normalized words worth fingerprinting.
+
+    Returns:
+        The ContentFingerprint of the content, or None if the content is too short to be deduplicated.
+    """
+    words = normalize_text(content)
+    if len(words) < min_words:
+        return None
+    exact = hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+    return ContentFingerprint(exact=exact, signature=minhash_signature(words))
+
+
+def estimate_similarity(first: list[int], second: list[int]) -> float:
+    """
+    Estimates the Jaccard similarity of two texts from their signatures.
+
+    Args:
+        first: The signature of the first text.
+        second: The signature of the second text.
+
+    Returns:
+        The share of signature positions that agree, range 0 - 1.
+    """
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class DedupIndex:
+    def __init__(self, threshold: float = 0.8, bands: int = LSH_BANDS):
+        """
+        Initializes the DedupIndex, which finds earlier editions of a book by their content fingerprints.
+
+        Exact duplicates are found by the hash of the normalized text. Near duplicates, e.g. an illustrated
+        edition or a publisher reissue, are found with locality-sensitive hashing: the signature is cut into
+        bands, books sharing any band are candidates, and a candidate matches when the similarity estimated
+        from the whole signatures reaches the threshold. Lookups cost a few dictionary probes, however many
+        books are indexed.
+
+        Args:
+            threshold: The minimum estimated Jaccard similarity of near duplicates, range 0 - 1.
+            bands: The number of LSH bands, which must divide the signature size. More bands find less
+                similar candidates.
+        """
+        self.threshold = threshold
+        self.bands = bands
+        self.stats = DedupStats()
+        self._lock = threading.Lock()
+        self._exact: dict[str, str] = {}
+        self._signatures: dict[str, list[int]] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[str]] = {}
+
+    def _band_keys(self, signature: list[int]) -> list[tuple[int, tuple[int, ...]]]:
+        rows = len(signature) // self.bands
+        return [(band, tuple(signature[band * rows : (band + 1) * rows])) for band in range(self.bands)]
+
+    def find(self, fingerprint: ContentFingerprint) -> str | None:
+        """
+        Looks up an indexed edition with the same or nearly the same content.
+
+        Args:
+            fingerprint: The fingerprint of the book.
+
+        Returns:
+            The epub_id of the exact duplicate, or else of the most similar near duplicate, or None.
+        """
+        with self._lock:
+            epub_id = self._exact.get(fingerprint.exact)
+            if epub_id is not None:
+                self.stats.exact_duplicates += 1
+                return epub_id
+            candidates = {
+                candidate for key in self._band_keys(fingerprint.signature) for candidate in self._buckets.get(key, ())
+            }
+            best, best_similarity = None, self.threshold
+            for candidate in sorted(candidates):
+                similarity = estimate_similarity(fingerprint.signature, self._signatures[candidate])
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is not None:
+                self.stats.near_duplicates += 1
+            return best
+
+    def add(self, epub_id: str, fingerprint: ContentFingerprint):
+        """
+        Indexes a book as the canonical edition of its content.
+
+        Args:
+            epub_id: The EPUB identifier.
+            fingerprint: The fingerprint of the book.
+        """
+        with self._lock:
+            self._exact.setdefault(fingerprint.exact, epub_id)
+            self._signatures[epub_id] = fingerprint.signature
+            for key in self._band_keys(fingerprint.signature):
+                self._buckets.setdefault(key, []).append(epub_id)
+            self.stats.books += 1
+
+    def remove(self, epub_id: str):
+        """
+        Forgets a book, e.g. a canonical edition whose analysis failed.
+
+        Args:
+            epub_id: The EPUB identifier.
+        """
+        with self._lock:
+            signature = self._signatures.pop(epub_id, None)
+            if signature is None:
+                return
+            self._exact = {exact: indexed for exact, indexed in self._exact.items() if indexed != epub_id}
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key, [])
+                if epub_id in bucket:
+                    bucket.remove(epub_id)
+                if not bucket:
+                    self._buckets.pop(key, None)
+            self.stats.books -= 1
@@ -1,24 +1,198 @@
-from tika import parser
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+from src.tool.epub_reader import EpubReader
 from src.utils.logger import log_execution_time, get_logger
+from src.utils.metrics import metrics
+
+TIKA_BACKEND = "tika"
+NATIVE_BACKEND = "native"
+EPUB_BACKENDS = (TIKA_BACKEND, NATIVE_BACKEND)
+CHAPTER_SEPARATOR = "\n\n"
+# Strings are hashed, measured and sent in slices of this many characters instead of being copied whole.
+CONTENT_CHUNK_CHARS = 1 << 20
+
+if TYPE_CHECKING:
+    from src.tool.tika_server import TikaServerPool
+
+_tika_servers: "TikaServerPool | None" = None
+
+
+def get_epub_id(file_path: str) -> str:
+    """
+    Derives the EPUB identifier from the file name, e.g. "dataset/pg74.epub" -> "pg74".
+
+    Args:
+        file_path: The path to the EPUB file.
+
+    Returns:
+        The EPUB identifier.
+    """
+    return file_path.split("/")[-1].replace(".epub", "")
+
+
+def use_tika_servers(tika_servers: "TikaServerPool | None"):
+    """
+    Routes the "tika" backend through a started server pool, or back to tika-python's implicit server when None.
+
+    Args:
+        tika_servers: The started TikaServerPool, or None.
+    """
+    global _tika_servers
+    _tika_servers = tika_servers
+
+
+def get_tika_servers() -> "TikaServerPool | None":
+    """Returns the server pool the "tika" backend uses, if any."""
+    return _tika_servers
+
+
+def connect_tika_servers(endpoints: list[str]):
+    """
+    Connects the "tika" backend of this process to already running servers, e.g. in a parse worker process.
+
+    Args:
+        endpoints: The URLs of the servers.
+    """
+    from src.tool.tika_server import TikaServerPool
+
+    use_tika_servers(TikaServerPool(endpoints=endpoints).start())
+
+
+def _read_with_tika_backend(file_path: str) -> dict:
+    if _tika_servers is not None:
+        return _tika_servers.parse(file_path)
+    # tika-python is only loaded when the tika backend is used without a server pool.
+    from tika import parser
+
+    return parser.from_file(file_path)
+
+
+class EpubContent:
+    def __init__(self, file_path: str):
+        """
+        Initializes the EpubContent, the text of an EPUB that is read from its zip archive on demand.
+
+        Nothing is held in memory until the content is iterated or read, and iterating it holds one
+        chapter at a time, so a book waiting for the model costs no more than its path. The text is
+        the same as the native backend's content.
+
+        Args:
+            file_path: The path to the EPUB file.
+        """
+        self.file_path = file_path
+
+    def iter_parts(self) -> Iterator[str]:
+        """
+        Yields the chapters and the separators between them, reading one chapter document at a time.
+
+        Returns:
+            An iterator of text parts that join to the book content.
+        """
+        with EpubReader(self.file_path) as reader:
+            for index, chapter in enumerate(reader.iter_chapters()):
+                if index:
+                    yield CHAPTER_SEPARATOR
+                yield chapter
+
+    def read(self) -> str:
+        """
+        Reads the whole content into one string, without any intermediate copies of the book.
+
+        Returns:
+            The book content.
+        """
+        with metrics.time_stage("epub_parse"):
+            content = "".join(self.iter_parts())
+        _observe_content_size(content)
+        return content
+
+    def __str__(self) -> str:
+        return self.read()
+
+    def __repr__(self) -> str:
+        return f"EpubContent({self.file_path!r})"
+
+
+def iter_content_parts(content: "str | EpubContent") -> Iterator[str]:
+    """
+    Yields the content in parts, the chapters of an EpubContent or slices of a string.
+
+    Args:
+        content: The book content.
+
+    Returns:
+        An iterator of text parts that join to the content.
+    """
+    if isinstance(content, EpubContent):
+        yield from content.iter_parts()
+        return
+    for start in range(0, len(content), CONTENT_CHUNK_CHARS):
+        yield content[start:start + CONTENT_CHUNK_CHARS]
+
+
+def utf8_length(content: "str | EpubContent") -> int:
+    """
+    Counts the UTF-8 bytes of the content without encoding it as a whole.
+
+    Args:
+        content: The book content.
+
+    Returns:
+        The number of bytes.
+    """
+    return sum(len(part) if part.isascii() else len(part.encode("utf-8")) for part in iter_content_parts(content))
+
+
+def _observe_content_size(content: str):
+    if metrics.enabled and content:
+        metrics.observe("content_chars", len(content))
+        metrics.observe("content_bytes", utf8_length(content))
+
+
+def _read_with_native_backend(file_path: str) -> dict:
+    with EpubReader(file_path) as reader:
+        return {"metadata": reader.metadata, "content": CHAPTER_SEPARATOR.join(reader.iter_chapters())}
+
+
+def _read_lazily_with_native_backend(file_path: str) -> dict:
+    with EpubReader(file_path) as reader:
+        return {"metadata": reader.metadata, "content": EpubContent(file_path)}
 
 
 @log_execution_time
-def extract_epub_data(file_path: str) -> tuple[dict, str, str]:
+def extract_epub_data(
+    file_path: str, backend: str = TIKA_BACKEND, lazy: bool = False
+) -> tuple[dict, "str | EpubContent", str]:
     """
     Extracts metadata and content from an EPUB file.
 
     Args:
         file_path: The path to the EPUB file.
+        backend: The parser to use, "tika" for Apache Tika or "native" for the pure-Python EpubReader.
+        lazy: Whether the native backend returns an EpubContent, read from the file when it is used,
+            instead of the text. Tika always returns the text.
 
     Returns:
-        A tuple containing the EPUB metadata (dict) and content (str).
+        A tuple containing the EPUB metadata (dict), content (str or EpubContent) and EPUB identifier (str).
     """
+    if backend not in EPUB_BACKENDS:
+        raise ValueError(f"Unknown EPUB backend {backend!r}, expected one of {EPUB_BACKENDS}")
 
-    epub_id = file_path.split("/")[-1].replace(".epub", "")
-    try:
-        epub_data = parser.from_file(file_path)
-    except Exception as e:
-        logger = get_logger(__name__)
-        logger.info(f"Failed to parse EPUB file: {e}")
-        epub_data = {}
-    return epub_data.get("metadata", {}), epub_data.get("content", ""), epub_id
+    epub_id = get_epub_id(file_path)
+    with metrics.time_stage("epub_parse"):
+        try:
+            if backend == TIKA_BACKEND:
+                epub_data = _read_with_tika_backend(file_path)
+            elif lazy:
+                epub_data = _read_lazily_with_native_backend(file_path)
+            else:
+                epub_data = _read_with_native_backend(file_path)
+        except Exception as e:
+            logger = get_logger(__name__)
+            logger.info(f"Failed to parse EPUB file: {e}")
+            epub_data = {}
+    # Popped so that the parser's dictionary does not keep another reference to the text.
+    content = epub_data.pop("content", None) or ""
+    if isinstance(content, str):
+        _observe_content_size(content)
+    return epub_data.get("metadata", {}), content, epub_id
@@ -0,0 +1,145 @@
+import posixpath
+import zipfile
+from urllib.parse import unquote
+from collections.abc import Iterator
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+CONTAINER_PATH = "META-INF/container.xml"
+NAMESPACES = {
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf",
+    "dc": "http://purl.org/dc/elements/1.1/",
+}
+DOCUMENT_MEDIA_TYPES = {"application/xhtml+xml", "text/html"}
+BLOCK_TAGS = {"p", "div", "br", "h1", "h2", "h3", "h4", "h5", "h6", "li", "tr", "blockquote", "section", "pre", "hr"}
+SKIPPED_TAGS = {"head", "script", "style"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            # Line breaks in the markup are not meaningful, only block elements start a new line.
+            self.parts.append(data.replace("\r", " ").replace("\n", " "))
+
+
+def html_to_text(html: str) -> str:
+    """
+    Converts an XHTML document to plain text, keeping one paragraph per line.
+
+    Args:
+        html: The XHTML document.
+
+    Returns:
+        The text content of the document.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = (" ".join(line.split()) for line in "".join(extractor.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class EpubReader:
+    def __init__(self, file_path: str):
+        """
+        Initializes the EpubReader, a pure-Python EPUB reader that needs neither Java nor a Tika server.
+
+        Only the container and OPF package documents are read up front, chapter documents are read from
+        the zip archive on demand.
+
+        Args:
+            file_path: The path to the EPUB file.
+        """
+        self.file_path = file_path
+        self._archive = zipfile.ZipFile(file_path)
+        try:
+            container = ElementTree.fromstring(self._archive.read(CONTAINER_PATH))
+            rootfile = container.find("container:rootfiles/container:rootfile", NAMESPACES)
+            if rootfile is None:
+                raise ValueError(f"No rootfile declared in {CONTAINER_PATH}")
+            opf_path = rootfile.attrib["full-path"]
+            package = ElementTree.fromstring(self._archive.read(opf_path))
+        except BaseException:
+            self._archive.close()
+            raise
+
+        self.metadata = self._read_metadata(package)
+        self.spine = self._read_spine(package, base_dir=posixpath.dirname(opf_path))
+
+    @staticmethod
+    def _read_metadata(package: ElementTree.Element) -> dict:
+        metadata: dict[str, str] = {}
+        element = package.find("opf:metadata", NAMESPACES)
+        if element is None:
+            return metadata
+        for child in element:
+            namespace, _, name = child.tag.rpartition("}")
+            if namespace.lstrip("{") != NAMESPACES["dc"] or not child.text or not child.text.strip():
+                continue
+            key = f"dc:{name}"
+            value = " ".join(child.text.split())
+            # Multi-valued fields such as several creators are joined, like Tika does for display.
+            metadata[key] = f"{metadata[key]}, {value}" if key in metadata else value
+        return metadata
+
+    @staticmethod
+    def _read_spine(package: ElementTree.Element, base_dir: str) -> list[str]:
+        manifest = {
+            item.attrib["id"]: item.attrib
+            for item in package.iterfind("opf:manifest/opf:item", NAMESPACES)
+            if "id" in item.attrib and "href" in item.attrib
+        }
+        spine = []
+        for itemref in package.iterfind("opf:spine/opf:itemref", NAMESPACES):
+            item = manifest.get(itemref.attrib.get("idref", ""))
+            if item is None or item.get("media-type") not in DOCUMENT_MEDIA_TYPES:
+                continue
+            spine.append(posixpath.normpath(posixpath.join(base_dir, unquote(item["href"].split("#")[0]))))
+        return spine
+
+    def iter_chapters(self) -> Iterator[str]:
+        """
+        Yields the text of each chapter document lazily, in spine order.
+
+        Returns:
+            An iterator of chapter texts, skipping documents without any text.
+        """
+        for path in self.spine:
+            try:
+                html = self._archive.read(path).decode("utf-8", errors="replace")
+            except KeyError:
+                continue
+            text = html_to_text(html)
+            if text:
+                yield text
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self) -> "EpubReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
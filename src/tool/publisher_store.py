@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+from src.tool.csv_parser import PUBLISHER_FIELDS, iter_publisher_metadata
+from src.utils.logger import get_logger, log_execution_time
+
+
+class PublisherMetadataStore:
+    def __init__(self, file_path: str, separator: str = "\t", index_path: str | None = None):
+        """
+        Initializes the PublisherMetadataStore, a persistent SQLite index of the publisher metadata keyed by epub_id.
+
+        The index is rebuilt only when the CSV file's size or modification time changes, so repeated runs
+        against the same feed pay for parsing it once and each lookup is a single B-tree search.
+
+        Args:
+            file_path: The path to the publisher metadata CSV file.
+            separator: The delimiter used in the CSV file.
+            index_path: The path to the SQLite index file, defaults to the CSV path with a ".sqlite" suffix.
+        """
+        self.file_path = file_path
+        self.separator = separator
+        self.index_path = index_path or f"{file_path}.sqlite"
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.index_path, check_same_thread=False, isolation_level=None)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS index_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS publisher_metadata (
+                epub_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                author TEXT NOT NULL,
+                publishing_year TEXT NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self._refresh()
+
+    def _source_fingerprint(self) -> str:
+        stat = os.stat(self.file_path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}:{self.separator}"
+
+    def _stored_fingerprint(self) -> str | None:
+        row = self._connection.execute("SELECT value FROM index_state WHERE key = 'fingerprint'").fetchone()
+        return row[0] if row else None
+
+    def _refresh(self):
+        fingerprint = self._source_fingerprint()
+        if self._stored_fingerprint() == fingerprint:
+            return
+        with self._lock:
+            # Take the write lock before re-checking so concurrent processes rebuild the index only once.
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self._stored_fingerprint() != fingerprint:
+                    self._rebuild(fingerprint)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    @log_execution_time
+    def _rebuild(self, fingerprint: str):
+        get_logger(__name__).info(f"Rebuilding publisher metadata index {self.index_path} from {self.file_path}")
+        self._connection.execute("DELETE FROM publisher_metadata")
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO publisher_metadata VALUES (?, ?, ?, ?)",
+            iter_publisher_metadata(self.file_path, self.separator),
+        )
+        self._connection.execute("INSERT OR REPLACE INTO index_state VALUES ('fingerprint', ?)", (fingerprint,))
+
+    def get(self, epub_id: str, default: dict | None = None) -> dict | None:
+        """
+        Looks up the publisher metadata of a book.
+
+        Args:
+            epub_id: The EPUB identifier.
+            default: The value returned when the book is not in the feed.
+
+        Returns:
+            A dictionary with the title, author and publishing_year of the book, or default.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT title, author, publishing_year FROM publisher_metadata WHERE epub_id = ?", (epub_id,)
+            ).fetchone()
+        return dict(zip(PUBLISHER_FIELDS, row)) if row else default
+
+    def __contains__(self, epub_id: str) -> bool:
+        return self.get(epub_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM publisher_metadata").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,212 @@
+import itertools
+import os
+import subprocess
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from src.utils.logger import get_logger
+
+TIKA_RMETA_SERVICE = "/rmeta/text"
+TIKA_VERSION_SERVICE = "/version"
+TIKA_CONTENT_KEY = "X-TIKA:content"
+
+
+class TikaServerError(Exception):
+    pass
+
+
+def rmeta_to_epub_data(documents: list[dict]) -> dict:
+    """
+    Combines the documents of a Tika /rmeta response like tika-python's parser.from_file does.
+
+    Args:
+        documents: The container document followed by its embedded documents.
+
+    Returns:
+        A dictionary with the joined "content" and the "metadata", where keys repeated across documents
+        collect their values in a list.
+    """
+    content = "".join(document.get(TIKA_CONTENT_KEY) or "" for document in documents)
+    metadata: dict = {}
+    for document in documents:
+        for key, value in document.items():
+            if key == TIKA_CONTENT_KEY:
+                continue
+            if key not in metadata:
+                metadata[key] = value
+            elif isinstance(metadata[key], list):
+                metadata[key].append(value)
+            else:
+                metadata[key] = [metadata[key], value]
+    return {"metadata": metadata, "content": content or None}
+
+
+class TikaServerPool:
+    def __init__(
+        self,
+        jar_path: str | None = None,
+        instances: int = 1,
+        host: str = "127.0.0.1",
+        base_port: int = 9998,
+        endpoints: list[str] | None = None,
+        java_path: str = "java",
+        startup_timeout_seconds: float = 120.0,
+        request_timeout_seconds: float = 300.0,
+        max_connections: int = 8,
+    ):
+        """
+        Initializes the TikaServerPool, which owns the Tika servers used by the "tika" EPUB backend.
+
+        The servers are started once, health-checked, and shared by every parse of the run, instead of
+        relying on tika-python to spawn a server on first use. Each server has a pooled HTTP session, files
+        are streamed to it rather than read into memory, and parses are spread round-robin across the
+        servers, so parse throughput grows with the number of instances.
+
+        Args:
+            jar_path: The tika-server-standard jar to start, or None to only connect to the given endpoints.
+            instances: The number of servers to start, on consecutive ports from base_port.
+            host: The interface the started servers listen on.
+            base_port: The port of the first started server.
+            endpoints: The URLs of already running servers to use in addition to the started ones.
+            java_path: The java executable used to start the servers.
+            startup_timeout_seconds: How long to wait for each server to become healthy.
+            request_timeout_seconds: The timeout of a single parse request.
+            max_connections: The number of pooled connections kept open to each server.
+        """
+        self.jar_path = jar_path
+        self.instances = instances
+        self.host = host
+        self.base_port = base_port
+        self.java_path = java_path
+        self.startup_timeout_seconds = startup_timeout_seconds
+        self.request_timeout_seconds = request_timeout_seconds
+        self.max_connections = max_connections
+        self.endpoints = [endpoint.rstrip("/") for endpoint in endpoints or []]
+        self._processes: list[subprocess.Popen] = []
+        self._sessions: list[requests.Session] = []
+        self._next_index = itertools.count()
+        self._lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def is_healthy(self, endpoint: str) -> bool:
+        """
+        Checks whether a Tika server answers.
+
+        Args:
+            endpoint: The server URL.
+
+        Returns:
+            True if the server answered its version endpoint.
+        """
+        try:
+            response = requests.get(f"{endpoint}{TIKA_VERSION_SERVICE}", timeout=5)
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def _wait_until_healthy(self, endpoint: str, process: subprocess.Popen | None):
+        deadline = time.monotonic() + self.startup_timeout_seconds
+        while not self.is_healthy(endpoint):
+            if process is not None and process.poll() is not None:
+                raise TikaServerError(f"Tika server for {endpoint} exited with status {process.returncode}")
+            if time.monotonic() > deadline:
+                raise TikaServerError(f"Tika server {endpoint} not healthy after {self.startup_timeout_seconds} seconds")
+            time.sleep(0.2)
+
+    def start(self) -> "TikaServerPool":
+        """
+        Starts the configured servers and waits until every server, started or given, is healthy.
+
+        Returns:
+            The pool itself.
+
+        Raises:
+            TikaServerError: If a server exits or does not become healthy in time, after stopping the others.
+        """
+        logger = get_logger(__name__)
+        try:
+            for endpoint in self.endpoints:
+                self._wait_until_healthy(endpoint, None)
+            if self.jar_path is not None:
+                started = []
+                # Every JVM is launched before any is waited on, so the servers start up concurrently.
+                for index in range(self.instances):
+                    port = self.base_port + index
+                    endpoint = f"http://{self.host}:{port}"
+                    logger.info(f"Starting Tika server {endpoint} from {self.jar_path}")
+                    process = subprocess.Popen(
+                        [self.java_path, "-jar", self.jar_path, "--host", self.host, "--port", str(port)],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+                    self._processes.append(process)
+                    started.append((endpoint, process))
+                for endpoint, process in started:
+                    self._wait_until_healthy(endpoint, process)
+                    self.endpoints.append(endpoint)
+        except BaseException:
+            self.close()
+            raise
+        if not self.endpoints:
+            raise TikaServerError("No Tika server to use, provide a jar_path or endpoints")
+        self._sessions = [self._session() for _ in self.endpoints]
+        return self
+
+    def parse(self, file_path: str) -> dict:
+        """
+        Parses a file on the next server in round-robin order, streaming the file in the request body.
+
+        Args:
+            file_path: The path to the file.
+
+        Returns:
+            A dictionary with the "metadata" and "content" of the file, as parser.from_file returns.
+
+        Raises:
+            TikaServerError: If the pool was not started or the server rejected the file.
+        """
+        if not self._sessions:
+            raise TikaServerError("The Tika server pool is not started")
+        with self._lock:
+            index = next(self._next_index) % len(self._sessions)
+        with open(file_path, mode="rb") as file:
+            response = self._sessions[index].put(
+                f"{self.endpoints[index]}{TIKA_RMETA_SERVICE}",
+                data=file,
+                headers={
+                    "Accept": "application/json",
+                    "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}",
+                },
+                timeout=self.request_timeout_seconds,
+            )
+        if response.status_code != 200:
+            raise TikaServerError(f"Tika server {self.endpoints[index]} returned status {response.status_code}")
+        return rmeta_to_epub_data(response.json())
+
+    def close(self):
+        """Closes the sessions and stops the started servers."""
+        for session in self._sessions:
+            session.close()
+        self._sessions = []
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self._processes = []
+
+    def __enter__(self) -> "TikaServerPool":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
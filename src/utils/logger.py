@@ -17,10 +17,10 @@ def log_execution_time(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         logger = get_logger(func.__module__)
-        start_time = time.time()
+        start_time = time.perf_counter()
         logger.info(f"Starting {func.__name__}...")
         result = func(*args, **kwargs)
-        end_time = time.time()
+        end_time = time.perf_counter()
         elapsed_time = end_time - start_time
         logger.info(f"Finished {func.__name__} in {elapsed_time:.4f} seconds.")
         return result
@@ -0,0 +1,243 @@
+import bisect
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS = tuple(float(4**exponent) for exponent in range(0, 15))
+STAGE_DURATION_METRIC = "stage_duration_seconds"
+METRIC_PREFIX = "epub_"
+
+_current_book: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_book", default=None)
+_captured: contextvars.ContextVar[list | None] = contextvars.ContextVar("captured", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.bucket_counts[index] += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Initializes the MetricsRegistry, which aggregates pipeline measurements into histograms.
+
+        The registry is disabled until configured, and every recording method returns immediately while
+        disabled, so instrumented code pays next to nothing when metrics are not wanted. Measurements are
+        also attributed to the book currently in scope, and each book's totals can be exported as a JSON line.
+        """
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self._books: dict[str, dict[str, float]] = {}
+        self._book_log = None
+
+    def configure(self, enabled: bool = True, book_log_path: str | None = None):
+        """
+        Enables or disables the registry.
+
+        Args:
+            enabled: Whether to record measurements.
+            book_log_path: An optional JSONL file to append one line of totals per finished book to.
+        """
+        self.close()
+        self.enabled = enabled
+        self._book_log = open(book_log_path, mode="a", encoding="utf-8") if enabled and book_log_path else None
+
+    def observe(self, name: str, value: float, labels: dict[str, str] | None = None, book: str | None = None):
+        """
+        Records a measurement.
+
+        Args:
+            name: The metric name, e.g. "prompt_tokens".
+            value: The measured value.
+            labels: Optional labels distinguishing series of the same metric.
+            book: The EPUB identifier to attribute the value to, defaults to the book in scope.
+        """
+        if not self.enabled:
+            return
+        captured = _captured.get()
+        if captured is not None:
+            captured.append((name, value, labels))
+            return
+        key = (name, tuple(sorted((labels or {}).items())))
+        book = book or _current_book.get()
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(DURATION_BUCKETS if name.endswith("_seconds") else SIZE_BUCKETS)
+                self._histograms[key] = histogram
+            histogram.observe(value)
+            if book is not None:
+                field = f"{labels['stage']}_seconds" if name == STAGE_DURATION_METRIC and labels else name
+                record = self._books.setdefault(book, {})
+                record[field] = record.get(field, 0) + value
+
+    @contextmanager
+    def time_stage(self, stage: str, book: str | None = None):
+        """
+        Measures the duration of a pipeline stage with a monotonic clock.
+
+        Args:
+            stage: The stage name, e.g. "epub_parse".
+            book: The EPUB identifier to attribute the duration to, defaults to the book in scope.
+        """
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_DURATION_METRIC, time.perf_counter() - start_time, labels={"stage": stage}, book=book)
+
+    @contextmanager
+    def book_scope(self, epub_id: str):
+        """
+        Attributes the measurements recorded in this scope to a book.
+
+        Args:
+            epub_id: The EPUB identifier.
+        """
+        token = _current_book.set(epub_id)
+        try:
+            yield
+        finally:
+            _current_book.reset(token)
+
+    def bind(self, epub_id: str, func: Callable) -> Callable:
+        """
+        Wraps a function so that it runs in the scope of a book, e.g. when submitted to a worker pool.
+
+        Args:
+            epub_id: The EPUB identifier.
+            func: The function to wrap.
+
+        Returns:
+            The wrapped function, or func itself while disabled.
+        """
+        if not self.enabled:
+            return func
+        return functools.partial(_run_in_book_scope, self, epub_id, func)
+
+    @contextmanager
+    def capture(self):
+        """
+        Collects the measurements recorded in this scope instead of aggregating them.
+
+        Meant for worker processes, whose registry is separate from the parent's: the child captures
+        its measurements and returns them with its result, and the parent replays them.
+
+        Returns:
+            A list that is filled with (name, value, labels) tuples.
+        """
+        observations: list[tuple[str, float, dict[str, str] | None]] = []
+        enabled = self.enabled
+        self.enabled = True
+        token = _captured.set(observations)
+        try:
+            yield observations
+        finally:
+            _captured.reset(token)
+            self.enabled = enabled
+
+    def replay(self, observations: list[tuple[str, float, dict[str, str] | None]], book: str | None = None):
+        """
+        Records measurements captured elsewhere, e.g. in a worker process.
+
+        Args:
+            observations: The (name, value, labels) tuples collected by capture.
+            book: The EPUB identifier to attribute the values to, defaults to the book in scope.
+        """
+        for name, value, labels in observations:
+            self.observe(name, value, labels=labels, book=book)
+
+    def finish_book(self, epub_id: str, **fields):
+        """
+        Writes the totals of a finished book as a JSON line and forgets them.
+
+        Args:
+            epub_id: The EPUB identifier.
+            **fields: Extra fields to include in the line, e.g. the error of a failed book.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            record = self._books.pop(epub_id, {})
+            if self._book_log is not None:
+                self._book_log.write(json.dumps({"epub_id": epub_id, **record, **fields}) + "\n")
+                self._book_log.flush()
+
+    def to_prometheus(self) -> str:
+        """
+        Exports every histogram in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                metric = f"{METRIC_PREFIX}{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for (series_name, labels), histogram in sorted(self._histograms.items()):
+                    if series_name != name:
+                        continue
+                    label_text = ",".join(f'{label}="{value}"' for label, value in labels)
+                    prefix = f"{label_text}," if label_text else ""
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f'{metric}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                    suffix = f"{{{label_text}}}" if label_text else ""
+                    lines.append(f"{metric}_sum{suffix} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{suffix} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def stage_totals(self) -> dict[str, float]:
+        """
+        Sums the recorded duration of each stage across all books.
+
+        Returns:
+            The total seconds spent in each stage, keyed by stage name.
+        """
+        with self._lock:
+            return {
+                dict(labels)["stage"]: histogram.sum
+                for (name, labels), histogram in self._histograms.items()
+                if name == STAGE_DURATION_METRIC
+            }
+
+    def reset(self):
+        """Forgets every recorded measurement."""
+        with self._lock:
+            self._histograms.clear()
+            self._books.clear()
+
+    def close(self):
+        if self._book_log is not None:
+            self._book_log.close()
+            self._book_log = None
+
+
+def _run_in_book_scope(registry: MetricsRegistry, epub_id: str, func: Callable, *args, **kwargs):
+    with registry.book_scope(epub_id):
+        return func(*args, **kwargs)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int | None = None, tokens_per_minute: int | None = None):
+        """
+        Initializes the RateLimiter, a pair of token buckets limiting requests and tokens per minute.
+
+        Both buckets refill continuously and start full, so short bursts up to the per-minute limits are
+        allowed. A request larger than the tokens per minute limit is let through once the bucket is full.
+
+        Args:
+            requests_per_minute: The maximum number of requests per minute, or None for no limit.
+            tokens_per_minute: The maximum number of tokens per minute, or None for no limit.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = float(requests_per_minute or 0)
+        self._token_allowance = float(tokens_per_minute or 0)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed_minutes = (now - self._updated_at) / 60
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._request_allowance = min(
+                self._request_allowance + elapsed_minutes * self.requests_per_minute, self.requests_per_minute
+            )
+        if self.tokens_per_minute:
+            self._token_allowance = min(
+                self._token_allowance + elapsed_minutes * self.tokens_per_minute, self.tokens_per_minute
+            )
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserves capacity for one request, going into debt if the buckets are empty.
+
+        Args:
+            tokens: The number of tokens of the request.
+
+        Returns:
+            The number of seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait_seconds = max(self._paused_until - now, 0.0)
+            if self.requests_per_minute:
+                self._request_allowance -= 1
+                wait_seconds = max(wait_seconds, -self._request_allowance * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # Oversized requests only wait for a full bucket instead of blocking forever.
+                self._token_allowance -= min(tokens, self.tokens_per_minute)
+                wait_seconds = max(wait_seconds, -self._token_allowance * 60 / self.tokens_per_minute)
+            return wait_seconds
+
+    def pause(self, seconds: float):
+        """
+        Holds back every request for the given time, e.g. after the server reported that the quota is exhausted.
+
+        Args:
+            seconds: The number of seconds to hold back requests.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int = 0):
+        """
+        Blocks the calling thread until the request fits the limits.
+
+        Args:
+            tokens: The number of tokens of the request.
+        """
+        wait_seconds = self.reserve(tokens)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self, tokens: int = 0):
+        """
+        Waits without blocking the event loop until the request fits the limits.
+
+        Args:
+            tokens: The number of tokens of the request.
+        """
+        wait_seconds = self.reserve(tokens)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.agent.async_librarian import AsyncLibrarianAgent
+from src.agent.librarian_model import ContentInformation
+from src.agent.result_cache import ResultCache
+from src.agent.retry import RetryPolicy
+from tests.fixtures.books import CONTENT_INFORMATION_JSON
+
+
+@patch("google.genai.Client")
+def test_async_extract_information(mock_genai_client):
+    """
+    Tests that the async agent sends the prompt and content as separate parts and validates the response.
+    """
+    # Arrange
+    mock_client = mock_genai_client.return_value
+    mock_client.aio.models.generate_content = AsyncMock(return_value=MagicMock(text=CONTENT_INFORMATION_JSON))
+    mock_client.aio.aclose = AsyncMock()
+    agent = AsyncLibrarianAgent()
+
+    # Act
+    result = asyncio.run(agent.extract_information("Some sample epub content."))
+    asyncio.run(agent.close())
+
+    # Assert
+    assert isinstance(result, ContentInformation)
+    assert result.genre == "Science Fiction"
+    _, kwargs = mock_client.aio.models.generate_content.call_args
+    assert kwargs["model"] == "gemini-2.5-flash"
+    assert "You're an expert in literature" in kwargs["contents"][0]["text"]
+    assert kwargs["contents"][1] == {"text": "Some sample epub content."}
+    assert kwargs["config"]["response_schema"] == ContentInformation
+    assert kwargs["config"]["temperature"] == 0.2
+    assert kwargs["config"]["max_output_tokens"] == 200
+    assert kwargs["config"]["top_p"] == 0.95
+    mock_client.aio.aclose.assert_awaited_once()
+    mock_client.close.assert_called_once()
+
+
+@patch("google.genai.Client")
+def test_async_extract_information_bounds_concurrency(mock_genai_client):
+    """
+    Tests that no more than max_concurrency requests are in flight at once.
+    """
+    # Arrange
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def generate_content(**kwargs):
+        nonlocal in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return MagicMock(text=CONTENT_INFORMATION_JSON)
+
+    mock_genai_client.return_value.aio.models.generate_content = generate_content
+
+    async def run():
+        agent = AsyncLibrarianAgent(max_concurrency=3)
+        return await asyncio.gather(*(agent.extract_information(f"book {index}") for index in range(20)))
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    assert len(results) == 20
+    assert peak_in_flight == 3
+
+
+@patch("google.genai.Client")
+def test_async_extract_information_uses_result_cache(mock_genai_client, tmp_path):
+    """
+    Tests that a cached result is returned without calling the model again.
+    """
+    # Arrange
+    generate_content = AsyncMock(return_value=MagicMock(text=CONTENT_INFORMATION_JSON))
+    mock_genai_client.return_value.aio.models.generate_content = generate_content
+    agent = AsyncLibrarianAgent(cache=ResultCache(str(tmp_path)))
+
+    # Act
+    first = asyncio.run(agent.extract_information("Some sample epub content."))
+    second = asyncio.run(agent.extract_information("Some sample epub content."))
+
+    # Assert
+    assert first == second
+    generate_content.assert_awaited_once()
+
+
+@patch("src.agent.retry.random.uniform", return_value=0.05)
+@patch("google.genai.Client")
+def test_async_extract_information_backs_off_without_holding_a_slot(mock_genai_client, mock_uniform):
+    """
+    Tests that a request waiting to retry releases its concurrency slot to the other requests.
+    """
+    # Arrange
+    calls = []
+
+    async def generate_content(**kwargs):
+        book = kwargs["contents"][1]["text"]
+        calls.append(book)
+        if calls.count(book) == 1 and book == "book 0":
+            raise ConnectionError("connection reset")
+        return MagicMock(text=CONTENT_INFORMATION_JSON)
+
+    mock_genai_client.return_value.aio.models.generate_content = generate_content
+
+    async def run():
+        agent = AsyncLibrarianAgent(max_concurrency=1, retry_policy=RetryPolicy(initial_backoff_seconds=0.05))
+        return await asyncio.gather(agent.extract_information("book 0"), agent.extract_information("book 1"))
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    assert len(results) == 2
+    assert calls == ["book 0", "book 1", "book 0"]
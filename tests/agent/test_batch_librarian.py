@@ -0,0 +1,115 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from src.agent.batch_librarian import BatchJobError, BatchLibrarian
+from src.agent.librarian_model import ContentInformation
+from tests.fixtures.books import CONTENT_INFORMATION_JSON
+
+
+def default_responder(key: str, request: dict) -> dict:
+    return {"response": {"candidates": [{"content": {"parts": [{"text": CONTENT_INFORMATION_JSON}], "role": "model"}}]}}
+
+
+class FakeBatchClient:
+    """A local stand-in for the Gemini files and batches endpoints."""
+
+    def __init__(self, responder=default_responder, polls_until_done: int = 1, final_state: str = "JOB_STATE_SUCCEEDED"):
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self.final_state = final_state
+        self.stored_files: dict[str, bytes] = {}
+        self.jobs: dict[str, dict] = {}
+        self.files = SimpleNamespace(upload=self._upload, download=self._download)
+        self.batches = SimpleNamespace(create=self._create, get=self._get)
+
+    def _upload(self, file, config=None):
+        name = f"files/input-{len(self.stored_files)}"
+        with open(file, "rb") as handle:
+            self.stored_files[name] = handle.read()
+        return SimpleNamespace(name=name)
+
+    def _download(self, file):
+        return self.stored_files[file]
+
+    def _create(self, model, src, config=None):
+        name = f"batches/{len(self.jobs)}"
+        output_lines = []
+        for line in self.stored_files[src].decode("utf-8").splitlines():
+            request = json.loads(line)
+            output_lines.append(json.dumps({"key": request["key"], **self.responder(request["key"], request["request"])}))
+        output_name = f"files/output-{name}"
+        self.stored_files[output_name] = "\n".join(output_lines).encode("utf-8")
+        self.jobs[name] = {"model": model, "polls": 0, "output": output_name}
+        return SimpleNamespace(name=name)
+
+    def _get(self, name):
+        job = self.jobs[name]
+        job["polls"] += 1
+        state = self.final_state if job["polls"] > self.polls_until_done else "JOB_STATE_RUNNING"
+        return SimpleNamespace(
+            name=name,
+            state=SimpleNamespace(name=state),
+            error=None,
+            dest=SimpleNamespace(file_name=job["output"]),
+        )
+
+
+def test_build_request_uses_librarian_prompt_and_schema():
+    """
+    Tests that batch requests carry the LibrarianAgent prompt, the content and the ContentInformation schema.
+    """
+    batch_librarian = BatchLibrarian(client=FakeBatchClient(), temperature=0.3, max_output_tokens=500, top_p=0.9)
+
+    request = batch_librarian.build_request("Some sample epub content.")
+
+    parts = request["contents"][0]["parts"]
+    assert "You're an expert in literature" in parts[0]["text"]
+    assert parts[1] == {"text": "Some sample epub content."}
+    assert request["generation_config"]["response_json_schema"] == ContentInformation.model_json_schema()
+    assert request["generation_config"]["temperature"] == 0.3
+    assert request["generation_config"]["max_output_tokens"] == 500
+    assert request["generation_config"]["top_p"] == 0.9
+
+
+@patch("src.agent.batch_librarian.time.sleep")
+def test_batch_round_trip(mock_sleep, tmp_path):
+    """
+    Tests writing, uploading, submitting, polling and reading a batch job against the local stub.
+    """
+    def responder(key, request):
+        if key == "bad":
+            return {"error": {"code": 400, "message": "Invalid request"}}
+        if key == "truncated":
+            return {"response": {"candidates": [{"content": {"parts": [{"text": CONTENT_INFORMATION_JSON[:50]}]}}]}}
+        return default_responder(key, request)
+
+    client = FakeBatchClient(responder=responder, polls_until_done=2)
+    batch_librarian = BatchLibrarian(client=client, poll_interval_seconds=5)
+    job_file_path = str(tmp_path / "requests.jsonl")
+
+    count = batch_librarian.write_job_file(job_file_path, [("good", "content"), ("bad", "content"), ("truncated", "x")])
+    uploaded_file_name = batch_librarian.upload(job_file_path, display_name="test")
+    job_name = batch_librarian.create_job(uploaded_file_name, display_name="test")
+    results = dict(batch_librarian.read_results(batch_librarian.wait(job_name)))
+
+    assert count == 3
+    assert client.jobs[job_name]["model"] == "gemini-2.5-flash"
+    assert mock_sleep.call_count == 2
+    assert isinstance(results["good"], ContentInformation)
+    assert isinstance(results["bad"], BatchJobError)
+    assert isinstance(results["truncated"], ValueError)
+
+
+def test_wait_raises_on_failed_job(tmp_path):
+    """
+    Tests that a failed job raises a BatchJobError.
+    """
+    client = FakeBatchClient(polls_until_done=0, final_state="JOB_STATE_EXPIRED")
+    batch_librarian = BatchLibrarian(client=client)
+    job_file_path = str(tmp_path / "requests.jsonl")
+    batch_librarian.write_job_file(job_file_path, [("good", "content")])
+    job_name = batch_librarian.create_job(batch_librarian.upload(job_file_path, display_name="test"), display_name="test")
+
+    with pytest.raises(BatchJobError, match="JOB_STATE_EXPIRED"):
+        batch_librarian.wait(job_name)
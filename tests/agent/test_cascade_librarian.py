@@ -0,0 +1,133 @@
+import pytest
+from unittest.mock import MagicMock
+from src.agent.cascade_librarian import CascadeLibrarian, meets_constraints, score_agreement, split_samples
+from src.agent.librarian_model import CharacterAndRelationships, ContentInformation, ThemeSetting
+
+BOOK = "\n".join(f"Paragraph {index} of a long novel about the sea." for index in range(2000))
+
+
+def make_info(genre: str = "Adventure", themes=("Sea", "Courage", "Loss"), names=("Ahab", "Ishmael", "Queequeg")):
+    return ContentInformation(
+        genre=genre,
+        themes=list(themes),
+        setting=ThemeSetting(time="1850s", place="The Pacific"),
+        cultural_context="Nineteenth-century whaling.",
+        narrative_tone="Brooding.",
+        author_writing_style="Digressive.",
+        characters_and_relationships=[CharacterAndRelationships(name=name, relationship="Crew") for name in names],
+    )
+
+
+def make_cascade(cheap_results: list, strong_result=None) -> CascadeLibrarian:
+    cheap_agent = MagicMock(model_name="gemini-2.5-flash-lite")
+    cheap_agent.extract_information.side_effect = cheap_results
+    strong_agent = MagicMock(model_name="gemini-2.5-flash")
+    strong_agent.extract_information.return_value = strong_result
+    return CascadeLibrarian(cheap_agent=cheap_agent, strong_agent=strong_agent, sample_tokens=1000)
+
+
+def test_split_samples_takes_one_sample_per_half():
+    """
+    Tests that the two samples come from different halves of the book and fit the sample size.
+    """
+    # Act
+    first, second = split_samples(BOOK, sample_tokens=1000)
+
+    # Assert
+    assert first.startswith("Paragraph 0 ")
+    assert int(second.split()[1]) >= 1000
+    assert len(first) <= 4000 and len(second) <= 4000
+
+
+def test_split_samples_keeps_short_line_text_after_contents():
+    """
+    Tests that both samples of poetry after a table of contents hold poems, one from each half.
+    """
+    # Arrange
+    poems = "\n".join(f"Poem {index}\nA short line of verse,\nAnd a last one." for index in range(2000))
+    book = "CONTENTS\n" + poems
+
+    # Act
+    first, second = split_samples(book, sample_tokens=1000)
+
+    # Assert
+    first_poems = [int(line.split()[1]) for line in first.splitlines() if line.startswith("Poem ")]
+    second_poems = [int(line.split()[1]) for line in second.splitlines() if line.startswith("Poem ")]
+    assert len(first) > 3000 and len(second) > 3000
+    assert max(first_poems) < min(second_poems)
+
+
+def test_meets_constraints_and_score_agreement():
+    """
+    Tests that blank fields fail the constraints and that agreement combines genre, themes and characters.
+    """
+    # Arrange
+    info = make_info()
+    blank = info.model_copy(update={"genre": " "})
+    other = make_info(genre="Tragedy", themes=("Sea", "Obsession", "Fate"), names=("Ahab", "Starbuck", "Stubb"))
+
+    # Act & Assert
+    assert meets_constraints(info)
+    assert not meets_constraints(blank)
+    assert score_agreement(info, info) == 1.0
+    assert score_agreement(info, other) == pytest.approx((0 + 1 / 5 + 1 / 5) / 3)
+
+
+def test_extract_information_answers_confident_books_with_the_cheap_model():
+    """
+    Tests that agreeing cheap samples are merged without calling the strong model.
+    """
+    # Arrange
+    cascade = make_cascade([make_info(), make_info(themes=("Sea", "Courage", "Fate"))])
+
+    # Act
+    result = cascade.extract_information(BOOK)
+
+    # Assert
+    assert result.genre == "Adventure"
+    assert result.themes[:2] == ["Sea", "Courage"]
+    cascade.strong_agent.extract_information.assert_not_called()
+    sample_lengths = [len(call.kwargs["epub_content"]) for call in cascade.cheap_agent.extract_information.call_args_list]
+    assert all(length <= 4000 for length in sample_lengths)
+    assert cascade.stats.escalations == 0
+    assert cascade.stats.cheap_calls == 2
+    assert 0 < cascade.stats.cost_per_book < 0.001
+
+
+def test_extract_information_escalates_disagreeing_and_failed_samples():
+    """
+    Tests that books whose cheap samples disagree or fail are analyzed by the strong model with the full content.
+    """
+    # Arrange
+    strong_info = make_info(genre="Epic")
+    disagreeing = [make_info(), make_info(genre="Romance", themes=("Love", "Class", "Pride"), names=("Eliza", "Darcy", "Jane"))]
+    cascade = make_cascade(disagreeing + [make_info(), ValueError("invalid output")], strong_result=strong_info)
+
+    # Act
+    first = cascade.extract_information(BOOK)
+    second = cascade.extract_information(BOOK)
+
+    # Assert
+    assert first == second == strong_info
+    assert cascade.strong_agent.extract_information.call_count == 2
+    assert cascade.strong_agent.extract_information.call_args.kwargs["epub_content"] == BOOK
+    assert cascade.stats.escalation_rate == 1.0
+    assert cascade.stats.strong_calls == 2
+    assert cascade.stats.summary()["cost_per_book"] == pytest.approx(cascade.stats.cost / 2)
+
+
+def test_extract_information_escalates_books_too_short_to_sample():
+    """
+    Tests that a book without text in both halves goes to the strong model without cheap calls.
+    """
+    # Arrange
+    strong_info = make_info(genre="Epic")
+    cascade = make_cascade([], strong_result=strong_info)
+
+    # Act
+    result = cascade.extract_information("\n\n")
+
+    # Assert
+    assert result == strong_info
+    cascade.cheap_agent.extract_information.assert_not_called()
+    assert (cascade.stats.escalations, cascade.stats.cheap_calls) == (1, 0)
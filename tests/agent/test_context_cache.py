@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from src.agent.context_cache import ContextCache
+from src.agent.librarian import CACHED_BOOK_PROMPT, LIBRARIAN_PROMPT, LibrarianAgent
+from tests.fixtures.books import CONTENT_INFORMATION_JSON
+
+
+class FakeCaches:
+    def __init__(self):
+        self.created: dict[str, dict] = {}
+        self.updates: list[str] = []
+        self.deleted: list[str] = []
+
+    def create(self, model, config):
+        name = f"cachedContents/{len(self.created)}"
+        self.created[name] = {"model": model, **config}
+        return SimpleNamespace(name=name)
+
+    def update(self, name, config):
+        if name in self.deleted:
+            raise RuntimeError(f"{name} not found")
+        self.updates.append(name)
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+def test_prefix_cache_is_created_once_and_refreshed_before_expiry():
+    """
+    Tests that the prompt is cached once per model, extended near its expiry and recreated once gone.
+    """
+    # Arrange
+    client = SimpleNamespace(caches=FakeCaches())
+    context_cache = ContextCache(client, "gemini-2.5-flash", ttl_seconds=3600, refresh_margin_seconds=300, min_tokens=10)
+    prompt = "instructions " * 50
+
+    # Act
+    with patch("src.agent.context_cache.time.time", return_value=1000.0):
+        first = context_cache.prefix_cache(prompt)
+        second = context_cache.prefix_cache(prompt)
+    with patch("src.agent.context_cache.time.time", return_value=1000.0 + 3400):
+        refreshed = context_cache.prefix_cache(prompt)
+    client.caches.delete(refreshed)
+    with patch("src.agent.context_cache.time.time", return_value=1000.0 + 3400 + 3400):
+        recreated = context_cache.prefix_cache(prompt)
+
+    # Assert
+    assert first == second == refreshed == "cachedContents/0"
+    assert client.caches.created["cachedContents/0"]["system_instruction"] == prompt
+    assert client.caches.created["cachedContents/0"]["model"] == "gemini-2.5-flash"
+    assert client.caches.updates == ["cachedContents/0"]
+    assert recreated == "cachedContents/1"
+    assert context_cache.stats.prefix_caches_created == 2
+    assert context_cache.stats.prefix_cache_refreshes == 1
+
+
+def test_short_prompts_and_failed_creates_are_not_cached():
+    """
+    Tests that contexts below the minimum size are sent in full, and so are calls whose cache could not be created.
+    """
+    # Arrange
+    client = MagicMock()
+    client.caches.create.side_effect = RuntimeError("caching unavailable")
+    context_cache = ContextCache(client, "gemini-2.5-flash", min_tokens=10)
+
+    # Act
+    short = context_cache.prefix_cache("short")
+    failed = context_cache.prefix_cache("instructions " * 50)
+
+    # Assert
+    assert short is None
+    assert failed is None
+    assert client.caches.create.call_count == 1
+    assert context_cache.stats.failures == 1
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_information_reads_retried_book_from_cache(mock_genai_client, mock_from_gemini):
+    """
+    Tests that a book re-asked after invalid output is cached once, sent only as a short prompt and then deleted.
+    """
+    # Arrange
+    fake_caches = FakeCaches()
+    mock_genai_client.return_value.caches = fake_caches
+    mock_model = MagicMock(side_effect=[CONTENT_INFORMATION_JSON[:120], CONTENT_INFORMATION_JSON])
+    mock_from_gemini.return_value = mock_model
+    agent = LibrarianAgent(context_cache=True)
+    epub_content = "A long chapter of the book. " * 2000
+
+    # Act
+    result = agent.extract_information(epub_content)
+
+    # Assert
+    assert result.genre == "Science Fiction"
+    first_call, second_call = mock_model.call_args_list
+    assert "cached_content" not in first_call.kwargs
+    assert first_call.kwargs["model_input"].messages[1]["content"] == epub_content
+    assert second_call.kwargs["model_input"] == CACHED_BOOK_PROMPT
+    assert second_call.kwargs["cached_content"] == "cachedContents/0"
+    book_cache = fake_caches.created["cachedContents/0"]
+    assert book_cache["system_instruction"] == LIBRARIAN_PROMPT
+    assert book_cache["contents"][0]["parts"][0]["text"] == epub_content
+    assert fake_caches.deleted == ["cachedContents/0"]
+    assert agent.context_cache.stats.book_caches_created == 1
+    assert agent.context_cache.stats.cached_calls == 1
+    assert agent.context_cache.stats.cached_tokens > 10_000
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_information_reads_prompt_from_prefix_cache(mock_genai_client, mock_from_gemini):
+    """
+    Tests that the content alone is sent once the prompt is served from the prefix cache.
+    """
+    # Arrange
+    fake_caches = FakeCaches()
+    mock_genai_client.return_value.caches = fake_caches
+    mock_model = MagicMock(return_value=CONTENT_INFORMATION_JSON)
+    mock_from_gemini.return_value = mock_model
+    agent = LibrarianAgent(context_cache=True)
+    agent.context_cache.min_tokens = 10
+
+    # Act
+    agent.extract_information("First book.")
+    agent.extract_information("Second book.")
+    agent.close()
+
+    # Assert
+    assert [call.kwargs["model_input"] for call in mock_model.call_args_list] == ["First book.", "Second book."]
+    assert {call.kwargs["cached_content"] for call in mock_model.call_args_list} == {"cachedContents/0"}
+    assert len(fake_caches.created) == 1
+    assert fake_caches.deleted == ["cachedContents/0"]
+    assert agent.context_cache.stats.cached_calls == 2
@@ -1,10 +1,12 @@
 from unittest.mock import patch, MagicMock
-from src.agent.librarian import LibrarianAgent
+from google.genai import errors
+from src.agent.librarian import LIBRARIAN_PROMPT, LibrarianAgent
 from src.agent.librarian_model import ContentInformation
+from src.agent.result_cache import ResultCache
 
 
-@patch("src.agent.librarian.outlines.from_gemini")
-@patch("src.agent.librarian.genai.Client")
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
 def test_extract_information(mock_genai_client, mock_from_gemini):
     """
     Tests the extract_information method of the LibrarianAgent.
@@ -49,8 +51,10 @@ def test_extract_information(mock_genai_client, mock_from_gemini):
     # Verify that the model was called with the correct prompt
     mock_model.assert_called_once()
     _, kwargs = mock_model.call_args
-    assert "You're an expert in literature" in kwargs["model_input"]
-    assert epub_content in kwargs["model_input"]
+    system_message, user_message = kwargs["model_input"].messages
+    assert system_message == {"role": "system", "content": LIBRARIAN_PROMPT}
+    # The content is sent as its own message, not as a copy joined to the prompt.
+    assert user_message["content"] is epub_content
     assert kwargs["output_type"] == ContentInformation
     assert kwargs["temperature"] == 0.2
     assert kwargs["max_output_tokens"] == 200
@@ -58,3 +62,100 @@ def test_extract_information(mock_genai_client, mock_from_gemini):
 
     agent.close()
     mock_genai_client.return_value.close.assert_called_once()
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_information_uses_result_cache(mock_genai_client, mock_from_gemini, tmp_path):
+    """
+    Tests that a cached result is returned without calling the model again.
+    """
+    # Arrange
+    mock_model = MagicMock()
+    mock_from_gemini.return_value = mock_model
+    mock_model.return_value = """
+    {
+        "genre": "Science Fiction",
+        "themes": ["AI", "Humanity", "Existentialism"],
+        "setting": {"time": "2242", "place": "Neo-Veridia"},
+        "cultural_context": "A world grappling with the implications of advanced AI.",
+        "narrative_tone": "Pensive and cautionary.",
+        "author_writing_style": "Crisp and evocative.",
+        "characters_and_relationships": [
+            {"name": "Jaxon", "relationship": "Protagonist"},
+            {"name": "Unit 734", "relationship": "Antagonist"},
+            {"name": "Dr. Aris", "relationship": "Creator"}
+        ]
+    }
+    """
+    cache = ResultCache(str(tmp_path))
+
+    # Act
+    first = LibrarianAgent(cache=cache).extract_information("Some sample epub content.")
+    second = LibrarianAgent(cache=cache).extract_information("Some sample epub content.")
+    LibrarianAgent(cache=cache, temperature=0.7).extract_information("Some sample epub content.")
+
+    # Assert
+    assert first == second
+    assert mock_model.call_count == 2
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+
+
+@patch("src.agent.librarian.time.sleep")
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_information_retries_rate_limits_and_truncated_output(mock_genai_client, mock_from_gemini, mock_sleep):
+    """
+    Tests that rate limits are retried after the server's hint and truncated output is re-asked with more tokens.
+    """
+    # Arrange
+    valid_json = """
+    {
+        "genre": "Science Fiction",
+        "themes": ["AI", "Humanity", "Existentialism"],
+        "setting": {"time": "2242", "place": "Neo-Veridia"},
+        "cultural_context": "A world grappling with the implications of advanced AI.",
+        "narrative_tone": "Pensive and cautionary.",
+        "author_writing_style": "Crisp and evocative.",
+        "characters_and_relationships": [
+            {"name": "Jaxon", "relationship": "Protagonist"},
+            {"name": "Unit 734", "relationship": "Antagonist"},
+            {"name": "Dr. Aris", "relationship": "Creator"}
+        ]
+    }
+    """
+    rate_limit = errors.ClientError(
+        429,
+        {
+            "error": {
+                "code": 429,
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "30s"}],
+            }
+        },
+    )
+    mock_model = MagicMock(side_effect=[rate_limit, valid_json[:120], valid_json])
+    mock_from_gemini.return_value = mock_model
+    agent = LibrarianAgent()
+
+    # Act
+    result = agent.extract_information("Some sample epub content.")
+
+    # Assert
+    assert result.genre == "Science Fiction"
+    assert [call.kwargs["max_output_tokens"] for call in mock_model.call_args_list] == [200, 200, 400]
+    assert mock_sleep.call_args_list[0].args[0] >= 30
+    assert agent.retry_stats.model_dump() == {"calls": 1, "retries": 2, "rate_limited": 1, "truncation_retries": 1}
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_config_fingerprint_tracks_generation_settings(mock_genai_client, mock_from_gemini):
+    """
+    Tests that the configuration fingerprint is stable and changes with the model or generation settings.
+    """
+    fingerprint = LibrarianAgent().config_fingerprint()
+
+    assert LibrarianAgent().config_fingerprint() == fingerprint
+    assert LibrarianAgent(temperature=0.5).config_fingerprint() != fingerprint
+    assert LibrarianAgent(model_name="gemini-2.5-pro").config_fingerprint() != fingerprint
@@ -0,0 +1,120 @@
+from unittest.mock import MagicMock
+import pytest
+from src.agent.librarian_model import CharacterAndRelationships, ContentInformation, ThemeSetting
+from src.agent.map_reduce_librarian import MapReduceLibrarian, reduce_content_information, split_into_chunks
+from src.tool.content_reducer import estimate_tokens
+
+
+def make_content_information(genre, themes, characters, time="1813", place="England", tone="Witty"):
+    return ContentInformation(
+        genre=genre,
+        themes=themes,
+        setting=ThemeSetting(time=time, place=place),
+        cultural_context=f"{genre} context",
+        narrative_tone=tone,
+        author_writing_style="Ironic",
+        characters_and_relationships=[
+            CharacterAndRelationships(name=name, relationship=f"{name} relationship") for name in characters
+        ],
+    )
+
+
+def test_split_into_chunks_keeps_small_content_whole():
+    """
+    Tests that content within the chunk size is not split.
+    """
+    assert split_into_chunks("Chapter 1\nShort book.", max_chunk_tokens=100) == ["Chapter 1\nShort book."]
+
+
+def test_split_into_chunks_aligns_to_chapters():
+    """
+    Tests that chapters are packed into chunks without splitting them when they fit.
+    """
+    chapters = [f"Chapter {index}\n" + f"Sentence of chapter {index}. " * 20 for index in range(1, 7)]
+    content = "\n".join(chapters)
+    chapter_tokens = estimate_tokens(chapters[0])
+
+    chunks = split_into_chunks(content, max_chunk_tokens=chapter_tokens * 2 + 10)
+
+    assert len(chunks) == 3
+    assert all(chunk.startswith("Chapter") for chunk in chunks)
+    assert chunks[1].startswith("Chapter 3") and "Chapter 4" in chunks[1]
+
+
+def test_split_into_chunks_splits_oversized_chapters():
+    """
+    Tests that a chapter longer than a chunk is split on paragraph boundaries within the chunk size.
+    """
+    content = "\n".join(f"Paragraph {index} " + "word " * 20 for index in range(100))
+
+    chunks = split_into_chunks(content, max_chunk_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.startswith("Paragraph") for chunk in chunks)
+
+
+def test_reduce_content_information_votes_and_ranks():
+    """
+    Tests that genre and setting are decided by majority and themes and characters are deduplicated by frequency.
+    """
+    candidates = [
+        make_content_information("Romance", ["Love", "Class", "Pride"], ["Elizabeth", "Darcy", "Jane"], tone="First"),
+        make_content_information("Satire", ["Class", "Money", "Pride"], ["Darcy", "Collins", "Elizabeth"], place="Kent"),
+        make_content_information("romance", ["class", "Marriage", "Family"], ["Elizabeth", "Lydia", "Wickham"]),
+    ]
+
+    result = reduce_content_information(candidates)
+
+    assert result.genre == "Romance"
+    assert result.themes[:2] == ["Class", "Pride"]
+    assert set(result.themes) == {"Love", "Class", "Pride", "Money", "Marriage", "Family"}
+    assert [character.name for character in result.characters_and_relationships][:2] == ["Elizabeth", "Darcy"]
+    assert len(result.characters_and_relationships) == 6
+    assert result.setting.place == "England"
+    assert result.narrative_tone == "First"
+
+
+def test_map_reduce_librarian_analyzes_chunks_in_parallel():
+    """
+    Tests that long books are analyzed per chunk and reduced, tolerating failed chunks.
+    """
+    agent = MagicMock()
+    calls = []
+
+    def extract_information(epub_content):
+        calls.append(epub_content)
+        if "Chapter 2" in epub_content:
+            raise RuntimeError("chunk failed")
+        return make_content_information("Romance", ["Love", "Class", "Pride"], ["Elizabeth", "Darcy", "Jane"])
+
+    agent.extract_information.side_effect = extract_information
+    content = "\n".join(f"Chapter {index}\n" + "word " * 100 for index in range(1, 4))
+
+    result = MapReduceLibrarian(agent, max_chunk_tokens=150).extract_information(content)
+
+    assert len(calls) == 3
+    assert result.genre == "Romance"
+
+
+def test_map_reduce_librarian_raises_when_every_chunk_fails():
+    """
+    Tests that the first chunk error is raised when no chunk could be analyzed.
+    """
+    agent = MagicMock()
+    agent.extract_information.side_effect = RuntimeError("quota exhausted")
+    content = "\n".join(f"Chapter {index}\n" + "word " * 100 for index in range(1, 4))
+
+    with pytest.raises(RuntimeError, match="quota exhausted"):
+        MapReduceLibrarian(agent, max_chunk_tokens=150).extract_information(content)
+
+
+def test_map_reduce_librarian_sends_short_books_whole():
+    """
+    Tests that a book that fits one request is sent as is.
+    """
+    agent = MagicMock()
+
+    MapReduceLibrarian(agent, max_chunk_tokens=1000).extract_information("Short book.")
+
+    agent.extract_information.assert_called_once_with(epub_content="Short book.")
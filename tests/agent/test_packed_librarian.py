@@ -0,0 +1,107 @@
+import json
+from unittest.mock import patch, MagicMock
+from src.agent.librarian import LibrarianAgent
+from src.agent.librarian_model import CharacterAndRelationships, ContentInformation, ThemeSetting
+from src.agent.packed_librarian import PackedLibrarian
+from src.agent.result_cache import ResultCache
+
+CONTENT_INFO = ContentInformation(
+    genre="Poetry",
+    themes=["Nature", "Time", "Memory"],
+    setting=ThemeSetting(time="1850", place="Lake District"),
+    cultural_context="Romantic era.",
+    narrative_tone="Reflective.",
+    author_writing_style="Lyrical.",
+    characters_and_relationships=[
+        CharacterAndRelationships(name="Speaker", relationship="Narrator"),
+        CharacterAndRelationships(name="Sister", relationship="Companion"),
+        CharacterAndRelationships(name="Shepherd", relationship="Stranger"),
+    ],
+)
+
+
+def entry(epub_id: str, **overrides) -> dict:
+    return {"epub_id": epub_id, **CONTENT_INFO.model_dump(), **overrides}
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_packed_analyzes_books_in_one_request(mock_genai_client, mock_from_gemini):
+    """
+    Tests that several short books are sent in one request and each entry is returned under its epub_id.
+    """
+    # Arrange
+    mock_model = MagicMock(return_value=json.dumps({"books": [entry("b", genre="Drama"), entry("a")]}))
+    mock_from_gemini.return_value = mock_model
+    packer = PackedLibrarian(LibrarianAgent(), max_pack_tokens=1000)
+
+    # Act
+    results = packer.extract_packed({"a": "First poem.", "b": "Second play."})
+
+    # Assert
+    assert results["a"] == CONTENT_INFO
+    assert results["b"].genre == "Drama"
+    mock_model.assert_called_once()
+    kwargs = mock_model.call_args.kwargs
+    assert "=== BOOK a ===\nFirst poem." in kwargs["model_input"]
+    assert "=== BOOK b ===\nSecond play." in kwargs["model_input"]
+    assert kwargs["max_output_tokens"] == 400
+    assert packer.stats.model_dump() == {"packs": 1, "packed_books": 2, "cached_books": 0, "fallbacks": 0}
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_packed_falls_back_to_single_requests(mock_genai_client, mock_from_gemini):
+    """
+    Tests that invalid and missing entries are analyzed again one by one while the valid entries are kept.
+    """
+    # Arrange
+    packed_answer = json.dumps({"books": [entry("a"), entry("b", themes=["Only one"])]})
+    mock_model = MagicMock(side_effect=[packed_answer, CONTENT_INFO.model_dump_json(), CONTENT_INFO.model_dump_json()])
+    mock_from_gemini.return_value = mock_model
+    packer = PackedLibrarian(LibrarianAgent(), max_pack_tokens=1000)
+
+    # Act
+    results = packer.extract_packed({"a": "First poem.", "b": "Second poem.", "c": "Third poem."})
+
+    # Assert
+    assert results == {"a": CONTENT_INFO, "b": CONTENT_INFO, "c": CONTENT_INFO}
+    single_inputs = [call.kwargs["model_input"].messages[-1]["content"] for call in mock_model.call_args_list[1:]]
+    assert single_inputs == ["Second poem.", "Third poem."]
+    assert packer.stats.fallbacks == 2
+
+
+@patch("outlines.from_gemini")
+@patch("google.genai.Client")
+def test_extract_packed_uses_result_cache(mock_genai_client, mock_from_gemini, tmp_path):
+    """
+    Tests that cached books are left out of the request and packed results are cached per book.
+    """
+    # Arrange
+    mock_model = MagicMock(return_value=json.dumps({"books": [entry("b"), entry("c")]}))
+    mock_from_gemini.return_value = mock_model
+    cache = ResultCache(directory=str(tmp_path))
+    agent = LibrarianAgent(cache=cache)
+    cache.put(agent.result_cache_key("First poem."), CONTENT_INFO)
+    packer = PackedLibrarian(agent, max_pack_tokens=1000)
+
+    # Act
+    results = packer.extract_packed({"a": "First poem.", "b": "Second poem.", "c": "Third poem."})
+
+    # Assert
+    assert results == {"a": CONTENT_INFO, "b": CONTENT_INFO, "c": CONTENT_INFO}
+    assert "First poem." not in mock_model.call_args.kwargs["model_input"]
+    assert cache.get(agent.result_cache_key("Third poem.")) == CONTENT_INFO
+    assert packer.stats.cached_books == 1
+
+
+def test_is_packable_defaults_to_a_quarter_of_the_pack():
+    """
+    Tests that only books up to a quarter of the pack budget are packed by default.
+    """
+    # Arrange
+    packer = PackedLibrarian(MagicMock(), max_pack_tokens=400)
+
+    # Act & Assert
+    assert packer.is_packable("x" * 400)
+    assert not packer.is_packable("x" * 404)
@@ -0,0 +1,114 @@
+import os
+import time
+from unittest.mock import patch
+from src.agent.result_cache import ResultCache
+from src.tool.epub import extract_epub_data
+from tests.tool.test_epub_reader import write_epub
+from tests.fixtures.books import CONTENT_INFORMATION
+
+
+def make_key(content="content", **overrides):
+    params = {"prompt": "prompt", "model_name": "gemini-2.5-flash", "temperature": 0.2, "max_output_tokens": 200, "top_p": 0.95}
+    params.update(overrides)
+    return ResultCache.make_key(content=content, **params)
+
+
+def test_make_key_depends_on_every_input():
+    """
+    Tests that changing the content, prompt, model or any sampling parameter changes the key.
+    """
+    keys = {
+        make_key(),
+        make_key(content="other content"),
+        make_key(prompt="other prompt"),
+        make_key(model_name="gemini-2.5-pro"),
+        make_key(temperature=0.7),
+        make_key(max_output_tokens=400),
+        make_key(top_p=0.5),
+    }
+    assert len(keys) == 7
+    assert make_key() == make_key()
+
+
+def test_make_key_is_the_same_for_lazy_and_read_content(tmp_path):
+    """
+    Tests that lazy content hashes chapter by chapter to the key of its text, so cached analyses are found either way.
+    """
+    # Arrange
+    file_path = write_epub(tmp_path / "book.epub")
+    _, lazy_content, _ = extract_epub_data(file_path, backend="native", lazy=True)
+
+    # Act & Assert
+    assert make_key(content=lazy_content) == make_key(content=str(lazy_content))
+
+
+def test_result_cache_round_trip_and_stats(tmp_path):
+    """
+    Tests that stored results are returned on later lookups, including from a new cache instance.
+    """
+    cache = ResultCache(str(tmp_path))
+    key = make_key()
+
+    assert cache.get(key) is None
+    cache.put(key, CONTENT_INFORMATION)
+    assert cache.get(key) == CONTENT_INFORMATION
+    assert cache.stats.model_dump() == {"hits": 1, "misses": 1, "writes": 1, "evictions": 0}
+
+    assert ResultCache(str(tmp_path)).get(key) == CONTENT_INFORMATION
+
+
+def test_result_cache_expires_old_entries(tmp_path):
+    """
+    Tests that entries older than max_age_seconds are treated as misses and removed.
+    """
+    cache = ResultCache(str(tmp_path), max_age_seconds=60)
+    key = make_key()
+    cache.put(key, CONTENT_INFORMATION)
+    path = cache._path(key)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
+    assert cache.stats.evictions == 1
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    """
+    Tests that the cache stays under max_bytes by evicting the least recently used entries.
+    """
+    entry_size = len(CONTENT_INFORMATION.model_dump_json().encode("utf-8"))
+    cache = ResultCache(str(tmp_path), max_bytes=entry_size * 2)
+    first, second, third = make_key("first"), make_key("second"), make_key("third")
+
+    cache.put(first, CONTENT_INFORMATION)
+    cache.put(second, CONTENT_INFORMATION)
+    cache.get(first)
+    with patch("src.agent.result_cache.os.scandir") as mock_scandir:
+        cache.put(third, CONTENT_INFORMATION)
+
+    mock_scandir.assert_not_called()
+    assert cache.get(first) == CONTENT_INFORMATION
+    assert cache.get(second) is None
+    assert cache.get(third) == CONTENT_INFORMATION
+    assert cache.stats.evictions == 1
+
+
+def test_result_cache_indexes_existing_entries_by_modification_time(tmp_path):
+    """
+    Tests that a new cache over an existing directory evicts the entries used longest ago first.
+    """
+    entry_size = len(CONTENT_INFORMATION.model_dump_json().encode("utf-8"))
+    first, second, third = make_key("first"), make_key("second"), make_key("third")
+    previous_run = ResultCache(str(tmp_path))
+    previous_run.put(first, CONTENT_INFORMATION)
+    previous_run.put(second, CONTENT_INFORMATION)
+    old = time.time() - 120
+    os.utime(previous_run._path(second), (old, old))
+
+    cache = ResultCache(str(tmp_path), max_bytes=entry_size * 2)
+    cache.put(third, CONTENT_INFORMATION)
+
+    assert cache.get(second) is None
+    assert cache.get(first) == CONTENT_INFORMATION
+    assert cache.get(third) == CONTENT_INFORMATION
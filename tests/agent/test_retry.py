@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock, patch
+import pytest
+from google.genai import errors
+from pydantic import ValidationError
+from src.agent.librarian_model import ContentInformation
+from src.agent.retry import RetryPolicy, RetryState, RetryStats, get_retry_after, get_status_code, is_retryable
+
+
+def rate_limit_error(retry_delay: str | None = "7s") -> errors.ClientError:
+    details = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay}] if retry_delay else []
+    return errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "details": details}})
+
+
+def validation_error() -> ValidationError:
+    try:
+        ContentInformation.model_validate_json('{"genre": "Romance", "themes": ["Lo')
+    except ValidationError as e:
+        return e
+    raise AssertionError("Expected a validation error")
+
+
+def test_error_classification():
+    """
+    Tests status code extraction and which errors are retryable, including errors wrapped by outlines.
+    """
+    server_error = errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE"}})
+    bad_request = errors.ClientError(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+    wrapped = MagicMock(spec=["original_exception"], original_exception=rate_limit_error())
+
+    assert get_status_code(rate_limit_error()) == 429
+    assert get_status_code(wrapped) == 429
+    assert is_retryable(rate_limit_error())
+    assert is_retryable(server_error)
+    assert is_retryable(wrapped)
+    assert is_retryable(ConnectionError("reset"))
+    assert not is_retryable(bad_request)
+    assert not is_retryable(ValueError("boom"))
+
+
+def test_get_retry_after():
+    """
+    Tests that retry hints are read from RetryInfo details and Retry-After headers.
+    """
+    header_error = MagicMock(spec=["response"])
+    header_error.response.headers = {"retry-after": "3"}
+
+    assert get_retry_after(rate_limit_error("7s")) == 7.0
+    assert get_retry_after(rate_limit_error("1.5s")) == 1.5
+    assert get_retry_after(rate_limit_error(None)) is None
+    assert get_retry_after(header_error) == 3.0
+
+
+@patch("src.agent.retry.random.uniform", side_effect=lambda low, high: high)
+def test_retry_state_backs_off_exponentially_and_honors_retry_after(mock_uniform):
+    """
+    Tests exponential backoff, the retry-after floor and pausing the shared rate limiter on rate limits.
+    """
+    stats = RetryStats()
+    rate_limiter = MagicMock()
+    retry = RetryState(RetryPolicy(max_attempts=4), stats, rate_limiter, max_output_tokens=200)
+    server_error = errors.ServerError(500, {"error": {"code": 500}})
+
+    assert retry.next_delay(server_error) == 1.0
+    assert retry.next_delay(server_error) == 2.0
+    assert retry.next_delay(rate_limit_error("7s")) == 7.0
+    rate_limiter.pause.assert_called_once_with(7.0)
+    with pytest.raises(errors.ServerError):
+        retry.next_delay(server_error)
+    assert stats.model_dump() == {"calls": 1, "retries": 3, "rate_limited": 1, "truncation_retries": 0}
+
+
+def test_retry_state_grows_max_output_tokens_on_invalid_output():
+    """
+    Tests that invalid output is re-asked immediately with a larger max_output_tokens, up to the limit.
+    """
+    stats = RetryStats()
+    retry = RetryState(RetryPolicy(max_output_tokens_limit=600), stats, None, max_output_tokens=200)
+
+    assert retry.next_delay(validation_error()) == 0.0
+    assert retry.max_output_tokens == 400
+    assert retry.next_delay(validation_error()) == 0.0
+    assert retry.max_output_tokens == 600
+    with pytest.raises(ValidationError):
+        retry.next_delay(validation_error())
+    assert stats.truncation_retries == 2
+
+
+def test_retry_state_does_not_retry_permanent_errors():
+    """
+    Tests that permanent errors are raised immediately.
+    """
+    retry = RetryState(RetryPolicy(), RetryStats(), None, max_output_tokens=200)
+    with pytest.raises(ValueError):
+        retry.next_delay(ValueError("boom"))
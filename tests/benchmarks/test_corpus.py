@@ -0,0 +1,44 @@
+from benchmarks.corpus import synthetic_epub_id, write_publisher_tsv, write_synthetic_corpus, write_synthetic_epub
+from src.tool.csv_parser import read_publisher_metadata
+from src.tool.epub_reader import EpubReader
+
+
+def test_write_synthetic_epub_is_readable_and_deterministic(tmp_path):
+    """
+    Tests that synthetic EPUBs have the requested chapters and words and that the same seed gives the same text.
+    """
+    # Arrange
+    first_path = write_synthetic_epub(str(tmp_path / "a.epub"), chapters=3, words_per_chapter=100, seed=7)
+    second_path = write_synthetic_epub(str(tmp_path / "b.epub"), chapters=3, words_per_chapter=100, seed=7)
+
+    # Act
+    with EpubReader(first_path) as first, EpubReader(second_path) as second:
+        first_chapters = list(first.iter_chapters())
+        second_chapters = list(second.iter_chapters())
+        metadata = first.metadata
+
+    # Assert
+    assert len(first_chapters) == 3
+    assert first_chapters == second_chapters
+    assert first_chapters[0].startswith("CHAPTER 1\n")
+    assert len(first_chapters[0].split()) == 102
+    assert metadata["dc:title"] == "Synthetic Book a"
+    assert metadata["dc:date"] == "1807"
+
+
+def test_write_publisher_tsv_covers_corpus_ids(tmp_path):
+    """
+    Tests that the publisher TSV has a row for every corpus book followed by filler rows.
+    """
+    # Arrange
+    epub_file_paths = write_synthetic_corpus(str(tmp_path / "epubs"), books=2, chapters=1, words_per_chapter=10)
+    epub_ids = [synthetic_epub_id(index) for index in range(2)]
+
+    # Act
+    tsv_path = write_publisher_tsv(str(tmp_path / "metadata.tsv"), rows=5, epub_ids=epub_ids)
+    publisher_metadata = read_publisher_metadata(tsv_path, separator="\t")
+
+    # Assert
+    assert epub_file_paths == [str(tmp_path / "epubs" / "bench0.epub"), str(tmp_path / "epubs" / "bench1.epub")]
+    assert list(publisher_metadata) == ["bench0", "bench1", "filler2", "filler3", "filler4"]
+    assert set(publisher_metadata["bench0"]) == {"title", "author", "publishing_year"}
@@ -0,0 +1,167 @@
+import json
+import pytest
+from benchmarks.run import (
+    BOOK_MEMORY_CEILING,
+    BOOK_MEMORY_SCENARIO,
+    CLI_STARTUP_BUDGET_SECONDS,
+    CLI_STARTUP_SCENARIO,
+    PROCESS_BATCH_SCENARIO,
+    PROCESS_CATALOG_SCENARIO,
+    SCENARIOS,
+    BenchmarkConfig,
+    check_budgets,
+    compare_reports,
+    machine_slowdown,
+    main,
+    percentile,
+    run_benchmarks,
+)
+
+SMALL_CONFIG = BenchmarkConfig(
+    books=4, chapters=2, words_per_chapter=50, publisher_rows=20, latency_seconds=0.01, error_rate=0.0, model_workers=2
+)
+
+
+def test_percentile_nearest_rank():
+    """
+    Tests the nearest-rank percentile.
+    """
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([], 0.5) is None
+
+
+def test_run_benchmarks_reports_every_scenario(tmp_path):
+    """
+    Tests that every scenario runs against the synthetic corpus and reports throughput, latency and stages.
+    """
+    # Act
+    report = run_benchmarks(SMALL_CONFIG, workdir=str(tmp_path), isolate=False)
+
+    # Assert
+    assert tuple(report.scenarios) == SCENARIOS
+    catalog = report.scenarios[PROCESS_CATALOG_SCENARIO]
+    assert catalog.items == 4
+    assert catalog.errors == 0
+    assert catalog.throughput_per_second > 0
+    assert catalog.p50_seconds <= catalog.p95_seconds <= catalog.p99_seconds
+    assert {"epub_parse", "model_call", "csv_lookup", "merge"} <= set(catalog.stage_seconds)
+    assert catalog.max_concurrency == 2
+    assert report.scenarios[PROCESS_BATCH_SCENARIO].errors == 0
+    assert report.scenarios["publisher_metadata"].items == 20
+    assert all(result.peak_rss_bytes > 0 for result in report.scenarios.values())
+
+
+def test_compare_reports_flags_regressions(tmp_path):
+    """
+    Tests that slower stages, lower throughput, lower concurrency and a different configuration are detected.
+    """
+    # Arrange
+    baseline = run_benchmarks(SMALL_CONFIG, scenarios=(PROCESS_CATALOG_SCENARIO,), workdir=str(tmp_path), isolate=False)
+    result = baseline.scenarios[PROCESS_CATALOG_SCENARIO]
+    result.wall_seconds = 1.0
+    result.throughput_per_second = 100.0
+    result.stage_seconds = {"epub_parse": 1.0}
+    report = baseline.model_copy(deep=True)
+    slow = report.scenarios[PROCESS_CATALOG_SCENARIO]
+    slow.throughput_per_second = 50.0
+    slow.stage_seconds = {"epub_parse": 2.0}
+    slow.max_concurrency = 1
+
+    # Act
+    regressions = compare_reports(report, baseline, tolerance=0.25)
+
+    # Assert
+    assert compare_reports(baseline, baseline) == []
+    assert len(regressions) == 3
+    partial_baseline = baseline.model_copy(update={"scenarios": {}})
+    assert compare_reports(baseline, partial_baseline) == [
+        f"{PROCESS_CATALOG_SCENARIO}: missing from the baseline, record it with --save-baseline"
+    ]
+    assert regressions[0].startswith("process_catalog: throughput 50.00/s below baseline 100.00/s")
+    with pytest.raises(ValueError):
+        compare_reports(report.model_copy(update={"config": SMALL_CONFIG.model_copy(update={"books": 5})}), baseline)
+
+
+def test_compare_reports_scales_timings_to_the_machine(tmp_path):
+    """
+    Tests that a slower machine is compared relative to its reference workload, and a faster one is not loosened.
+    """
+    # Arrange
+    baseline = run_benchmarks(SMALL_CONFIG, scenarios=(PROCESS_CATALOG_SCENARIO,), workdir=str(tmp_path), isolate=False)
+    baseline.reference_seconds = 0.05
+    result = baseline.scenarios[PROCESS_CATALOG_SCENARIO]
+    result.wall_seconds = 1.0
+    result.throughput_per_second = 100.0
+    result.stage_seconds = {"epub_parse": 1.0}
+    report = baseline.model_copy(deep=True, update={"reference_seconds": 0.1})
+    slow = report.scenarios[PROCESS_CATALOG_SCENARIO]
+    slow.throughput_per_second = 50.0
+    slow.stage_seconds = {"epub_parse": 2.0}
+    faster_machine = report.model_copy(update={"reference_seconds": 0.025})
+
+    # Act
+    regressions = compare_reports(report, baseline, tolerance=0.25)
+    faster_regressions = compare_reports(faster_machine, baseline, tolerance=0.25)
+
+    # Assert
+    assert machine_slowdown(report, baseline) == 2.0
+    assert regressions == []
+    assert len(faster_regressions) == 2
+    assert faster_regressions[0].startswith("process_catalog: throughput 50.00/s below baseline 100.00/s")
+
+
+def test_main_saves_and_compares_baseline(tmp_path, capsys):
+    """
+    Tests that the command line stores a baseline and passes when compared against the same configuration.
+    """
+    # Arrange
+    baseline_path = tmp_path / "baseline.json"
+    argv = ["--books", "2", "--chapters", "1", "--words-per-chapter", "20", "--publisher-rows", "10", "--latency", "0"]
+    argv += ["--scenario", "epub_parse", "--no-isolate"]
+
+    # Act
+    save_exit_code = main(argv + ["--save-baseline", str(baseline_path)])
+    compare_exit_code = main(argv + ["--baseline", str(baseline_path)])
+    mismatch_exit_code = main(argv + ["--seed", "1", "--baseline", str(baseline_path)])
+
+    # Assert
+    assert (save_exit_code, compare_exit_code, mismatch_exit_code) == (0, 0, 2)
+    assert json.loads(baseline_path.read_text())["scenarios"]["epub_parse"]["items"] == 2
+    assert "No regressions" in capsys.readouterr().out
+
+
+def test_cli_startup_stays_within_budget(tmp_path):
+    """
+    Tests that a cold start of the CLI stays within the fixed budget, and that exceeding it is reported.
+    """
+    # Act
+    report = run_benchmarks(SMALL_CONFIG, scenarios=(CLI_STARTUP_SCENARIO,), workdir=str(tmp_path), isolate=False)
+
+    # Assert
+    startup = report.scenarios[CLI_STARTUP_SCENARIO]
+    assert startup.errors == 0
+    assert startup.p95_seconds < CLI_STARTUP_BUDGET_SECONDS
+    assert check_budgets(report) == []
+    startup.p95_seconds = CLI_STARTUP_BUDGET_SECONDS * 2
+    assert check_budgets(report)[0].startswith("cli_startup: p95_seconds")
+
+
+def test_book_memory_stays_below_ceiling(tmp_path):
+    """
+    Tests that the peak memory of a book stays below the fixed multiple of its text size.
+    """
+    # Arrange
+    config = BenchmarkConfig(books=2, chapters=10, words_per_chapter=2000, publisher_rows=20, latency_seconds=0.0)
+
+    # Act
+    report = run_benchmarks(config, scenarios=(BOOK_MEMORY_SCENARIO,), workdir=str(tmp_path), isolate=False)
+
+    # Assert
+    memory = report.scenarios[BOOK_MEMORY_SCENARIO]
+    assert memory.errors == 0
+    assert 1.0 < memory.peak_memory_ratio <= BOOK_MEMORY_CEILING
+    assert check_budgets(report) == []
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from benchmarks.stub_gemini import StubBatchClient, StubGeminiError, StubLibrarianAgent, stub_content_information
+from src.agent.batch_librarian import BatchLibrarian
+from src.agent.librarian_model import ContentInformation
+
+
+def test_stub_agent_is_deterministic_and_tracks_concurrency():
+    """
+    Tests that the stub agent answers and fails the same books on every run and records overlapping calls.
+    """
+    # Arrange
+    contents = [f"book {index}" for index in range(40)]
+    first_agent = StubLibrarianAgent(latency_seconds=0.01, error_rate=0.25, seed=3)
+    second_agent = StubLibrarianAgent(latency_seconds=0.0, error_rate=0.25, seed=3)
+
+    def outcome(agent, content):
+        try:
+            return agent.extract_information(content)
+        except StubGeminiError:
+            return None
+
+    # Act
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first_outcomes = list(pool.map(lambda content: outcome(first_agent, content), contents))
+    second_outcomes = [outcome(second_agent, content) for content in contents]
+
+    # Assert
+    assert first_outcomes == second_outcomes
+    assert 0 < first_outcomes.count(None) < len(contents)
+    assert first_agent.calls == len(contents)
+    assert first_agent.max_concurrency == 4
+    assert second_agent.max_concurrency == 1
+
+
+def test_stub_agent_without_errors():
+    """
+    Tests that a zero error rate never fails and returns a valid analysis of the content.
+    """
+    agent = StubLibrarianAgent(latency_seconds=0.0, error_rate=0.0)
+
+    result = agent.extract_information("Some content")
+
+    assert isinstance(result, ContentInformation)
+    assert result == stub_content_information("Some content")
+
+
+def test_stub_batch_client_runs_batch_librarian_job(tmp_path):
+    """
+    Tests that the stub batch client answers BatchLibrarian jobs with one result or error per book.
+    """
+    # Arrange
+    batch_librarian = BatchLibrarian(client=StubBatchClient(error_rate=0.5, seed=1), poll_interval_seconds=0)
+    job_file_path = str(tmp_path / "job.jsonl")
+    books = [(f"pg{index}", f"content {index}") for index in range(10)]
+    batch_librarian.write_job_file(job_file_path, books)
+
+    # Act
+    job_name = batch_librarian.create_job(batch_librarian.upload(job_file_path, "bench"), "bench")
+    results = dict(batch_librarian.read_results(batch_librarian.wait(job_name)))
+
+    # Assert
+    assert list(results) == [epub_id for epub_id, _ in books]
+    assert results["pg0"] == stub_content_information("content 0") or isinstance(results["pg0"], Exception)
+    assert 0 < sum(isinstance(result, Exception) for result in results.values()) < len(books)
+
+
+def test_stub_agent_rejects_selected_books():
+    """
+    Tests that an error rate of one fails every call.
+    """
+    with pytest.raises(StubGeminiError):
+        StubLibrarianAgent(latency_seconds=0.0, error_rate=1.0).extract_information("Some content")
@@ -0,0 +1,35 @@
+from src.agent.librarian_model import BookMetadata, CharacterAndRelationships, ContentInformation, ThemeSetting
+from src.task.book_model import BookResult
+
+# The analysis the mocked librarian agents return, shared by the tests.
+CONTENT_INFORMATION = ContentInformation(
+    genre="Science Fiction",
+    themes=["AI", "Humanity", "Existentialism"],
+    setting=ThemeSetting(time="2242", place="Neo-Veridia"),
+    cultural_context="Globalized society",
+    narrative_tone="Philosophical",
+    author_writing_style="Introspective",
+    characters_and_relationships=[
+        CharacterAndRelationships(name="Jaxon", relationship="Protagonist"),
+        CharacterAndRelationships(name="Elara", relationship="Antagonist"),
+        CharacterAndRelationships(name="Kael", relationship="Supporting Character"),
+    ],
+)
+
+# The same analysis as the mocked model answers it.
+CONTENT_INFORMATION_JSON = CONTENT_INFORMATION.model_dump_json(indent=4)
+
+
+def make_book_metadata(epub_id: str, genre: str = "Science Fiction") -> BookMetadata:
+    return BookMetadata(
+        title=f"Title {epub_id}",
+        author="Author",
+        publishing_year=2024,
+        epub_id=epub_id,
+        **CONTENT_INFORMATION.model_dump(exclude={"genre"}),
+        genre=genre,
+    )
+
+
+def make_book_result(epub_id: str, genre: str = "Science Fiction") -> BookResult:
+    return BookResult(epub_file_path=f"books/{epub_id}.epub", epub_id=epub_id, book_metadata=make_book_metadata(epub_id, genre))
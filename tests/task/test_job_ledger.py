@@ -0,0 +1,78 @@
+from src.task.job_ledger import (
+    ANALYZED_STAGE,
+    MERGED_STAGE,
+    PARSED_STAGE,
+    BookFingerprints,
+    JobLedger,
+    fingerprint_file,
+    fingerprint_value,
+)
+
+
+def test_job_ledger_records_and_resets_stages(tmp_path):
+    """
+    Tests that completed stages persist across ledger instances and can be reset.
+    """
+    path = str(tmp_path / "ledger.sqlite")
+    ledger = JobLedger(path)
+    ledger.record("pg1", PARSED_STAGE, '{"parsed": 1}')
+    ledger.record("pg1", ANALYZED_STAGE, '{"analyzed": 1}')
+    ledger.record("pg1", ANALYZED_STAGE, '{"analyzed": 2}')
+    ledger.record("pg2", PARSED_STAGE, '{"parsed": 2}')
+    ledger.close()
+
+    ledger = JobLedger(path)
+    assert ledger.completed_stages("pg1") == {PARSED_STAGE: '{"parsed": 1}', ANALYZED_STAGE: '{"analyzed": 2}'}
+    assert ledger.completed_stages("missing") == {}
+
+    ledger.reset("pg1", stages=(ANALYZED_STAGE, MERGED_STAGE))
+    assert ledger.completed_stages("pg1") == {PARSED_STAGE: '{"parsed": 1}'}
+    ledger.reset("pg2")
+    assert ledger.completed_stages("pg2") == {}
+    ledger.close()
+
+
+def test_job_ledger_invalidates_stages_affected_by_changed_inputs(tmp_path):
+    """
+    Tests that a changed publisher row only forgets the merge while a changed file or configuration forgets every stage.
+    """
+    ledger = JobLedger(str(tmp_path / "ledger.sqlite"))
+    fingerprints = BookFingerprints(content="file-1", publisher="row-1", config="config-1")
+
+    def complete_all_stages():
+        for stage in (PARSED_STAGE, ANALYZED_STAGE, MERGED_STAGE):
+            ledger.record("pg1", stage, "{}")
+
+    assert ledger.invalidate("pg1", fingerprints) == ()
+    complete_all_stages()
+    assert ledger.invalidate("pg1", fingerprints) == ()
+    assert ledger.fingerprints("pg1") == fingerprints
+
+    publisher_changed = fingerprints.model_copy(update={"publisher": "row-2"})
+    assert ledger.invalidate("pg1", publisher_changed) == (MERGED_STAGE,)
+    assert set(ledger.completed_stages("pg1")) == {PARSED_STAGE, ANALYZED_STAGE}
+    assert ledger.fingerprints("pg1") == publisher_changed
+
+    complete_all_stages()
+    assert ledger.invalidate("pg1", publisher_changed.model_copy(update={"config": "config-2"})) == (
+        PARSED_STAGE,
+        ANALYZED_STAGE,
+        MERGED_STAGE,
+    )
+    assert ledger.completed_stages("pg1") == {}
+    ledger.close()
+
+
+def test_fingerprints_identify_file_and_value_contents(tmp_path):
+    """
+    Tests that fingerprints change with the file bytes and the value, but not with the key order of a value.
+    """
+    path = tmp_path / "book.epub"
+    path.write_bytes(b"version 1")
+    first = fingerprint_file(str(path))
+    path.write_bytes(b"version 2")
+
+    assert fingerprint_file(str(path)) != first
+    assert fingerprint_value({"title": "A", "author": "B"}) == fingerprint_value({"author": "B", "title": "A"})
+    assert fingerprint_value({"title": "A"}) != fingerprint_value({"title": "B"})
+    assert fingerprint_value(None) != fingerprint_value({})
@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import pyarrow.parquet as pq
+import pytest
+from unittest.mock import patch
+from src.task.book_model import BookResult
+from src.task.output_sink import JsonlSink, ParquetSink, SqliteSink, create_sink, result_columns, result_row
+from tests.fixtures.books import make_book_result
+
+FAILED_RESULT = BookResult(epub_file_path="books/broken.epub", epub_id="broken", error="parse: corrupt archive")
+
+
+def test_result_row_flattens_book_metadata():
+    """
+    Tests that rows hold the result fields and the BookMetadata fields, left empty for failed books.
+    """
+    # Act
+    row = result_row(make_book_result("a"))
+    failed_row = result_row(FAILED_RESULT)
+
+    # Assert
+    assert list(row) == list(result_columns())
+    assert row["title"] == "Title a"
+    assert row["setting"] == {"time": "2242", "place": "Neo-Veridia"}
+    assert failed_row["error"] == "parse: corrupt archive"
+    assert failed_row["title"] is None
+
+
+def test_jsonl_sink_writes_batches_and_replaces_file_on_close(tmp_path):
+    """
+    Tests that the JSONL file only appears, complete, once the sink is closed.
+    """
+    # Arrange
+    path = tmp_path / "results.jsonl"
+    path.write_text("previous run\n")
+
+    # Act
+    with JsonlSink(str(path), batch_size=2) as sink:
+        for epub_id in ("a", "b", "c"):
+            sink.write(make_book_result(epub_id))
+        written_before_close = sink.written
+        content_before_close = path.read_text()
+
+    # Assert
+    assert written_before_close == 2
+    assert content_before_close == "previous run\n"
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["epub_id"] for line in lines] == ["a", "b", "c"]
+    assert [file.name for file in tmp_path.iterdir()] == ["results.jsonl"]
+
+
+def test_jsonl_sink_abort_keeps_previous_file(tmp_path):
+    """
+    Tests that an aborted sink leaves the previous file and no temporary file behind.
+    """
+    # Arrange
+    path = tmp_path / "results.jsonl"
+    path.write_text("previous run\n")
+    sink = JsonlSink(str(path), batch_size=1)
+    sink.write(make_book_result("a"))
+
+    # Act
+    sink.abort()
+
+    # Assert
+    assert path.read_text() == "previous run\n"
+    assert [file.name for file in tmp_path.iterdir()] == ["results.jsonl"]
+
+
+def test_jsonl_sink_aborts_when_the_run_fails(tmp_path):
+    """
+    Tests that a sink exited with an exception keeps the previous file, and that a finalized file is not owner-only.
+    """
+    # Arrange
+    path = tmp_path / "results.jsonl"
+    new_path = tmp_path / "new.jsonl"
+    path.write_text("previous run\n")
+
+    # Act
+    with pytest.raises(KeyboardInterrupt):
+        with JsonlSink(str(path), batch_size=1) as sink:
+            sink.write(make_book_result("a"))
+            raise KeyboardInterrupt
+    with JsonlSink(str(new_path)) as sink:
+        sink.write(make_book_result("b"))
+
+    # Assert
+    assert path.read_text() == "previous run\n"
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["new.jsonl", "results.jsonl"]
+    umask = os.umask(0)
+    os.umask(umask)
+    assert new_path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_sqlite_sink_upserts_by_epub_id(tmp_path):
+    """
+    Tests that re-running into the same database replaces the rows of books processed again and keeps the others.
+    """
+    # Arrange
+    path = str(tmp_path / "results.sqlite")
+    with SqliteSink(path, batch_size=2) as sink:
+        sink.write(make_book_result("a"))
+        sink.write(make_book_result("b"))
+
+    # Act
+    with SqliteSink(path) as sink:
+        sink.write(make_book_result("a", genre="Fantasy"))
+        sink.write(FAILED_RESULT)
+
+    # Assert
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT epub_id, genre, themes, error FROM books ORDER BY epub_id").fetchall()
+    connection.close()
+    assert rows == [
+        ("a", "Fantasy", '["AI", "Humanity", "Existentialism"]', None),
+        ("b", "Science Fiction", '["AI", "Humanity", "Existentialism"]', None),
+        ("broken", None, None, "parse: corrupt archive"),
+    ]
+
+
+def test_parquet_sink_writes_row_groups_with_model_schema(tmp_path):
+    """
+    Tests that the Parquet file has a schema derived from the models, one row group per batch and prunable columns.
+    """
+    # Arrange
+    path = str(tmp_path / "results.parquet")
+
+    # Act
+    with ParquetSink(path, batch_size=2) as sink:
+        for epub_id in ("a", "b", "c"):
+            sink.write(make_book_result(epub_id))
+        sink.write(FAILED_RESULT)
+
+    # Assert
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.schema_arrow.names == list(result_columns())
+    table = pq.read_table(path, columns=["epub_id", "themes"])
+    assert table.column_names == ["epub_id", "themes"]
+    assert table.column("epub_id").to_pylist() == ["a", "b", "c", "broken"]
+    assert table.column("themes").to_pylist()[3] is None
+
+
+def test_parquet_sink_requires_pyarrow(tmp_path):
+    """
+    Tests that the Parquet format explains how to install its optional dependency.
+    """
+    # Arrange
+    with patch.dict("sys.modules", {"pyarrow": None, "pyarrow.parquet": None}):
+        # Act & Assert
+        with pytest.raises(ImportError, match="requires pyarrow"):
+            ParquetSink(str(tmp_path / "results.parquet"))
+
+
+def test_create_sink_infers_format_from_extension(tmp_path):
+    """
+    Tests that the output format defaults to the path's extension and that stdout only takes JSONL.
+    """
+    # Act
+    sqlite_sink = create_sink(str(tmp_path / "results.db"))
+    jsonl_sink = create_sink(str(tmp_path / "results.out"), batch_size=5)
+
+    # Assert
+    assert isinstance(sqlite_sink, SqliteSink)
+    assert isinstance(jsonl_sink, JsonlSink)
+    assert jsonl_sink.batch_size == 5
+    assert isinstance(create_sink(None), JsonlSink)
+    with pytest.raises(ValueError, match="needs an output path"):
+        create_sink(None, "parquet")
+    sqlite_sink.close()
+    jsonl_sink.close()
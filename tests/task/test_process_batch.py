@@ -0,0 +1,103 @@
+from unittest.mock import patch
+from src.agent.batch_librarian import BatchLibrarian
+from src.task.process_batch import load_batch_state, process_batch
+from tests.agent.test_batch_librarian import FakeBatchClient
+
+
+def fake_extract_epub_data(file_path, backend):
+    epub_id = file_path.split("/")[-1].replace(".epub", "")
+    if epub_id == "broken":
+        raise RuntimeError("corrupt archive")
+    return {"dc:title": f"Title {epub_id}", "dc:creator": "EPUB Author", "dc:date": 2024}, f"content of {epub_id}", epub_id
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_batch_merges_results(mock_extract_epub_data, tmp_path):
+    """
+    Tests that batch results are validated per book and merged with publisher and EPUB metadata.
+    """
+    # Arrange
+    client = FakeBatchClient()
+    batch_librarian = BatchLibrarian(client=client, poll_interval_seconds=0)
+    publisher_store = {"book1": {"title": "Publisher Title", "author": "Publisher Author", "publishing_year": "1999"}}
+    state_file_path = str(tmp_path / "job.json")
+
+    # Act
+    results = list(
+        process_batch(
+            batch_librarian, ["books/book1.epub", "books/book2.epub", "books/broken.epub"], publisher_store, state_file_path
+        )
+    )
+
+    # Assert
+    by_id = {result.epub_id: result for result in results}
+    assert by_id["book1"].book_metadata.title == "Publisher Title"
+    assert by_id["book1"].book_metadata.publishing_year == 1999
+    assert by_id["book2"].book_metadata.title == "Title book2"
+    assert by_id["book2"].book_metadata.genre == "Science Fiction"
+    assert by_id["broken"].error == "parse: corrupt archive"
+    assert len(client.jobs) == 1
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_batch_resumes_submitted_job(mock_extract_epub_data, tmp_path):
+    """
+    Tests that a restarted run resumes the submitted job from the state file without parsing or submitting again.
+    """
+    # Arrange
+    client = FakeBatchClient(polls_until_done=0)
+    batch_librarian = BatchLibrarian(client=client, poll_interval_seconds=0)
+    state_file_path = str(tmp_path / "job.json")
+    interrupted_run = process_batch(batch_librarian, ["books/book1.epub", "books/book2.epub"], {}, state_file_path)
+
+    # Act
+    # Stop the first run before any result is read, as if the process was preempted while polling.
+    client.batches.get = None
+    try:
+        next(interrupted_run)
+    except TypeError:
+        pass
+    client.batches.get = client._get
+    mock_extract_epub_data.reset_mock()
+    results = list(process_batch(batch_librarian, [], {}, state_file_path))
+
+    # Assert
+    state = load_batch_state(state_file_path)
+    assert state.job_name == "batches/0"
+    assert sorted(result.epub_id for result in results) == ["book1", "book2"]
+    assert all(result.error is None for result in results)
+    mock_extract_epub_data.assert_not_called()
+    assert len(client.jobs) == 1
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_batch_parses_through_a_bounded_window(mock_extract_epub_data, tmp_path):
+    """
+    Tests that the catalog is read lazily, with at most twice the parse workers books parsed ahead of the job file.
+    """
+    # Arrange
+    batch_librarian = BatchLibrarian(client=FakeBatchClient(), poll_interval_seconds=0)
+    read_ahead = []
+    read_ahead_counts = []
+
+    def epub_file_paths():
+        for index in range(20):
+            read_ahead.append(index)
+            yield f"books/book{index}.epub"
+
+    def write_job_file(job_file_path, books):
+        for written, _ in enumerate(books):
+            read_ahead_counts.append(len(read_ahead) - written)
+        with open(job_file_path, mode="w", encoding="utf-8"):
+            pass
+
+    batch_librarian.write_job_file = write_job_file
+
+    # Act
+    results = process_batch(batch_librarian, epub_file_paths(), {}, str(tmp_path / "job.json"), parse_workers=2)
+    next(results, None)
+
+    # Assert
+    assert len(read_ahead_counts) == 20
+    assert max(read_ahead_counts) == 4
+    assert mock_extract_epub_data.call_count == 20
@@ -1,6 +1,10 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock
+from src.agent.map_reduce_librarian import MapReduceLibrarian
 from src.task.process_book import process_book
+from src.utils.metrics import metrics
+from tests.tool.test_epub_reader import write_epub
 from src.agent.librarian_model import ContentInformation, ThemeSetting, CharacterAndRelationships
 
 # Common test data
@@ -61,8 +65,8 @@ def test_process_book_prioritizes_publisher_metadata(
     assert result.publishing_year == 2025
     assert result.epub_id == EPUB_ID
     assert result.genre == MOCK_CONTENT_INFO.genre
-    mock_read_publisher_metadata.assert_called_once_with(file_path=METADATA_FILE_PATH, separator="\t")
-    mock_extract_epub_data.assert_called_once_with(file_path=EPUB_FILE_PATH)
+    mock_read_publisher_metadata.assert_called_once_with(file_path=METADATA_FILE_PATH, separator="\t", epub_ids={"book"})
+    mock_extract_epub_data.assert_called_once_with(file_path=EPUB_FILE_PATH, backend="tika", lazy=True)
     mock_librarian_agent.extract_information.assert_called_once_with(epub_content=EPUB_CONTENT)
 
 
@@ -134,3 +138,102 @@ def test_process_book_with_mixed_metadata_sources(mock_read_publisher_metadata,
     assert result.author == "EPUB Author"  # Fallback to EPUB
     assert result.publishing_year == 2025  # From publisher
     assert result.epub_id == EPUB_ID
+
+
+@patch("src.task.process_book.extract_epub_data")
+@patch("src.task.process_book.read_publisher_metadata")
+def test_process_book_with_publisher_store(mock_read_publisher_metadata, mock_extract_epub_data, mock_librarian_agent):
+    """
+    Tests that process_book looks up publisher metadata in the given store instead of reading the CSV file.
+    """
+    # Arrange
+    publisher_store = MagicMock()
+    publisher_store.get.return_value = {"title": "Store Title", "author": "Store Author", "publishing_year": "2020"}
+    mock_extract_epub_data.return_value = ({}, EPUB_CONTENT, EPUB_ID)
+
+    # Act
+    result = process_book(mock_librarian_agent, EPUB_FILE_PATH, publisher_store=publisher_store)
+
+    # Assert
+    assert result.title == "Store Title"
+    assert result.author == "Store Author"
+    assert result.publishing_year == 2020
+    mock_read_publisher_metadata.assert_not_called()
+    publisher_store.get.assert_called_with(EPUB_ID, {})
+
+
+@patch("src.task.process_book.extract_epub_data")
+@patch("src.task.process_book.read_publisher_metadata")
+def test_process_book_times_reading_and_looking_up_publisher_metadata_apart(
+    mock_read_publisher_metadata, mock_extract_epub_data, mock_librarian_agent, tmp_path
+):
+    """
+    Tests that streaming the publisher file and looking up the book's row are recorded as separate stages.
+    """
+    # Arrange
+    mock_read_publisher_metadata.return_value = {}
+    mock_extract_epub_data.return_value = ({}, EPUB_CONTENT, "book")
+    book_log_path = tmp_path / "books.jsonl"
+    metrics.configure(enabled=True, book_log_path=str(book_log_path))
+
+    # Act
+    try:
+        process_book(mock_librarian_agent, EPUB_FILE_PATH, METADATA_FILE_PATH)
+    finally:
+        metrics.configure(enabled=False)
+        metrics.reset()
+
+    # Assert
+    record = json.loads(book_log_path.read_text())
+    assert {"csv_read_seconds", "csv_lookup_seconds", "merge_seconds"} <= set(record)
+
+
+def test_process_book_requires_publisher_metadata(mock_librarian_agent):
+    """
+    Tests that process_book rejects calls without a publisher metadata source.
+    """
+    with pytest.raises(ValueError, match="metadata_file_path or publisher_store"):
+        process_book(mock_librarian_agent, EPUB_FILE_PATH)
+
+
+@patch("src.task.process_book.extract_epub_data")
+@patch("src.task.process_book.read_publisher_metadata")
+def test_process_book_reduces_content_to_token_budget(
+    mock_read_publisher_metadata, mock_extract_epub_data, mock_librarian_agent
+):
+    """
+    Tests that process_book sends the reduced content to the agent when a token budget is set.
+    """
+    # Arrange
+    mock_read_publisher_metadata.return_value = {}
+    long_content = "\n".join(f"Paragraph {index} " + "word " * 40 for index in range(500))
+    mock_extract_epub_data.return_value = ({}, long_content, EPUB_ID)
+
+    # Act
+    process_book(mock_librarian_agent, EPUB_FILE_PATH, METADATA_FILE_PATH, token_budget=1000)
+
+    # Assert
+    sent_content = mock_librarian_agent.extract_information.call_args.kwargs["epub_content"]
+    assert sent_content.startswith("Paragraph 0 ")
+    assert len(sent_content) <= 4000
+
+
+@patch("src.task.process_book.read_publisher_metadata")
+def test_process_book_map_reduces_lazy_native_content(mock_read_publisher_metadata, mock_librarian_agent, tmp_path):
+    """
+    Tests that the map-reduce analyzer chunks the lazily read content of the native backend.
+    """
+    # Arrange
+    mock_read_publisher_metadata.return_value = {}
+    file_path = write_epub(tmp_path / "native_book.epub")
+    analyzer = MapReduceLibrarian(mock_librarian_agent, max_chunk_tokens=5)
+
+    # Act
+    book_metadata = process_book(analyzer, file_path, METADATA_FILE_PATH, epub_backend="native")
+
+    # Assert
+    chunks = [call.kwargs["epub_content"] for call in mock_librarian_agent.extract_information.call_args_list]
+    assert len(chunks) > 1
+    assert all(isinstance(chunk, str) for chunk in chunks)
+    assert chunks[0].startswith("Chapter 1")
+    assert book_metadata.genre == "Science Fiction"
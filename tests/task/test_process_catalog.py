@@ -0,0 +1,303 @@
+import json
+from unittest.mock import MagicMock, patch
+from src.task.book_model import ParsedBook
+from src.task.job_ledger import ANALYZED_STAGE, MERGED_STAGE, PARSED_STAGE, JobLedger
+from src.task.process_catalog import process_catalog
+from src.tool.dedup import DedupIndex
+from src.utils.metrics import metrics
+from tests.tool.test_epub_reader import write_epub
+from tests.fixtures.books import CONTENT_INFORMATION
+
+
+def fake_extract_epub_data(file_path, backend):
+    epub_id = file_path.split("/")[-1].replace(".epub", "")
+    if epub_id == "broken":
+        raise RuntimeError("corrupt archive")
+    if epub_id == "empty":
+        return {}, "", epub_id
+    return {"dc:title": f"Title {epub_id}", "dc:creator": "EPUB Author", "dc:date": 2024}, f"content of {epub_id}", epub_id
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_processes_every_book(mock_extract_epub_data):
+    """
+    Tests that process_catalog shares the agent and publisher metadata across books and yields one result per book.
+    """
+    # Arrange
+    publisher_store = {"book1": {"title": "Publisher Title", "author": "", "publishing_year": ""}}
+    agent = MagicMock()
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    paths = [f"books/book{i}.epub" for i in range(1, 21)]
+
+    # Act
+    results = list(process_catalog(agent, paths, publisher_store, parse_workers=3, model_workers=2))
+
+    # Assert
+    assert sorted(result.epub_id for result in results) == sorted(f"book{i}" for i in range(1, 21))
+    assert all(result.error is None for result in results)
+    by_id = {result.epub_id: result.book_metadata for result in results}
+    assert by_id["book1"].title == "Publisher Title"
+    assert by_id["book1"].author == "EPUB Author"
+    assert by_id["book2"].title == "Title book2"
+    assert agent.extract_information.call_count == 20
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_isolates_failures(mock_extract_epub_data):
+    """
+    Tests that parse, empty-content and analysis failures are reported per book without stopping the run.
+    """
+    # Arrange
+    agent = MagicMock()
+
+    def extract_information(epub_content):
+        if epub_content == "content of rate_limited":
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return CONTENT_INFORMATION
+
+    agent.extract_information.side_effect = extract_information
+    paths = ["books/broken.epub", "books/empty.epub", "books/rate_limited.epub", "books/good.epub"]
+
+    # Act
+    results = {result.epub_id: result for result in process_catalog(agent, paths, {})}
+
+    # Assert
+    assert results["broken"].error == "parse: corrupt archive"
+    assert results["empty"].error == "parse: No content extracted from EPUB file"
+    assert results["rate_limited"].error == "analyze: 429 RESOURCE_EXHAUSTED"
+    assert results["good"].error is None
+    assert results["good"].book_metadata.title == "Title good"
+    assert agent.extract_information.call_count == 2
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_reports_saved_tokens(mock_extract_epub_data):
+    """
+    Tests that content is reduced in the parse stage and the saved tokens are reported per book.
+    """
+    # Arrange
+    agent = MagicMock()
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    mock_extract_epub_data.side_effect = lambda file_path, backend: ({}, "word " * 4000, "long")
+
+    # Act
+    [result] = list(process_catalog(agent, ["books/long.epub"], {}, token_budget=500))
+
+    # Assert
+    assert result.error is None
+    assert result.saved_tokens > 4000
+    assert len(agent.extract_information.call_args.kwargs["epub_content"]) <= 2000
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_resumes_from_ledger(mock_extract_epub_data, tmp_path):
+    """
+    Tests that a restarted run skips merged books and resumes the others from their last completed stage.
+    """
+    # Arrange
+    ledger = JobLedger(str(tmp_path / "ledger.sqlite"))
+    agent = MagicMock()
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    paths = ["books/done.epub", "books/analyzed.epub"]
+    list(process_catalog(agent, paths, {}, ledger=ledger))
+
+    # Simulate a run preempted after analyzing one book and after parsing another.
+    ledger.reset("analyzed", stages=(MERGED_STAGE,))
+    parsed = ParsedBook(epub_id="parsed_only", epub_metadata={"dc:title": "Stored Title"}, epub_content="stored content")
+    ledger.record("parsed_only", PARSED_STAGE, parsed.model_dump_json())
+    agent.reset_mock()
+    mock_extract_epub_data.reset_mock()
+
+    # Act
+    results = {
+        result.epub_id: result
+        for result in process_catalog(agent, paths + ["books/parsed_only.epub", "books/new.epub"], {}, ledger=ledger)
+    }
+
+    # Assert
+    assert set(results) == {"done", "analyzed", "parsed_only", "new"}
+    assert all(result.error is None for result in results.values())
+    assert results["done"].book_metadata.title == "Title done"
+    assert results["analyzed"].book_metadata.title == "Title analyzed"
+    assert results["parsed_only"].book_metadata.title == "Stored Title"
+    assert [call.kwargs["file_path"] for call in mock_extract_epub_data.call_args_list] == ["books/new.epub"]
+    assert sorted(call.kwargs["epub_content"] for call in agent.extract_information.call_args_list) == [
+        "content of new",
+        "stored content",
+    ]
+    assert set(ledger.completed_stages("new")) == {PARSED_STAGE, ANALYZED_STAGE, MERGED_STAGE}
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_records_per_book_metrics(mock_extract_epub_data, tmp_path):
+    """
+    Tests that stage timings are recorded per book when metrics are enabled.
+    """
+    # Arrange
+    agent = MagicMock()
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    book_log_path = tmp_path / "books.jsonl"
+    metrics.configure(enabled=True, book_log_path=str(book_log_path))
+
+    # Act
+    try:
+        list(process_catalog(agent, ["books/book1.epub", "books/broken.epub"], {}, token_budget=1000))
+    finally:
+        metrics.configure(enabled=False)
+        metrics.reset()
+
+    # Assert
+    records = {record["epub_id"]: record for record in map(json.loads, book_log_path.read_text().splitlines())}
+    assert {"content_reduction_seconds", "csv_lookup_seconds", "merge_seconds"} <= set(records["book1"])
+    assert records["broken"]["error"] == "parse: corrupt archive"
+
+
+def test_process_catalog_parses_in_worker_processes(tmp_path):
+    """
+    Tests that books parsed in worker processes are analyzed and merged, with the parse timings sent back.
+    """
+    # Arrange
+    epub_file_paths = [write_epub(tmp_path / "book1.epub"), str(tmp_path / "missing.epub")]
+    agent = MagicMock()
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    book_log_path = tmp_path / "books.jsonl"
+    metrics.configure(enabled=True, book_log_path=str(book_log_path))
+
+    # Act
+    try:
+        results = list(
+            process_catalog(agent, epub_file_paths, {}, parse_workers=2, epub_backend="native", parse_processes=True)
+        )
+    finally:
+        metrics.configure(enabled=False)
+        metrics.reset()
+
+    # Assert
+    results_by_id = {result.epub_id: result for result in results}
+    assert results_by_id["book1"].book_metadata.title == "Mock Book"
+    assert results_by_id["missing"].error == "parse: No content extracted from EPUB file"
+    agent.extract_information.assert_called_once()
+    assert "Chapter 1" in agent.extract_information.call_args.kwargs["epub_content"]
+    records = {record["epub_id"]: record for record in map(json.loads, book_log_path.read_text().splitlines())}
+    assert records["book1"]["epub_parse_seconds"] > 0
+    assert records["book1"]["content_chars"] > 0
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_incremental_redoes_only_changed_stages(mock_extract_epub_data, tmp_path):
+    """
+    Tests that a changed publisher row is only merged again and a changed file or configuration is analyzed again.
+    """
+    # Arrange
+    ledger = JobLedger(str(tmp_path / "ledger.sqlite"))
+    agent = MagicMock()
+    agent.config_fingerprint.return_value = "model-v1"
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    paths = []
+    for epub_id in ("same", "row_changed", "file_changed"):
+        (tmp_path / f"{epub_id}.epub").write_bytes(b"version 1")
+        paths.append(str(tmp_path / f"{epub_id}.epub"))
+    publisher_store = {"row_changed": {"title": "Old Title", "author": "", "publishing_year": ""}}
+    list(process_catalog(agent, paths, publisher_store, ledger=ledger, incremental=True))
+    agent.extract_information.reset_mock()
+    mock_extract_epub_data.reset_mock()
+
+    # Act
+    publisher_store["row_changed"] = {"title": "New Title", "author": "", "publishing_year": ""}
+    (tmp_path / "file_changed.epub").write_bytes(b"version 2")
+    results = {
+        result.epub_id: result
+        for result in process_catalog(agent, paths, publisher_store, ledger=ledger, incremental=True)
+    }
+    parsed_after_edit = [call.kwargs["file_path"] for call in mock_extract_epub_data.call_args_list]
+    analyses_after_edit = agent.extract_information.call_count
+    agent.config_fingerprint.return_value = "model-v2"
+    list(process_catalog(agent, paths, publisher_store, ledger=ledger, incremental=True))
+
+    # Assert
+    assert results["same"].book_metadata.title == "Title same"
+    assert results["row_changed"].book_metadata.title == "New Title"
+    assert results["file_changed"].error is None
+    assert parsed_after_edit == [paths[2]]
+    assert analyses_after_edit == 1
+    assert mock_extract_epub_data.call_count == 4
+    assert agent.extract_information.call_count == 4
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_extract_epub_data)
+def test_process_catalog_packs_short_books(mock_extract_epub_data):
+    """
+    Tests that short books are analyzed in packs within the token budget and each book is merged on its own.
+    """
+    # Arrange
+    agent = MagicMock()
+    agent.extract_information.return_value = CONTENT_INFORMATION
+    packer = MagicMock(max_pack_tokens=12)
+    packer.is_packable.side_effect = lambda epub_content: epub_content != "content of long"
+    packer.extract_packed.side_effect = lambda books: {
+        epub_id: RuntimeError("invalid entry") if epub_id == "bad" else CONTENT_INFORMATION for epub_id in books
+    }
+    paths = [f"books/short{i}.epub" for i in range(5)] + ["books/long.epub", "books/bad.epub"]
+
+    # Act
+    results = {result.epub_id: result for result in process_catalog(agent, paths, {}, packer=packer)}
+
+    # Assert
+    assert all(results[f"short{i}"].book_metadata.genre == "Science Fiction" for i in range(5))
+    assert results["long"].error is None
+    assert results["bad"].error == "analyze: invalid entry"
+    agent.extract_information.assert_called_once_with(epub_content="content of long")
+    packed = [sorted(call.args[0]) for call in packer.extract_packed.call_args_list]
+    assert sorted(epub_id for books in packed for epub_id in books) == ["bad"] + [f"short{i}" for i in range(5)]
+    assert all(len(books) <= 4 for books in packed)
+
+
+def fake_editions_epub_data(file_path, backend):
+    epub_id = file_path.split("/")[-1].replace(".epub", "")
+    work = " ".join(f"word{index % 997} line{index % 13}" for index in range(3000))
+    contents = {
+        "pg1342": work,
+        "pg1342-images": work + " Illustrated by Hugh Thomson.",
+        "reissue": work.upper(),
+        "failing": "An unrelated pamphlet that the model cannot analyze " * 20,
+        "failing-copy": "An unrelated pamphlet that the model cannot analyze " * 20,
+        "other": " ".join(f"other{index % 499}" for index in range(3000)),
+    }
+    return {"dc:title": f"Title {epub_id}", "dc:creator": "EPUB Author", "dc:date": 2024}, contents[epub_id], epub_id
+
+
+@patch("src.task.process_catalog.extract_epub_data", side_effect=fake_editions_epub_data)
+def test_process_catalog_reuses_analysis_of_duplicate_editions(mock_extract_epub_data):
+    """
+    Tests that duplicate editions reuse the canonical analysis and keep their own metadata.
+    """
+    # Arrange
+    agent = MagicMock()
+
+    def extract_information(epub_content):
+        if epub_content.startswith("An unrelated pamphlet"):
+            raise RuntimeError("model failure")
+        return CONTENT_INFORMATION
+
+    agent.extract_information.side_effect = extract_information
+    publisher_store = {"reissue": {"title": "Reissued Title", "author": "", "publishing_year": "2020"}}
+    paths = [
+        f"books/{epub_id}.epub" for epub_id in ("pg1342", "pg1342-images", "reissue", "failing", "failing-copy", "other")
+    ]
+    dedup = DedupIndex()
+
+    # Act
+    results = {result.epub_id: result for result in process_catalog(agent, paths, publisher_store, dedup=dedup)}
+
+    # Assert
+    editions = ["pg1342", "pg1342-images", "reissue"]
+    canonical = [epub_id for epub_id in editions if results[epub_id].duplicate_of is None]
+    assert len(canonical) == 1
+    assert all(results[epub_id].duplicate_of in (None, canonical[0]) for epub_id in editions)
+    assert results["reissue"].book_metadata.title == "Reissued Title"
+    assert results["pg1342-images"].book_metadata.title == "Title pg1342-images"
+    assert results["failing"].error == "analyze: model failure"
+    assert results["failing-copy"].error == "analyze: model failure"
+    assert results["other"].duplicate_of is None
+    assert agent.extract_information.call_count == 4
+    assert dedup.stats.exact_duplicates + dedup.stats.near_duplicates >= 2
@@ -0,0 +1,75 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from src.task.process_queue import process_queue
+from src.task.work_queue import WorkQueue
+from tests.fixtures.books import make_book_metadata
+
+PATHS = [f"books/book{index}.epub" for index in range(6)]
+
+
+def fake_process_book(librarian_agent, epub_file_path, publisher_store, epub_backend, token_budget):
+    time.sleep(0.3 if epub_file_path.endswith("book0.epub") else 0.01)
+    if epub_file_path.endswith("book5.epub"):
+        raise ValueError("corrupt archive")
+    return make_book_metadata(epub_file_path.split("/")[-1][:-5])
+
+
+@patch("src.task.process_queue.process_book", side_effect=fake_process_book)
+def test_workers_on_two_nodes_share_the_queue(mock_process_book, tmp_path):
+    """
+    Tests that two nodes process every book exactly once, keeping a slow book's lease alive with heartbeats.
+    """
+    # Arrange
+    path = str(tmp_path / "queue.sqlite")
+    WorkQueue(path).enqueue(PATHS)
+    nodes = [WorkQueue(path, lease_seconds=0.15, max_attempts=2) for _ in range(2)]
+    stats = [None, None]
+
+    def run_node(index: int):
+        stats[index] = process_queue(
+            queue=nodes[index],
+            librarian_agent=MagicMock(),
+            publisher_store=MagicMock(),
+            worker_id=f"node-{index}",
+            workers=2,
+            heartbeat_seconds=0.03,
+            poll_seconds=0.01,
+        )
+
+    # Act
+    threads = [threading.Thread(target=run_node, args=(index,)) for index in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    processed = sorted(call.kwargs["epub_file_path"] for call in mock_process_book.call_args_list)
+    assert processed == sorted(PATHS[:5] + [PATHS[5]] * 2)
+    results = {result.epub_id: result for result in nodes[0].results()}
+    assert sorted(results) == [f"book{index}" for index in range(6)]
+    assert results["book5"].error == "process: corrupt archive"
+    assert sum(node_stats.completed for node_stats in stats) == 5
+    assert sum(node_stats.failed for node_stats in stats) == 1
+    assert sum(node_stats.lost_leases for node_stats in stats) == 0
+    assert nodes[0].is_finished()
+
+
+@patch("src.task.process_queue.process_book", side_effect=fake_process_book)
+def test_books_of_a_stopped_worker_are_picked_up_after_lease_expiry(mock_process_book, tmp_path):
+    """
+    Tests that a book claimed by a worker that stopped without finishing is processed once its lease expires.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=0.1)
+    queue.enqueue(PATHS[1:2])
+    queue.claim("stopped-node")
+
+    # Act
+    stats = process_queue(queue, MagicMock(), MagicMock(), worker_id="node-1", poll_seconds=0.02)
+
+    # Assert
+    mock_process_book.assert_called_once()
+    assert stats.completed == 1
+    assert queue.stats.reassigned == 1
@@ -0,0 +1,206 @@
+from unittest.mock import patch
+from src.task.book_model import BookResult
+from src.task.work_queue import DONE_STATUS, FAILED_STATUS, LEASED_STATUS, PENDING_STATUS, WorkQueue
+
+PATHS = ["books/a.epub", "books/b.epub"]
+
+
+def make_result(epub_id: str, error: str | None = None) -> BookResult:
+    return BookResult(epub_file_path=f"books/{epub_id}.epub", epub_id=epub_id, error=error)
+
+
+def test_enqueue_and_claim_are_exclusive_and_idempotent(tmp_path):
+    """
+    Tests that re-enqueueing skips queued books and that two workers never claim the same book.
+    """
+    # Arrange
+    path = str(tmp_path / "queue.sqlite")
+    first_node, second_node = WorkQueue(path), WorkQueue(path)
+
+    # Act
+    added = first_node.enqueue(PATHS)
+    added_again = second_node.enqueue(PATHS + ["books/c.epub"])
+    leases = [first_node.claim("node-1"), second_node.claim("node-2"), first_node.claim("node-1"), second_node.claim("node-2")]
+
+    # Assert
+    assert (added, added_again) == (2, 1)
+    assert sorted(lease.epub_id for lease in leases[:3]) == ["a", "b", "c"]
+    assert leases[3] is None
+    assert first_node.counts() == {PENDING_STATUS: 0, LEASED_STATUS: 3, DONE_STATUS: 0, FAILED_STATUS: 0}
+    first_node.close()
+    second_node.close()
+
+
+def test_expired_lease_is_reassigned_and_result_is_written_once(tmp_path):
+    """
+    Tests that a book whose lease expired is claimed again, and that the late worker neither renews nor overwrites it.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60)
+    queue.enqueue(PATHS[:1])
+    with patch("src.task.work_queue.time.time", return_value=1000.0):
+        stale = queue.claim("node-1")
+
+    # Act
+    with patch("src.task.work_queue.time.time", return_value=1100.0):
+        reassigned = queue.claim("node-2")
+        renewed = queue.heartbeat(stale)
+    completed = queue.complete(reassigned, make_result("a"))
+    late = queue.complete(stale, make_result("a", error="should not be stored"))
+
+    # Assert
+    assert reassigned.epub_id == "a"
+    assert reassigned.attempt == 2
+    assert not renewed
+    assert (completed, late) == (True, False)
+    assert [result.error for result in queue.results()] == [None]
+    assert queue.is_finished()
+    assert queue.stats.model_dump() == {
+        "claims": 2,
+        "reassigned": 1,
+        "completed": 1,
+        "retried": 0,
+        "failed": 0,
+        "duplicates": 1,
+    }
+    queue.close()
+
+
+def test_heartbeat_extends_the_lease(tmp_path):
+    """
+    Tests that a renewed lease is not claimable by another worker.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60)
+    queue.enqueue(PATHS[:1])
+    with patch("src.task.work_queue.time.time", return_value=1000.0):
+        lease = queue.claim("node-1")
+
+    # Act
+    with patch("src.task.work_queue.time.time", return_value=1050.0):
+        renewed = queue.heartbeat(lease)
+    with patch("src.task.work_queue.time.time", return_value=1100.0):
+        other = queue.claim("node-2")
+
+    # Assert
+    assert renewed
+    assert lease.expires_at == 1110.0
+    assert other is None
+    queue.close()
+
+
+def test_failed_book_is_retried_until_max_attempts(tmp_path):
+    """
+    Tests that a failing book goes back to the queue and is recorded with its error after the last attempt.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.enqueue(PATHS[:1])
+
+    # Act
+    first_attempt = queue.claim("node-1")
+    queue.fail(first_attempt, make_result("a", error="process: timeout"))
+    counts_after_first = queue.counts()
+    second_attempt = queue.claim("node-2")
+    queue.fail(second_attempt, make_result("a", error="process: timeout"))
+
+    # Assert
+    assert counts_after_first[PENDING_STATUS] == 1
+    assert second_attempt.attempt == 2
+    assert queue.counts()[FAILED_STATUS] == 1
+    assert [result.error for result in queue.results()] == ["process: timeout"]
+    assert (queue.stats.retried, queue.stats.failed) == (1, 1)
+    queue.close()
+
+
+def test_expired_lease_on_the_last_attempt_is_recorded_as_failed(tmp_path):
+    """
+    Tests that a book whose lease expired on its last attempt is failed instead of claimed again.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60, max_attempts=2)
+    queue.enqueue(PATHS[:1])
+    with patch("src.task.work_queue.time.time", return_value=1000.0):
+        queue.claim("node-1")
+    with patch("src.task.work_queue.time.time", return_value=1100.0):
+        second_attempt = queue.claim("node-2")
+
+    # Act
+    with patch("src.task.work_queue.time.time", return_value=1200.0):
+        third_attempt = queue.claim("node-3")
+
+    # Assert
+    assert second_attempt.attempt == 2
+    assert third_attempt is None
+    assert queue.counts()[FAILED_STATUS] == 1
+    assert queue.is_finished()
+    assert [result.error for result in queue.results()] == ["process: lease expired after 2 attempts"]
+    assert (queue.stats.claims, queue.stats.reassigned, queue.stats.failed) == (2, 1, 1)
+    queue.close()
+
+
+def test_stale_worker_does_not_touch_a_book_leased_by_another_worker(tmp_path):
+    """
+    Tests that a worker whose lease was reassigned can neither fail nor complete the book while the new lease is live.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60, max_attempts=2)
+    queue.enqueue(PATHS[:1])
+    with patch("src.task.work_queue.time.time", return_value=1000.0):
+        stale = queue.claim("node-1")
+    with patch("src.task.work_queue.time.time", return_value=1100.0):
+        live = queue.claim("node-2")
+
+    # Act
+    with patch("src.task.work_queue.time.time", return_value=1110.0):
+        failed = queue.fail(stale, make_result("a", error="process: timeout"))
+        completed_stale = queue.complete(stale, make_result("a", error="should not be stored"))
+        counts_after_stale = queue.counts()
+        renewed = queue.heartbeat(live)
+        stolen = queue.claim("node-3")
+    completed_live = queue.complete(live, make_result("a"))
+
+    # Assert
+    assert (failed, completed_stale) == (False, False)
+    assert counts_after_stale[LEASED_STATUS] == 1
+    assert renewed
+    assert stolen is None
+    assert completed_live
+    assert [result.error for result in queue.results()] == [None]
+    assert (queue.stats.retried, queue.stats.failed) == (0, 0)
+    queue.close()
+
+
+def test_stale_worker_completes_a_book_without_a_live_lease(tmp_path):
+    """
+    Tests that a worker whose lease expired stores its result when no other worker holds the book.
+    """
+    # Arrange
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60)
+    queue.enqueue(PATHS[:1])
+    with patch("src.task.work_queue.time.time", return_value=1000.0):
+        stale = queue.claim("node-1")
+    with patch("src.task.work_queue.time.time", return_value=1100.0):
+        expired = queue.claim("node-2")
+
+    # Act
+    with patch("src.task.work_queue.time.time", return_value=1200.0):
+        completed = queue.complete(stale, make_result("a"))
+    late = queue.complete(expired, make_result("a", error="should not be stored"))
+
+    # Assert
+    assert (completed, late) == (True, False)
+    assert [result.error for result in queue.results()] == [None]
+    queue.close()
+
+
+def test_queue_uses_a_rollback_journal(tmp_path):
+    """
+    Tests that the queue database does not use WAL, which only works between processes of one host.
+    """
+    # Act
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+
+    # Assert
+    assert queue._connection.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    queue.close()
@@ -1,6 +1,12 @@
 import json
+import subprocess
+import sys
 from unittest.mock import MagicMock, patch
-from main import main
+from main import base_librarian_agent, main
+from src.agent.cascade_librarian import CascadeLibrarian
+from src.agent.map_reduce_librarian import MapReduceLibrarian
+from src.task.process_queue import WorkerStats
+from src.task.work_queue import WorkQueue
 
 
 @patch("main.process_book")
@@ -28,17 +34,21 @@ def test_main_script_execution(mock_librarian_agent_class, mock_process_book, ca
 
     # Act
     # Execute the main function
-    main()
+    main([])
 
     # Assert
     # Verify LibrarianAgent was instantiated correctly
-    mock_librarian_agent_class.assert_called_once_with(model_name="gemini-2.5-flash")
+    mock_librarian_agent_class.assert_called_once_with(
+        model_name="gemini-2.5-flash", cache=None, requests_per_minute=None, tokens_per_minute=None, context_cache=False
+    )
 
     # Verify process_book was called with the correct arguments
     mock_process_book.assert_called_once_with(
         librarian_agent=mock_agent_instance,
         epub_file_path="./dataset/pg74.epub",
         metadata_file_path="./dataset/metadata.csv",
+        epub_backend="tika",
+        token_budget=None,
     )
 
     # Verify the agent's client was closed
@@ -53,3 +63,179 @@ def test_main_script_execution(mock_librarian_agent_class, mock_process_book, ca
     expected_colored_output = f"{GREEN}{expected_json_output}{ENDC}"
 
     assert captured.out.strip() == expected_colored_output
+
+
+@patch("main.PublisherMetadataStore")
+@patch("main.discover_epub_files")
+@patch("main.process_catalog")
+@patch("main.LibrarianAgent")
+def test_main_catalog_mode(
+    mock_librarian_agent_class, mock_process_catalog, mock_discover_epub_files, mock_publisher_store_class, tmp_path
+):
+    """
+    Tests that catalog mode shares one agent across the run and writes one JSON line per book.
+    """
+    # Arrange
+    mock_agent_instance = MagicMock()
+    mock_librarian_agent_class.return_value = mock_agent_instance
+    mock_discover_epub_files.return_value = ["books/a.epub", "books/b.epub"]
+    first_result, second_result = MagicMock(), MagicMock()
+    first_result.model_dump_json.return_value = '{"epub_id": "a"}'
+    second_result.model_dump_json.return_value = '{"epub_id": "b"}'
+    mock_process_catalog.return_value = iter([first_result, second_result])
+    output_path = tmp_path / "results.jsonl"
+
+    # Act
+    main(
+        [
+            "--catalog",
+            "books",
+            "--output",
+            str(output_path),
+            "--parse-workers",
+            "2",
+            "--model-workers",
+            "8",
+            "--epub-backend",
+            "native",
+            "--token-budget",
+            "30000",
+        ]
+    )
+
+    # Assert
+    mock_librarian_agent_class.assert_called_once_with(
+        model_name="gemini-2.5-flash", cache=None, requests_per_minute=None, tokens_per_minute=None, context_cache=False
+    )
+    mock_discover_epub_files.assert_called_once_with("books")
+    mock_process_catalog.assert_called_once_with(
+        librarian_agent=mock_agent_instance,
+        epub_file_paths=["books/a.epub", "books/b.epub"],
+        publisher_store=mock_publisher_store_class.return_value,
+        parse_workers=2,
+        model_workers=8,
+        epub_backend="native",
+        token_budget=30000,
+        ledger=None,
+        parse_processes=False,
+        incremental=False,
+        packer=None,
+        dedup=None,
+    )
+    mock_publisher_store_class.assert_called_once_with(file_path="./dataset/metadata.csv", separator="\t")
+    assert output_path.read_text().splitlines() == ['{"epub_id": "a"}', '{"epub_id": "b"}']
+    mock_publisher_store_class.return_value.close.assert_called_once()
+    mock_agent_instance.client.close.assert_called_once()
+
+
+def test_main_import_defers_model_and_tika_backends():
+    """
+    Tests that importing main in a fresh interpreter does not load the Gemini, outlines or Tika clients.
+    """
+    # Arrange
+    heavy_modules = ["outlines", "google.genai", "tika", "requests"]
+    code = f"import sys, main; print([name for name in {heavy_modules!r} if name in sys.modules])"
+
+    # Act
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    # Assert
+    assert completed.stdout.strip() == "[]"
+
+
+@patch("main.process_book")
+@patch("main.LibrarianAgent")
+def test_main_reads_paths_and_model_from_arguments(mock_librarian_agent_class, mock_process_book):
+    """
+    Tests that the EPUB file, the publisher metadata and the model are taken from the command line.
+    """
+    # Arrange
+    mock_process_book.return_value.model_dump_json.return_value = "{}"
+
+    # Act
+    main(["books/pg1342.epub", "--metadata", "feed.csv", "--model", "gemini-2.5-pro"])
+
+    # Assert
+    assert mock_librarian_agent_class.call_args.kwargs["model_name"] == "gemini-2.5-pro"
+    assert mock_process_book.call_args.kwargs["epub_file_path"] == "books/pg1342.epub"
+    assert mock_process_book.call_args.kwargs["metadata_file_path"] == "feed.csv"
+
+
+@patch("main.process_book")
+@patch("main.LibrarianAgent")
+def test_main_limits_the_model_rate(mock_librarian_agent_class, mock_process_book):
+    """
+    Tests that --rpm and --tpm set the request and token limits of --model.
+    """
+    # Arrange
+    mock_process_book.return_value.model_dump_json.return_value = "{}"
+
+    # Act
+    main(["--rpm", "150", "--tpm", "1000000"])
+
+    # Assert
+    assert mock_librarian_agent_class.call_args.kwargs["requests_per_minute"] == 150
+    assert mock_librarian_agent_class.call_args.kwargs["tokens_per_minute"] == 1_000_000
+    mock_librarian_agent_class.return_value.retry_stats.model_dump.assert_called_once()
+
+
+@patch("main.process_book")
+@patch("main.LibrarianAgent")
+def test_main_cascade_mode(mock_librarian_agent_class, mock_process_book):
+    """
+    Tests that --cascade-model analyzes the book through a cascade from the cheap model to --model.
+    """
+    # Arrange
+    mock_process_book.return_value.model_dump_json.return_value = "{}"
+
+    # Act
+    main(["--cascade-model", "gemini-2.5-flash-lite", "--cascade-sample-tokens", "4000"])
+
+    # Assert
+    model_names = [call.kwargs["model_name"] for call in mock_librarian_agent_class.call_args_list]
+    assert model_names == ["gemini-2.5-flash", "gemini-2.5-flash-lite"]
+    cascade = mock_process_book.call_args.kwargs["librarian_agent"]
+    assert cascade.sample_tokens == 4000
+    assert cascade.strong_agent is mock_librarian_agent_class.return_value
+
+
+@patch("main.PublisherMetadataStore")
+@patch("main.process_queue")
+@patch("main.discover_epub_files", return_value=["books/a.epub", "books/b.epub"])
+@patch("main.LibrarianAgent")
+def test_main_queue_mode(
+    mock_librarian_agent_class, mock_discover_epub_files, mock_process_queue, mock_publisher_store_class, tmp_path
+):
+    """
+    Tests that --queue enqueues the catalog, works the queue and exports the stored results.
+    """
+    # Arrange
+    queue_path = str(tmp_path / "queue.sqlite")
+    output_path = tmp_path / "results.jsonl"
+    mock_process_queue.return_value = WorkerStats(claimed=2, completed=2)
+
+    # Act
+    main(["--catalog", "books", "--queue", queue_path, "--worker-id", "node-1", "--output", str(output_path)])
+
+    # Assert
+    kwargs = mock_process_queue.call_args.kwargs
+    assert kwargs["librarian_agent"] is mock_librarian_agent_class.return_value
+    assert kwargs["worker_id"] == "node-1"
+    assert WorkQueue(queue_path).counts()["pending"] == 2
+    assert output_path.read_text() == ""
+    mock_publisher_store_class.return_value.close.assert_called_once()
+
+
+def test_base_librarian_agent_unwraps_analyzers():
+    """
+    Tests that batch and packed requests use the agent of --model behind the map-reduce and cascade wrappers.
+    """
+    # Arrange
+    agent = MagicMock()
+    map_reduce = MapReduceLibrarian(librarian_agent=agent)
+    cascade = CascadeLibrarian(cheap_agent=MagicMock(), strong_agent=map_reduce)
+
+    # Act & Assert
+    assert base_librarian_agent(agent) is agent
+    assert base_librarian_agent(map_reduce) is agent
+    assert base_librarian_agent(cascade) is agent
@@ -0,0 +1,57 @@
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTikaServer(ThreadingHTTPServer):
+    """Records the size of every parsed file."""
+
+    parsed_sizes: list[int]
+
+
+class FakeTikaHandler(BaseHTTPRequestHandler):
+    """Answers the Tika server endpoints used by TikaServerPool."""
+
+    server: FakeTikaServer
+
+    def do_GET(self):
+        if self.path != "/version":
+            self.send_error(404)
+            return
+        self._reply("text/plain", b"Apache Tika 3.2.0")
+
+    def do_PUT(self):
+        if self.path != "/rmeta/text":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.parsed_sizes.append(len(body))
+        documents = [
+            {"dc:title": "Fake Book", "X-TIKA:content": f"{len(body)} bytes on {self.server.server_port}"},
+            {"dc:title": "Chapter", "X-TIKA:content": "\nembedded"},
+        ]
+        self._reply("application/json", json.dumps(documents).encode("utf-8"))
+
+    def _reply(self, content_type: str, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(host: str = "127.0.0.1", port: int = 0) -> FakeTikaServer:
+    server = FakeTikaServer((host, port), FakeTikaHandler)
+    server.parsed_sizes = []
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9998)
+    args = parser.parse_args()
+    create_server(args.host, args.port).serve_forever()
@@ -0,0 +1,41 @@
+from src.tool.catalog import discover_epub_files
+
+
+def test_discover_epub_files_from_directory(tmp_path):
+    """
+    Tests that a directory source is searched recursively for EPUB files only.
+    """
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "b.epub").touch()
+    (tmp_path / "nested" / "a.epub").touch()
+    (tmp_path / "notes.txt").touch()
+
+    assert discover_epub_files(str(tmp_path)) == [str(tmp_path / "b.epub"), str(tmp_path / "nested" / "a.epub")]
+
+
+def test_discover_epub_files_from_glob(tmp_path):
+    """
+    Tests that a glob source only returns matching EPUB files.
+    """
+    (tmp_path / "pg1.epub").touch()
+    (tmp_path / "pg2.epub").touch()
+    (tmp_path / "other.epub").touch()
+
+    assert discover_epub_files(str(tmp_path / "pg*")) == [str(tmp_path / "pg1.epub"), str(tmp_path / "pg2.epub")]
+
+
+def test_discover_epub_files_from_manifest(tmp_path):
+    """
+    Tests that a manifest keeps its order, skips comments and blank lines, and resolves relative paths.
+    """
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# nightly run\nz.epub\n\n/abs/a.epub\n")
+
+    assert discover_epub_files(str(manifest)) == [str(tmp_path / "z.epub"), "/abs/a.epub"]
+
+
+def test_discover_epub_files_single_file():
+    """
+    Tests that a single EPUB path is returned as is.
+    """
+    assert discover_epub_files("dataset/pg74.epub") == ["dataset/pg74.epub"]
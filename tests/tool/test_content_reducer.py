@@ -0,0 +1,117 @@
+from src.tool.content_reducer import (
+    CHUNK_SEPARATOR,
+    estimate_tokens,
+    reduce_content,
+    select_chunks,
+    strip_boilerplate,
+)
+
+GUTENBERG_BOOK = """The Project Gutenberg eBook of Mock Book
+This ebook is for the use of anyone anywhere in the United States.
+*** START OF THE PROJECT GUTENBERG EBOOK MOCK BOOK ***
+Produced by Volunteer Transcribers
+
+CONTENTS
+Chapter I
+Chapter II
+
+Chapter I
+""" + "It was a dark and stormy night, and the rain fell in torrents except at occasional intervals. " * 3 + """
+Chapter II
+The end of the story.
+*** END OF THE PROJECT GUTENBERG EBOOK MOCK BOOK ***
+Section 1. General Terms of Use and Redistributing Project Gutenberg electronic works
+"""
+
+
+def test_estimate_tokens():
+    """
+    Tests the four characters per token estimate.
+    """
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_strip_boilerplate_removes_gutenberg_header_license_and_contents():
+    """
+    Tests that the Gutenberg header, license, production credits and table of contents are removed.
+    """
+    stripped = strip_boilerplate(GUTENBERG_BOOK)
+
+    assert stripped.startswith("Chapter I\nIt was a dark and stormy night")
+    assert stripped.endswith("Chapter II\nThe end of the story.")
+    assert "Project Gutenberg" not in stripped
+    assert "Produced by" not in stripped
+
+
+def test_strip_boilerplate_keeps_short_line_text_after_contents():
+    """
+    Tests that poetry after a table of contents is kept, ending the contents at the blank line after its entries.
+    """
+    poems = "\n\n".join(f"Poem {index}\nA short line of verse,\nAnother short line,\nAnd a last one." for index in range(2000))
+    book = "POEMS\nby Emily Dickinson\n\nCONTENTS\nI. Life\nII. Love\nIII. Nature\n\n" + poems
+    unbroken = "CONTENTS\n" + poems.replace("\n\n", "\n")
+
+    stripped = strip_boilerplate(book)
+    reduced = reduce_content(unbroken, token_budget=2000)
+
+    assert stripped.startswith("POEMS\nby Emily Dickinson\n\nPoem 0\n")
+    assert "II. Love" not in stripped
+    assert stripped.endswith("Poem 1999\nA short line of verse,\nAnother short line,\nAnd a last one.")
+    assert len(strip_boilerplate(unbroken)) > len(unbroken) * 0.9
+    assert reduced.content.strip()
+
+
+def test_select_chunks_keeps_content_within_budget():
+    """
+    Tests that content within the budget is returned unchanged.
+    """
+    assert select_chunks("short content", token_budget=100) == "short content"
+
+
+def test_select_chunks_samples_opening_middle_and_ending():
+    """
+    Tests that long content is sampled down to the budget, keeping the opening and the ending.
+    """
+    paragraphs = [f"Paragraph {index:05d} " + "word " * 40 for index in range(2000)]
+    content = "\n".join(paragraphs)
+
+    selected = select_chunks(content, token_budget=10000)
+    chunks = selected.split(CHUNK_SEPARATOR)
+
+    assert estimate_tokens(selected) <= 10000
+    assert chunks[0].startswith("Paragraph 00000")
+    assert chunks[-1].endswith(paragraphs[-1].strip())
+    assert len(chunks) >= 3
+    assert all(chunk.startswith("Paragraph") for chunk in chunks)
+
+
+def test_reduce_content_reports_saved_tokens():
+    """
+    Tests that the reduction reports the tokens before and after.
+    """
+    content = "\n".join("word " * 40 for _ in range(1000))
+
+    reduced = reduce_content(content, token_budget=2000)
+
+    assert reduced.original_tokens == estimate_tokens(content)
+    assert reduced.reduced_tokens == estimate_tokens(reduced.content)
+    assert reduced.reduced_tokens <= 2000
+    assert reduced.saved_tokens == reduced.original_tokens - reduced.reduced_tokens
+
+
+def test_select_chunks_samples_the_middle_of_text_with_few_newlines():
+    """
+    Tests that content without line breaks is sampled from its middle instead of repeating the opening.
+    """
+    content = " ".join(f"w{index:06d}" for index in range(20000))
+
+    selected = select_chunks(content, token_budget=6000)
+    chunks = selected.split(CHUNK_SEPARATOR)
+
+    assert estimate_tokens(selected) <= 6000
+    assert chunks[0].startswith("w000000")
+    assert len(chunks) >= 3
+    assert len(set(chunks)) == len(chunks)
+    assert all(not chunk.startswith("w000000") for chunk in chunks[1:])
@@ -1,4 +1,6 @@
-from src.tool.csv_parser import read_publisher_metadata
+import tracemalloc
+from benchmarks.corpus import write_publisher_tsv
+from src.tool.csv_parser import CompactPublisherMetadata, PublisherRow, iter_publisher_metadata, read_publisher_metadata
 
 
 def test_read_publisher_metadata():
@@ -25,3 +27,64 @@ def test_read_publisher_metadata():
 
     actual_metadata = read_publisher_metadata("tests/fixtures/sample_data.csv")
     assert actual_metadata == expected_metadata
+
+
+def test_iter_publisher_metadata_filters_epub_ids():
+    """
+    Tests that streaming yields rows in file order and keeps only the requested EPUB identifiers.
+    """
+    rows = list(iter_publisher_metadata("tests/fixtures/sample_data.csv", epub_ids={"3", "1", "missing"}))
+
+    assert rows == [PublisherRow("1", "Book One", "Author A", "2021"), PublisherRow("3", "Book Three", "Author C", "2023")]
+    assert read_publisher_metadata("tests/fixtures/sample_data.csv", epub_ids=["2"]) == {
+        "2": {"title": "Book Two", "author": "Author B", "publishing_year": "2022"}
+    }
+
+
+def test_compact_publisher_metadata_matches_dict_lookups(tmp_path):
+    """
+    Tests that the compact index returns the same rows as read_publisher_metadata, with later duplicates winning.
+    """
+    # Arrange
+    tsv_path = write_publisher_tsv(str(tmp_path / "metadata.tsv"), rows=1000, epub_ids=["pg1", "pg2"])
+    with open(tsv_path, mode="a", encoding="utf-8") as file:
+        file.write("pg1\tNew Title\tNew Author\t1999\n")
+
+    # Act
+    expected = read_publisher_metadata(tsv_path, separator="\t")
+    compact = CompactPublisherMetadata.from_file(tsv_path, separator="\t")
+
+    # Assert
+    assert len(compact) == len(expected) == 1000
+    assert all(compact.get(epub_id) == metadata for epub_id, metadata in expected.items())
+    assert compact.get("pg1") == {"title": "New Title", "author": "New Author", "publishing_year": "1999"}
+    assert compact.get("missing", {}) == {}
+    assert "pg2" in compact
+    assert "missing" not in compact
+
+
+def test_compact_publisher_metadata_uses_a_fraction_of_the_memory(tmp_path):
+    """
+    Tests that the compact index and filtered streaming need far less memory than the dict of dicts.
+    """
+    # Arrange
+    tsv_path = write_publisher_tsv(str(tmp_path / "metadata.tsv"), rows=50_000)
+
+    def peak_memory(load):
+        tracemalloc.start()
+        try:
+            result = load()
+            return tracemalloc.get_traced_memory()[1], result
+        finally:
+            tracemalloc.stop()
+
+    # Act
+    dict_peak, publisher_metadata = peak_memory(lambda: read_publisher_metadata(tsv_path, separator="\t"))
+    compact_peak, compact = peak_memory(lambda: CompactPublisherMetadata.from_file(tsv_path, separator="\t"))
+    filtered_peak, filtered = peak_memory(lambda: read_publisher_metadata(tsv_path, separator="\t", epub_ids={"filler7"}))
+
+    # Assert
+    assert len(publisher_metadata) == len(compact) == 50_000
+    assert list(filtered) == ["filler7"]
+    assert compact_peak * 5 < dict_peak
+    assert filtered_peak * 100 < dict_peak
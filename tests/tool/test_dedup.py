@@ -0,0 +1,117 @@
+import random
+from src.tool.dedup import (
+    ContentFingerprint,
+    DedupIndex,
+    estimate_similarity,
+    fingerprint_content,
+    minhash_signature,
+    normalize_text,
+)
+
+
+def make_text(seed: int, words: int = 5000) -> str:
+    generator = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(2000)]
+    return " ".join(generator.choice(vocabulary) for _ in range(words))
+
+
+def fingerprint(content: str, min_words: int = 0) -> ContentFingerprint:
+    content_fingerprint = fingerprint_content(content, min_words)
+    assert content_fingerprint is not None
+    return content_fingerprint
+
+
+def test_normalize_text_ignores_boilerplate_case_and_punctuation():
+    """
+    Tests that Gutenberg boilerplate, case, punctuation and line wrapping do not change the normalized text.
+    """
+    # Arrange
+    plain = "It is a truth universally acknowledged, that a single man"
+    edition = (
+        "The Project Gutenberg eBook of Pride and Prejudice, Illustrated\n"
+        "*** START OF THE PROJECT GUTENBERG EBOOK PRIDE AND PREJUDICE ***\n"
+        "IT IS A TRUTH universally\nacknowledged -- that a single man!\n"
+        "*** END OF THE PROJECT GUTENBERG EBOOK PRIDE AND PREJUDICE ***\n"
+        "Updated editions will replace the previous one."
+    )
+
+    # Act & Assert
+    assert normalize_text(edition) == normalize_text(plain)
+    assert fingerprint(edition).exact == fingerprint(plain).exact
+
+
+def test_signatures_estimate_similarity():
+    """
+    Tests that a lightly edited edition has a similar signature and an unrelated text does not.
+    """
+    # Arrange
+    words = normalize_text(make_text(seed=1))
+    edited = words[:2500] + ["illustration", "plate", "one"] + words[2500:4900]
+    unrelated = normalize_text(make_text(seed=2))
+
+    # Act
+    signature = minhash_signature(words)
+
+    # Assert
+    assert len(signature) == 128
+    assert estimate_similarity(signature, minhash_signature(edited)) > 0.8
+    assert estimate_similarity(signature, minhash_signature(unrelated)) < 0.1
+    assert minhash_signature(words) == signature
+
+
+def test_dedup_index_finds_exact_and_near_duplicates():
+    """
+    Tests that the index returns the canonical edition for exact and near duplicates, and nothing for new works.
+    """
+    # Arrange
+    original = make_text(seed=1)
+    index = DedupIndex(threshold=0.8)
+    index.add("pg1342", fingerprint(original))
+
+    # Act
+    exact = index.find(fingerprint(original.upper()))
+    near = index.find(fingerprint(original + " with illustrations by Hugh Thomson"))
+    unrelated = index.find(fingerprint(make_text(seed=2)))
+
+    # Assert
+    assert exact == "pg1342"
+    assert near == "pg1342"
+    assert unrelated is None
+    assert index.stats.model_dump() == {"books": 1, "exact_duplicates": 1, "near_duplicates": 1}
+
+
+def test_dedup_index_remove_forgets_the_edition():
+    """
+    Tests that a removed edition is no longer returned.
+    """
+    # Arrange
+    content_fingerprint = fingerprint(make_text(seed=1))
+    index = DedupIndex()
+    index.add("pg1342", content_fingerprint)
+
+    # Act
+    index.remove("pg1342")
+
+    # Assert
+    assert index.find(content_fingerprint) is None
+    assert index.stats.books == 0
+
+
+def test_short_texts_are_not_deduplicated():
+    """
+    Tests that collections sharing a title page and a contents page of short lines are not duplicates.
+    """
+    # Arrange
+    title_page = "*** START OF THE PROJECT GUTENBERG EBOOK POEMS ***\nPOEMS\nby Emily Dickinson\n\nContents\n"
+    first_series = title_page + "\n".join(f"Poem {index}" for index in range(40)) + "\n\n" + make_text(seed=1, words=400)
+    second_series = title_page + "\n".join(f"Poem {index}" for index in range(40)) + "\n\n" + make_text(seed=2, words=400)
+    index = DedupIndex()
+    index.add("pg2678", fingerprint(first_series))
+
+    # Act
+    duplicate = index.find(fingerprint(second_series))
+    title_only = fingerprint_content(title_page)
+
+    # Assert
+    assert duplicate is None
+    assert title_only is None
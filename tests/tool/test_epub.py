@@ -1,9 +1,11 @@
 from unittest.mock import patch
 from unittest.mock import MagicMock
-from src.tool.epub import extract_epub_data
+import pytest
+from src.tool.epub import EpubContent, extract_epub_data, iter_content_parts, use_tika_servers, utf8_length
+from tests.tool.test_epub_reader import write_epub
 
 
-@patch("src.tool.epub.parser.from_file")
+@patch("tika.parser.from_file")
 def test_extract_epub_data(mock_from_file):
     """
     Tests the extract_epub_data function with a mocked EPUB file.
@@ -23,7 +25,7 @@ def test_extract_epub_data(mock_from_file):
 
 
 @patch("src.tool.epub.get_logger")
-@patch("src.tool.epub.parser.from_file")
+@patch("tika.parser.from_file")
 def test_extract_epub_data_parsing_error(mock_from_file, mock_get_logger):
     """
     Tests the extract_epub_data function when parser.from_file raises an exception.
@@ -43,7 +45,7 @@ def test_extract_epub_data_parsing_error(mock_from_file, mock_get_logger):
     mock_logger.info.assert_called_once_with("Failed to parse EPUB file: Test parsing error")
 
 
-@patch("src.tool.epub.parser.from_file")
+@patch("tika.parser.from_file")
 def test_extract_epub_data_no_metadata(mock_from_file):
     """
     Tests the extract_epub_data function when the parsed data has no metadata.
@@ -61,7 +63,7 @@ def test_extract_epub_data_no_metadata(mock_from_file):
     mock_from_file.assert_called_once_with(file_path)
 
 
-@patch("src.tool.epub.parser.from_file")
+@patch("tika.parser.from_file")
 def test_extract_epub_data_no_content(mock_from_file):
     """
     Tests the extract_epub_data function when the parsed data has no content.
@@ -79,7 +81,7 @@ def test_extract_epub_data_no_content(mock_from_file):
     mock_from_file.assert_called_once_with(file_path)
 
 
-@patch("src.tool.epub.parser.from_file")
+@patch("tika.parser.from_file")
 def test_extract_epub_data_empty_data(mock_from_file):
     """
     Tests the extract_epub_data function when the parsed data is empty.
@@ -93,3 +95,99 @@ def test_extract_epub_data_empty_data(mock_from_file):
     assert metadata == {}
     assert content == ""
     mock_from_file.assert_called_once_with(file_path)
+
+
+@patch("tika.parser.from_file")
+def test_extract_epub_data_native_backend(mock_from_file, tmp_path):
+    """
+    Tests that the native backend reads the EPUB without going through Tika.
+    """
+    file_path = write_epub(tmp_path / "native_book.epub")
+
+    metadata, content, epub_id = extract_epub_data(file_path, backend="native")
+
+    assert epub_id == "native_book"
+    assert metadata["dc:title"] == "Mock Book"
+    assert content.startswith("Chapter 1\nIt is a truth universally acknowledged.")
+    assert content.endswith("Chapter 2\nThe end.\nFin.")
+    mock_from_file.assert_not_called()
+
+
+def test_extract_epub_data_native_backend_lazy(tmp_path):
+    """
+    Tests that lazy content is read from the EPUB on demand, one chapter at a time, and matches the eager content.
+    """
+    # Arrange
+    file_path = write_epub(tmp_path / "native_book.epub")
+    _, eager_content, _ = extract_epub_data(file_path, backend="native")
+
+    # Act
+    metadata, content, epub_id = extract_epub_data(file_path, backend="native", lazy=True)
+
+    # Assert
+    assert isinstance(content, EpubContent)
+    assert metadata["dc:title"] == "Mock Book"
+    assert str(content) == eager_content
+    assert list(content.iter_parts())[1] == "\n\n"
+    assert "".join(iter_content_parts(content)) == eager_content
+    assert utf8_length(content) == len(eager_content.encode("utf-8"))
+
+
+def test_iter_content_parts_slices_strings():
+    """
+    Tests that strings are measured in slices that join back to the string.
+    """
+    # Arrange
+    content = "é" * 10 + "a" * 5
+
+    # Act
+    with patch("src.tool.epub.CONTENT_CHUNK_CHARS", 4):
+        parts = list(iter_content_parts(content))
+        length = utf8_length(content)
+
+    # Assert
+    assert "".join(parts) == content
+    assert len(parts) == 4
+    assert length == len(content.encode("utf-8"))
+
+
+def test_extract_epub_data_native_backend_parsing_error(tmp_path):
+    """
+    Tests that native backend failures are handled like Tika failures.
+    """
+    file_path = tmp_path / "error_book.epub"
+    file_path.write_bytes(b"not a zip file")
+
+    metadata, content, epub_id = extract_epub_data(str(file_path), backend="native")
+
+    assert (metadata, content, epub_id) == ({}, "", "error_book")
+
+
+def test_extract_epub_data_unknown_backend():
+    """
+    Tests that an unknown backend is rejected.
+    """
+    with pytest.raises(ValueError, match="Unknown EPUB backend"):
+        extract_epub_data("a/b/c/mock_book.epub", backend="calibre")
+
+
+@patch("tika.parser.from_file")
+def test_extract_epub_data_uses_tika_server_pool(mock_from_file):
+    """
+    Tests that the tika backend parses through the configured server pool instead of tika-python's own server.
+    """
+    # Arrange
+    tika_servers = MagicMock()
+    tika_servers.parse.return_value = {"metadata": {"dc:title": "Pooled"}, "content": "Pooled content."}
+    use_tika_servers(tika_servers)
+
+    # Act
+    try:
+        metadata, content, epub_id = extract_epub_data("books/pooled.epub")
+    finally:
+        use_tika_servers(None)
+
+    # Assert
+    assert (metadata, content, epub_id) == ({"dc:title": "Pooled"}, "Pooled content.", "pooled")
+    tika_servers.parse.assert_called_once_with("books/pooled.epub")
+    mock_from_file.assert_not_called()
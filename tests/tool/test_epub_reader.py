@@ -0,0 +1,78 @@
+import zipfile
+import pytest
+from src.tool.epub_reader import EpubReader, html_to_text
+
+CONTAINER_XML = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+CONTENT_OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title>Mock Book</dc:title>
+    <dc:creator>Author A</dc:creator>
+    <dc:creator>Author B</dc:creator>
+    <dc:date>1813</dc:date>
+    <dc:language>en</dc:language>
+  </metadata>
+  <manifest>
+    <item id="ch2" href="text/chapter%202.xhtml" media-type="application/xhtml+xml"/>
+    <item id="ch1" href="text/chapter1.xhtml" media-type="application/xhtml+xml"/>
+    <item id="cover" href="images/cover.jpg" media-type="image/jpeg"/>
+    <item id="missing" href="text/missing.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="ch1"/><itemref idref="cover"/><itemref idref="missing"/><itemref idref="ch2"/></spine>
+</package>"""
+
+CHAPTER_1 = """<html><head><title>Ignored</title><style>p {}</style></head>
+<body><h1>Chapter 1</h1><p>It is a truth   universally
+acknowledged.</p><p>Caf&eacute; &amp; more</p></body></html>"""
+
+CHAPTER_2 = "<html><body><h1>Chapter 2</h1><p>The end.<br/>Fin.</p></body></html>"
+
+
+def write_epub(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("mimetype", "application/epub+zip")
+        archive.writestr("META-INF/container.xml", CONTAINER_XML)
+        archive.writestr("OEBPS/content.opf", CONTENT_OPF)
+        archive.writestr("OEBPS/text/chapter1.xhtml", CHAPTER_1)
+        archive.writestr("OEBPS/text/chapter 2.xhtml", CHAPTER_2)
+    return str(path)
+
+
+def test_html_to_text():
+    """
+    Tests that markup, head content and redundant whitespace are removed while paragraphs stay on separate lines.
+    """
+    assert html_to_text(CHAPTER_1) == "Chapter 1\nIt is a truth universally acknowledged.\nCafé & more"
+
+
+def test_epub_reader_metadata_and_spine_order(tmp_path):
+    """
+    Tests that the reader exposes Dublin Core metadata and yields chapter text in spine order.
+    """
+    with EpubReader(write_epub(tmp_path / "book.epub")) as reader:
+        assert reader.metadata == {
+            "dc:title": "Mock Book",
+            "dc:creator": "Author A, Author B",
+            "dc:date": "1813",
+            "dc:language": "en",
+        }
+        assert reader.spine == ["OEBPS/text/chapter1.xhtml", "OEBPS/text/missing.xhtml", "OEBPS/text/chapter 2.xhtml"]
+        chapters = reader.iter_chapters()
+        assert next(chapters).startswith("Chapter 1\nIt is a truth")
+        assert next(chapters) == "Chapter 2\nThe end.\nFin."
+        assert next(chapters, None) is None
+
+
+def test_epub_reader_rejects_invalid_archive(tmp_path):
+    """
+    Tests that a file that is not an EPUB archive raises an error.
+    """
+    path = tmp_path / "broken.epub"
+    path.write_bytes(b"not a zip file")
+
+    with pytest.raises(zipfile.BadZipFile):
+        EpubReader(str(path))
@@ -0,0 +1,48 @@
+import os
+from unittest.mock import patch
+from src.tool.publisher_store import PublisherMetadataStore
+
+
+def write_feed(path, rows):
+    path.write_text("id\ttitle\tauthor\tpublishing_year\n" + "".join("\t".join(row) + "\n" for row in rows))
+
+
+def test_publisher_store_lookup(tmp_path):
+    """
+    Tests point lookups against the indexed publisher metadata.
+    """
+    feed = tmp_path / "metadata.csv"
+    write_feed(feed, [("pg1", "Book One", "Author A", "2021"), ("pg2", "Book Two", "Author B", "2022")])
+
+    store = PublisherMetadataStore(str(feed))
+
+    assert store.get("pg2") == {"title": "Book Two", "author": "Author B", "publishing_year": "2022"}
+    assert store.get("missing") is None
+    assert store.get("missing", {}) == {}
+    assert "pg1" in store
+    assert len(store) == 2
+    assert os.path.exists(f"{feed}.sqlite")
+    store.close()
+
+
+def test_publisher_store_reuses_index_until_feed_changes(tmp_path):
+    """
+    Tests that the index is only rebuilt when the CSV file changes.
+    """
+    feed = tmp_path / "metadata.csv"
+    index = tmp_path / "feed.sqlite"
+    write_feed(feed, [("pg1", "Book One", "Author A", "2021")])
+    PublisherMetadataStore(str(feed), index_path=str(index)).close()
+
+    with patch.object(PublisherMetadataStore, "_rebuild") as mock_rebuild:
+        PublisherMetadataStore(str(feed), index_path=str(index)).close()
+        mock_rebuild.assert_not_called()
+
+    write_feed(feed, [("pg1", "Book One (Revised)", "Author A", "2021"), ("pg3", "Book Three", "Author C", "2023")])
+    stat = os.stat(feed)
+    os.utime(feed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    store = PublisherMetadataStore(str(feed), index_path=str(index))
+    assert store.get("pg1")["title"] == "Book One (Revised)"
+    assert store.get("pg3")["author"] == "Author C"
+    store.close()
@@ -0,0 +1,125 @@
+import os
+import socket
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from src.tool.tika_server import TikaServerError, TikaServerPool, rmeta_to_epub_data
+from tests.tool.fake_tika_server import create_server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_servers():
+    servers = [create_server() for _ in range(2)]
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_rmeta_to_epub_data_joins_documents():
+    """
+    Tests that the content of every document is joined and repeated metadata keys collect their values.
+    """
+    documents = [
+        {"dc:title": "Book", "dc:creator": "Author", "X-TIKA:content": "Part one."},
+        {"dc:title": "Chapter", "X-TIKA:content": " Part two."},
+        {"dc:title": "Image"},
+    ]
+
+    assert rmeta_to_epub_data(documents) == {
+        "metadata": {"dc:title": ["Book", "Chapter", "Image"], "dc:creator": "Author"},
+        "content": "Part one. Part two.",
+    }
+    assert rmeta_to_epub_data([{"dc:title": "Empty"}])["content"] is None
+
+
+def test_pool_spreads_parses_across_servers(fake_servers, tmp_path):
+    """
+    Tests that parses are sent round-robin to every server with the whole file in the request body.
+    """
+    # Arrange
+    endpoints = [f"http://127.0.0.1:{server.server_port}/" for server in fake_servers]
+    epub_path = tmp_path / "book.epub"
+    epub_path.write_bytes(b"x" * 100_000)
+
+    # Act
+    with TikaServerPool(endpoints=endpoints) as pool:
+        results = [pool.parse(str(epub_path)) for _ in range(4)]
+
+    # Assert
+    assert [server.parsed_sizes for server in fake_servers] == [[100_000, 100_000], [100_000, 100_000]]
+    assert results[0]["content"] == f"100000 bytes on {fake_servers[0].server_port}\nembedded"
+    assert results[1]["content"] == f"100000 bytes on {fake_servers[1].server_port}\nembedded"
+    assert results[0]["metadata"]["dc:title"] == ["Fake Book", "Chapter"]
+
+
+def test_pool_rejects_unhealthy_endpoints_and_unstarted_use(tmp_path):
+    """
+    Tests that an endpoint that never answers fails the start and that parsing requires a started pool.
+    """
+    pool = TikaServerPool(endpoints=[f"http://127.0.0.1:{free_port()}"], startup_timeout_seconds=0.5)
+
+    with pytest.raises(TikaServerError, match="not healthy"):
+        pool.start()
+    with pytest.raises(TikaServerError, match="not started"):
+        pool.parse(str(tmp_path / "book.epub"))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="starts the fake server through a shell script")
+def test_pool_starts_and_stops_servers(tmp_path, monkeypatch):
+    """
+    Tests that the pool starts a server process from the jar, waits until it is healthy and stops it on close.
+    """
+    # Arrange
+    fake_java = tmp_path / "java"
+    fake_java.write_text(f'#!/bin/sh\nshift 2\nexec "{sys.executable}" -m tests.tool.fake_tika_server "$@"\n')
+    fake_java.chmod(0o755)
+    monkeypatch.setenv("PYTHONPATH", REPO_ROOT)
+    epub_path = tmp_path / "book.epub"
+    epub_path.write_bytes(b"epub")
+    pool = TikaServerPool(jar_path="tika-server.jar", base_port=free_port(), java_path=str(fake_java))
+
+    # Act
+    with pool:
+        process = pool._processes[0]
+        result = pool.parse(str(epub_path))
+
+    # Assert
+    assert result["content"].startswith("4 bytes on ")
+    assert process.poll() is not None
+    assert pool._processes == []
+
+
+def test_pool_launches_every_server_before_waiting_for_any():
+    """
+    Tests that every server process is launched before the first health check, so the servers start concurrently.
+    """
+    # Arrange
+    pool = TikaServerPool(jar_path="tika-server.jar", instances=3, base_port=9998)
+    launched_at_first_check = []
+
+    def is_healthy(endpoint):
+        launched_at_first_check.append(popen.call_count)
+        return True
+
+    # Act
+    with patch("src.tool.tika_server.subprocess.Popen", return_value=MagicMock()) as popen:
+        with patch.object(pool, "is_healthy", side_effect=is_healthy):
+            pool.start()
+    pool.close()
+
+    # Assert
+    assert launched_at_first_check[0] == 3
+    assert pool.endpoints == ["http://127.0.0.1:9998", "http://127.0.0.1:9999", "http://127.0.0.1:10000"]
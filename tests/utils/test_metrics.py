@@ -0,0 +1,96 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+from src.utils.metrics import MetricsRegistry
+
+
+def test_disabled_registry_records_nothing(tmp_path):
+    """
+    Tests that a disabled registry ignores measurements and leaves functions unwrapped.
+    """
+    registry = MetricsRegistry()
+
+    registry.observe("prompt_tokens", 100)
+    with registry.time_stage("epub_parse"):
+        pass
+    registry.finish_book("pg1")
+
+    assert registry.to_prometheus() == ""
+    assert registry.bind("pg1", len) is len
+
+
+@patch("src.utils.metrics.time.perf_counter", side_effect=[10.0, 10.3])
+def test_time_stage_exports_prometheus_histogram(mock_perf_counter):
+    """
+    Tests that stage timings use the monotonic clock and are exported as cumulative Prometheus buckets.
+    """
+    registry = MetricsRegistry()
+    registry.configure(enabled=True)
+
+    with registry.time_stage("epub_parse"):
+        pass
+    registry.observe("prompt_tokens", 3000)
+
+    exposition = registry.to_prometheus()
+    assert "# TYPE epub_stage_duration_seconds histogram" in exposition
+    assert 'epub_stage_duration_seconds_bucket{stage="epub_parse",le="0.25"} 0' in exposition
+    assert 'epub_stage_duration_seconds_bucket{stage="epub_parse",le="0.5"} 1' in exposition
+    assert 'epub_stage_duration_seconds_bucket{stage="epub_parse",le="+Inf"} 1' in exposition
+    assert 'epub_stage_duration_seconds_count{stage="epub_parse"} 1' in exposition
+    assert 'epub_prompt_tokens_bucket{le="4096"} 1' in exposition
+    assert "epub_prompt_tokens_sum 3000" in exposition
+    assert registry.stage_totals() == {"epub_parse": pytest.approx(0.3)}
+
+
+def test_book_totals_are_written_as_json_lines_across_threads(tmp_path):
+    """
+    Tests that measurements made in worker threads are attributed to the bound book and written per book.
+    """
+    book_log_path = tmp_path / "books.jsonl"
+    registry = MetricsRegistry()
+    registry.configure(enabled=True, book_log_path=str(book_log_path))
+
+    def analyze(tokens):
+        registry.observe("prompt_tokens", tokens)
+        with registry.time_stage("model_call"):
+            pass
+        return tokens
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert pool.submit(registry.bind("pg1", analyze), 100).result() == 100
+        pool.submit(registry.bind("pg2", analyze), 200).result()
+        pool.submit(registry.bind("pg1", analyze), 50).result()
+    registry.finish_book("pg1")
+    registry.finish_book("pg2", error="analyze: boom")
+    registry.close()
+
+    records = [json.loads(line) for line in book_log_path.read_text().splitlines()]
+    assert records[0]["epub_id"] == "pg1"
+    assert records[0]["prompt_tokens"] == 150
+    assert records[0]["model_call_seconds"] >= 0
+    assert records[1] == {**records[1], "epub_id": "pg2", "prompt_tokens": 200, "error": "analyze: boom"}
+
+
+def test_captured_measurements_are_replayed_for_a_book():
+    """
+    Tests that measurements captured while disabled, as in a worker process, are recorded when replayed.
+    """
+    # Arrange
+    worker_registry = MetricsRegistry()
+    parent_registry = MetricsRegistry()
+    parent_registry.configure(enabled=True)
+
+    # Act
+    with worker_registry.capture() as observations:
+        worker_registry.observe("content_chars", 1000)
+        with worker_registry.time_stage("epub_parse"):
+            pass
+    parent_registry.replay(observations, book="pg1")
+
+    # Assert
+    assert not worker_registry.enabled
+    assert worker_registry.to_prometheus() == ""
+    assert [name for name, _, _ in observations] == ["content_chars", "stage_duration_seconds"]
+    assert parent_registry._books["pg1"]["content_chars"] == 1000
+    assert "epub_parse" in parent_registry.stage_totals()
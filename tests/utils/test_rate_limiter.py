@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import patch
+from src.utils.rate_limiter import RateLimiter
+
+
+def test_rate_limiter_without_limits_never_waits():
+    """
+    Tests that a limiter without limits lets every request through immediately.
+    """
+    limiter = RateLimiter()
+    assert all(limiter.reserve(tokens=10_000) == 0 for _ in range(100))
+
+
+@patch("src.utils.rate_limiter.time.monotonic", return_value=100.0)
+def test_rate_limiter_requests_per_minute(mock_monotonic):
+    """
+    Tests that requests beyond the per-minute burst wait for the bucket to refill.
+    """
+    limiter = RateLimiter(requests_per_minute=60)
+
+    waits = [limiter.reserve() for _ in range(62)]
+
+    assert waits[:60] == [0] * 60
+    assert waits[60] == 1.0
+    assert waits[61] == 2.0
+
+    mock_monotonic.return_value = 110.0
+    assert limiter.reserve() == 0
+
+
+@patch("src.utils.rate_limiter.time.monotonic", return_value=100.0)
+def test_rate_limiter_tokens_per_minute(mock_monotonic):
+    """
+    Tests that token usage is limited and oversized requests only wait for a full bucket.
+    """
+    limiter = RateLimiter(tokens_per_minute=1000)
+
+    assert limiter.reserve(tokens=600) == 0
+    assert limiter.reserve(tokens=600) == 12.0
+
+    mock_monotonic.return_value = 400.0
+    assert limiter.reserve(tokens=5000) == 0
+
+
+@patch("src.utils.rate_limiter.asyncio.sleep")
+@patch("src.utils.rate_limiter.time.sleep")
+def test_rate_limiter_acquire_sleeps_for_reserved_wait(mock_sleep, mock_async_sleep):
+    """
+    Tests that acquire and acquire_async wait for the reserved time.
+    """
+    limiter = RateLimiter(requests_per_minute=1)
+
+    limiter.acquire()
+    mock_sleep.assert_not_called()
+    limiter.acquire()
+    mock_sleep.assert_called_once()
+    asyncio.run(limiter.acquire_async())
+    mock_async_sleep.assert_called_once()
+
+
+@patch("src.utils.rate_limiter.time.monotonic", return_value=100.0)
+def test_rate_limiter_pause_holds_back_every_request(mock_monotonic):
+    """
+    Tests that a pause delays requests even when no limits are configured.
+    """
+    limiter = RateLimiter()
+    limiter.pause(5.0)
+
+    assert limiter.reserve() == 5.0
+    mock_monotonic.return_value = 103.0
+    assert limiter.reserve() == 2.0
+    mock_monotonic.return_value = 106.0
+    assert limiter.reserve() == 0